@@ -2,6 +2,15 @@
 import dash  # Librería principal para crear apps web interactivas en Python
 import dash_bootstrap_components as dbc  # Permite utilizar estilos y componentes de Bootstrap fácilmente
 from dash import dcc, page_container  # dcc contiene componentes como Tabs, Graphs, etc. page_container gestiona las páginas
+import pandas as pd  # Opciones globales de pandas para toda la aplicación
+from pages.sections.prerender import load_prerendered  # Carga de las figuras pre-renderizadas en el despliegue
+
+# Copy-on-Write de pandas: las vistas ligeras que CatalogDataset.frame entrega a los gráficos comparten
+# memoria con el DataFrame en caché, pero cualquier modificación sobre ellas copia sólo la columna afectada
+# y nunca altera los datos compartidos. El propio dataset lo activa al crearse (data_loader); se activa
+# también aquí, en el punto de entrada (también con gunicorn, que importa este módulo), para que la
+# limpieza inicial se ejecute ya en el mismo modo que el resto de la aplicación
+pd.set_option("mode.copy_on_write", True)
 
 # Creamos la instancia principal de la aplicación Dash
 # - __name__: nombre del módulo actual, necesario para rutas estáticas
@@ -17,6 +26,10 @@ app = dash.Dash(
 
 server = app.server
 
+# Si hay artefactos pre-renderizados válidos (python -m pages.sections.prerender), las figuras y tablas
+# se sirven desde ellos sin leer el CSV; si faltan o están obsoletos, todo se calcula en vivo
+load_prerendered()
+
 # Establecemos el título que aparecerá en la pestaña del navegador
 app.title = "Netflix Dash"
 
@@ -1,3 +1,48 @@
+// Funciones de los callbacks que se ejecutan en el navegador (clientside_callback en section_graphics.py):
+// no hacen ninguna petición al servidor
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  graficos: {
+    // Botones "Ver interpretación": abre o cierra el panel del mismo índice y cambia el texto del botón
+    alternar_interpretacion: function(n, isOpen) {
+      if (!n) return [isOpen, 'Ver interpretación'];
+      const abierto = !isOpen;
+      return [abierto, abierto ? 'Ocultar interpretación' : 'Ver interpretación'];
+    },
+
+    // Gráfico 4: figura ya calculada del periodo seleccionado (año, mes o día de la semana)
+    grafico_periodo: function(periodo, figuras) {
+      if (!figuras || !figuras[periodo]) return window.dash_clientside.no_update;
+      return figuras[periodo];
+    }
+  },
+
+  filtros: {
+    // Botón "Filtros": abre o cierra el panel
+    alternar_panel: function(n, isOpen) {
+      return !isOpen;
+    },
+
+    // Selección de los filtros globales a partir de los controles del panel (null = catálogo completo).
+    // Sólo se devuelve una selección nueva si ha cambiado, para no volver a dibujar las pestañas sin motivo
+    combinar: function(tipo, rating, pais, genero, coincidir, estreno, desde, hasta, min, max, actual) {
+      const filtros = {};
+      if (tipo && tipo.length) filtros.type = tipo;
+      if (rating && rating.length) filtros.rating = rating;
+      if (pais && pais.length) filtros.country = pais;
+      if (genero && genero.length) filtros.listed_in = genero;
+      if (estreno && (estreno[0] > min || estreno[1] < max)) filtros.release_year = estreno;
+      if (desde || hasta) filtros.date_added = [desde || null, hasta || null];
+      if (coincidir && coincidir.length && Object.keys(filtros).length) filtros.match_all = coincidir;
+
+      const nueva = Object.keys(filtros).length ? filtros : null;
+      if (JSON.stringify(nueva) === JSON.stringify(actual === undefined ? null : actual)) {
+        return window.dash_clientside.no_update;
+      }
+      return nueva;
+    }
+  }
+});
+
 // Espera a que todo el contenido del DOM esté completamente cargado
 document.addEventListener('DOMContentLoaded', function() {
 
@@ -37,12 +82,60 @@ document.addEventListener('DOMContentLoaded', function() {
     }
   }
 
-  // Ejecutar activateSection cada vez que el usuario hace scroll
-  window.addEventListener('scroll', activateSection);
+  // Pide al servidor los gráficos diferidos de una sección (una sola vez por sección)
+  // Cada gráfico diferido tiene un id {"type": "grafico-diferido", "index": n} y su marca de visibilidad
+  // {"type": "grafico-visible", "index": n}: al ponerla a true se ejecuta el callback cargar_grafico
+  const requestedSections = new WeakSet();
+
+  function requestLazyGraphs(section) {
+    if (!section || requestedSections.has(section)) return;
+    if (!window.dash_clientside || !window.dash_clientside.set_props) return;
+
+    requestedSections.add(section);
+    section.querySelectorAll('[id*="grafico-diferido"]').forEach(graph => {
+      const id = JSON.parse(graph.id);
+      window.dash_clientside.set_props({type: 'grafico-visible', index: id.index}, {data: true});
+    });
+  }
+
+  // Carga los gráficos de las secciones que están a menos de una pantalla de distancia
+  // y, por adelantado, los de la sección siguiente a cada una de ellas
+  function loadNearbySections() {
+    const sections = document.querySelectorAll('.scroll-section');
+    const margin = window.innerHeight;
+
+    sections.forEach((section, i) => {
+      const rect = section.getBoundingClientRect();
+      if (rect.top < window.innerHeight + margin && rect.bottom > -margin) {
+        requestLazyGraphs(section);
+        requestLazyGraphs(sections[i + 1]);
+      }
+    });
+  }
+
+  function onViewportChange() {
+    activateSection();
+    loadNearbySections();
+  }
+
+  // Ejecutar onViewportChange cada vez que el usuario hace scroll
+  window.addEventListener('scroll', onViewportChange);
 
   // También se vuelve a ejecutar si se redimensiona la ventana
-  window.addEventListener('resize', activateSection);
+  window.addEventListener('resize', onViewportChange);
+
+  // Las pestañas se montan sin que haya scroll: al añadirse secciones nuevas se comprueban también
+  // (agrupando los cambios del DOM de cada fotograma en una sola comprobación)
+  let pendingCheck = false;
+  new MutationObserver(() => {
+    if (pendingCheck) return;
+    pendingCheck = true;
+    requestAnimationFrame(() => {
+      pendingCheck = false;
+      loadNearbySections();
+    });
+  }).observe(document.body, {childList: true, subtree: true});
 
   // Se ejecuta una vez después de 500ms para asegurarse de aplicar el efecto tras la carga
-  setTimeout(activateSection, 500);
+  setTimeout(onViewportChange, 500);
 });
@@ -0,0 +1,71 @@
+"""
+Comprobación de que la memoria de la ingesta por bloques (NETFLIX_INGESTION=chunked) no crece con el
+número de bloques: lee el CSV con iter_chunked_aggregates (el mismo recorrido que
+build_chunked_aggregates) y mide con tracemalloc la memoria que queda retenida después de cada bloque.
+
+La única parte que crece con el archivo es el RowHashIndex (8 bytes por fila leída), que se descuenta.
+Una vez llenos los resúmenes de tamaño acotado (rankings y sunburst), la memoria retenida tiene que
+mantenerse: el script termina con código 1 si la del último punto de control supera a la del primero
+en más de la tolerancia indicada.
+
+--epsilon y --caminos fijan NETFLIX_TOPK_EPSILON y NETFLIX_SUNBURST_PATHS para que los resúmenes
+lleguen a su capacidad en pocos bloques (con los valores por defecto de la aplicación hacen falta
+archivos mucho más grandes para ver la meseta).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/chunked_memory.py [--csv data/synthetic/netflix_100000.csv] [--bloque 2000]
+                                        [--puntos 10 20 40] [--tolerancia 0.1]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(ROOT, "data", "synthetic", "netflix_100000.csv"))
+    parser.add_argument("--bloque", type=int, default=2000, help="filas por bloque")
+    parser.add_argument("--puntos", type=int, nargs="+", default=[10, 20, 40], help="bloques leídos en cada medida")
+    parser.add_argument("--tolerancia", type=float, default=0.1, help="crecimiento relativo máximo admitido")
+    parser.add_argument("--epsilon", default="0.001", help="NETFLIX_TOPK_EPSILON de la prueba")
+    parser.add_argument("--caminos", default="20000", help="NETFLIX_SUNBURST_PATHS de la prueba")
+    args = parser.parse_args()
+
+    # Las capacidades se leen al importar los módulos de agregados
+    os.environ["NETFLIX_TOPK_EPSILON"] = args.epsilon
+    os.environ["NETFLIX_SUNBURST_PATHS"] = args.caminos
+    from pages.sections.aggregates import iter_chunked_aggregates
+
+    puntos = sorted(set(args.puntos))
+    medidas = []
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for leidos, (aggregates, seen) in enumerate(iter_chunked_aggregates(args.csv, args.bloque), start=1):
+        if leidos in puntos:
+            gc.collect()
+            retenida = tracemalloc.get_traced_memory()[0] - len(seen) * 8
+            medidas.append((leidos, seen.rows, retenida))
+            print(f"{leidos:>6} bloques {seen.rows:>10,} filas {time.perf_counter() - t0:>8.1f} s  retenida {retenida / 2**20:>8.1f} MiB")
+        if leidos >= puntos[-1]:
+            break
+    tracemalloc.stop()
+
+    if len(medidas) < 2:
+        print(f"\nEl CSV no tiene bloques suficientes para {puntos[1]} puntos de control")
+        sys.exit(1)
+
+    primera, ultima = medidas[0][2], medidas[-1][2]
+    crecimiento = ultima / primera - 1
+    print(f"\nCrecimiento entre {medidas[0][0]} y {medidas[-1][0]} bloques: {crecimiento:+.1%} (máximo {args.tolerancia:.0%})")
+    if crecimiento > args.tolerancia:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
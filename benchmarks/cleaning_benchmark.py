@@ -0,0 +1,83 @@
+"""
+Benchmark de la limpieza del dataset: versión original (lambdas fila a fila)
+frente a la versión vectorizada de pages/sections/data_loader.py.
+
+Genera catálogos de 10x, 100x y 1000x el tamaño del CSV original replicando sus filas
+(con identificadores distintos y un pequeño porcentaje de duplicados reales),
+comprueba que ambas versiones producen exactamente el mismo DataFrame y mide sus tiempos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/cleaning_benchmark.py [--escalas 10 100 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pages.sections.data_loader import CSV_PATH, _clean_data  # noqa: E402
+
+
+def legacy_clean_data(df):
+    # Copia literal de la limpieza original, usada como referencia de resultado y de tiempo
+    df['date_added'] = pd.to_datetime(df['date_added'], errors='coerce')
+    invalid_values = {"", "Unknown", "unknown", "Not Available", "No cast", "nan", "NaN", "N/A"}
+    for col in ['director', 'cast', 'country', 'rating']:
+        df[col] = (
+            df[col]
+            .fillna("Unknown")
+            .astype(str)
+            .str.strip()
+            .replace(invalid_values, "Unknown")
+        )
+    df['rating'] = df['rating'].str.upper().str.replace(".", "", regex=False)
+    df['country'] = df['country'].str.replace(r",\s*$", "", regex=True)
+    df['duration_minutes'] = df['duration'].apply(
+        lambda x: int(x.split()[0]) if pd.notnull(x) and 'min' in x else None
+    )
+    df['duration_seasons'] = df['duration'].apply(
+        lambda x: int(x.split()[0]) if pd.notnull(x) and 'Season' in x else None
+    )
+    df.drop_duplicates(inplace=True)
+    text_columns = ['title', 'director', 'cast', 'country', 'rating', 'listed_in', 'description']
+    for col in text_columns:
+        df[col] = df[col].astype(str).str.strip()
+    return df
+
+
+def build_catalog(raw, escala, seed=0):
+    # Replica el CSV 'escala' veces con show_id únicos y añade un 1% de filas duplicadas
+    rng = np.random.default_rng(seed)
+    catalog = pd.concat([raw] * escala, ignore_index=True)
+    catalog["show_id"] = catalog["show_id"] + "-" + np.repeat(np.arange(escala), len(raw)).astype(str)
+    duplicados = catalog.sample(frac=0.01, random_state=int(rng.integers(1 << 31)))
+    return pd.concat([catalog, duplicados], ignore_index=True)
+
+
+def medir(funcion, df):
+    inicio = time.perf_counter()
+    resultado = funcion(df.copy())
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    raw = pd.read_csv(CSV_PATH)
+    print(f"{'Escala':>7}{'Filas':>11}{'Original (s)':>15}{'Vectorizada (s)':>18}{'Aceleración':>14}  Idéntico")
+    for escala in args.escalas:
+        catalog = build_catalog(raw, escala)
+        original, t_original = medir(legacy_clean_data, catalog)
+        nuevo, t_nuevo = medir(_clean_data, catalog)
+        identico = original.equals(nuevo) and original.index.equals(nuevo.index)
+        print(f"{escala:>6}x{len(catalog):>11}{t_original:>15.2f}{t_nuevo:>18.2f}{t_original / t_nuevo:>13.1f}x  {identico}")
+        del catalog, original, nuevo
+
+
+if __name__ == "__main__":
+    main()
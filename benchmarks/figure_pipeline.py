@@ -0,0 +1,86 @@
+"""
+Tiempo de construir todas las figuras de la pestaña de gráficos según cómo se reparten:
+una detrás de otra ("serial"), con un grupo de hilos ("thread") o con un grupo de procesos ("process").
+
+Cada modo se mide en un proceso nuevo con los agregados ya calculados y la caché de figuras vacía
+(tiempo mínimo de varias repeticiones). Se muestra también el tiempo de cada constructor en la última
+repetición: con el paralelismo la latencia debería acercarse a la del constructor más lento
+(siempre que haya tantas CPUs como figuras pesadas).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/figure_pipeline.py [--modos serial thread process] [--workers 4] [--repeticiones 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def run_mode(repeticiones):
+    # Se ejecuta en el proceso hijo (el modo y los workers llegan por las variables de entorno)
+    import pandas as pd
+    from pages.sections import aggregates, figure_pipeline, section_graphics
+    from pages.sections.figure_cache import FIGURE_CACHE
+
+    # Mismo modo de pandas que la aplicación (ver app.py)
+    pd.set_option("mode.copy_on_write", True)
+
+    # Una construcción previa en este proceso carga los módulos que plotly importa bajo demanda;
+    # si no, cada proceso del grupo los cargaría de nuevo y se mediría esa carga en lugar de las figuras
+    calls = [(builder, ()) for builder in section_graphics.GRAPHICS_FIGURES]
+    aggregates.get_aggregates()
+    figure_pipeline.build_figures(calls, pool="serial")
+    # Como en gunicorn.conf.py: el grupo de procesos se crea una vez, antes de medir
+    if figure_pipeline.FIGURE_POOL == "process":
+        figure_pipeline.start_process_pool()
+    times = []
+    for _ in range(repeticiones):
+        FIGURE_CACHE.clear()
+        t0 = time.perf_counter()
+        figure_pipeline.build_figures(calls)
+        times.append(time.perf_counter() - t0)
+    return {"time_s": min(times), "builders": figure_pipeline.last_timings["builders"]}
+
+
+def measure(mode, workers, repeticiones):
+    env = dict(os.environ, NETFLIX_FIGURE_POOL=mode, NETFLIX_PRELOAD="0")
+    if workers:
+        env["NETFLIX_FIGURE_WORKERS"] = str(workers)
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--hijo", "--repeticiones", str(repeticiones)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modos", nargs="+", default=["serial", "thread", "process"])
+    parser.add_argument("--workers", type=int, help="hilos o procesos (por defecto, el número de CPUs)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(run_mode(args.repeticiones)))
+        return
+
+    results = {mode: measure(mode, args.workers, args.repeticiones) for mode in args.modos}
+
+    print(f"CPUs disponibles: {os.cpu_count()}\n")
+    print(f"{'Constructor':<42}" + "".join(f"{mode:>12}" for mode in args.modos))
+    for name in results[args.modos[0]]["builders"]:
+        row = "".join(f"{results[mode]['builders'][name] * 1000:>9.1f} ms" for mode in args.modos)
+        print(f"{name:<42}{row}")
+    print(f"{'Todas las figuras':<42}" + "".join(f"{results[mode]['time_s'] * 1000:>9.1f} ms" for mode in args.modos))
+    slowest = max(results[args.modos[0]]["builders"].values())
+    print(f"{'Constructor más lento':<42}{slowest * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Recuentos exactos frente al resumen de entidades frecuentes (SpaceSavingCounts) en los rankings de
+actores, directores y países, leyendo el catálogo por bloques como la ingesta "chunked".
+
+Para cada columna y cada modo (exacto y los ε indicados) se muestra el número de entidades guardadas,
+su memoria, el error máximo garantizado, si el top 20 está garantizado (top_is_exact) y si coincide
+con el top 20 exacto (mismos recuentos y entidades; los empates en el último puesto pueden ordenarse distinto).
+Termina con código 1 si algún top garantizado no coincide con el exacto.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/heavy_hitters.py [--csv data/synthetic/netflix_100000.csv] [--epsilon 0.0001 0.001 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pages.sections.aggregates import TOPK_COLUMNS, _entity_counts, _entity_summary
+from pages.sections.bridges import BridgeTable
+from pages.sections.data_loader import CHUNK_SIZE, iter_clean_chunks
+from pages.sections.heavy_hitters import default_capacity
+
+# Valores excluidos de cada ranking (los mismos que en figures.py)
+EXCLUDE = {
+    "country": None,
+    "cast": {"unknown", "Unknown", "Not Available", "No cast", ""},
+    "director": {"unknown", "Unknown", "Not Available", "No director", ""},
+}
+
+
+def _memory(summary):
+    # Bytes del resumen: nombres de las entidades (una vez) y valores de cada Series
+    series = [summary.counts, summary.first_seen] + ([summary.errors] if hasattr(summary, "errors") else [])
+    return summary.counts.index.memory_usage(deep=True) + sum(serie.to_numpy().nbytes for serie in series)
+
+
+def _same_top(top, reference):
+    # Mismos recuentos y mismas entidades salvo el orden de los empates en el último recuento del top
+    if [count for _, count in top] != [count for _, count in reference]:
+        return False
+    last = reference[-1][1] if reference else 0
+    return {name for name, count in top if count > last} == {name for name, count in reference if count > last}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=os.path.join(ROOT, "data", "netflix.csv"))
+    parser.add_argument("--epsilon", type=float, nargs="+", default=[0.0001, 0.001, 0.01])
+    parser.add_argument("--bloque", type=int, default=CHUNK_SIZE, help="filas por bloque")
+    args = parser.parse_args()
+
+    modes = [("exacto", None)] + [(f"ε={epsilon:g}", default_capacity(epsilon)) for epsilon in args.epsilon]
+    summaries = {(col, name): None for col in TOPK_COLUMNS for name, _ in modes}
+
+    t0 = time.perf_counter()
+    for chunk, _ in iter_clean_chunks(args.csv, args.bloque):
+        positions = chunk.index.to_numpy()
+        for col in TOPK_COLUMNS:
+            bridge = BridgeTable.from_series(chunk[col])
+            for name, capacity in modes:
+                partial = _entity_counts(bridge, positions) if capacity is None else _entity_summary(bridge, positions, capacity)
+                previous = summaries[(col, name)]
+                summaries[(col, name)] = partial if previous is None else previous.merge(partial)
+    print(f"{args.csv}: {time.perf_counter() - t0:.1f} s en bloques de {args.bloque} filas\n")
+
+    failures = []
+    print(f"{'Columna':<10}{'Modo':<12}{'Entidades':>11}{'Memoria':>12}{'Error máx.':>12}{'Top garantizado':>17}{'Igual al exacto':>17}")
+    for col in TOPK_COLUMNS:
+        reference = list(summaries[(col, "exacto")].value_counts(EXCLUDE[col]).nlargest(20).items())
+        for name, capacity in modes:
+            summary = summaries[(col, name)]
+            top = list(summary.value_counts(EXCLUDE[col]).nlargest(20).items())
+            guaranteed = capacity is None or summary.top_is_exact(20, EXCLUDE[col])
+            same = _same_top(top, reference)
+            error = 0 if capacity is None else summary.max_error
+            print(
+                f"{col:<10}{name:<12}{len(summary.counts):>11,}{_memory(summary) / 2**20:>8.2f} MiB"
+                f"{error:>12}{'sí' if guaranteed else 'no':>17}{'sí' if same else 'no':>17}"
+            )
+            if guaranteed and not same:
+                failures.append(f"{col} {name}")
+
+    # Un top garantizado tiene que coincidir con el exacto
+    if failures:
+        print("\nTop garantizado distinto del exacto: " + ", ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
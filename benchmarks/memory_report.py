@@ -0,0 +1,59 @@
+"""
+Informe de memoria del DataFrame limpio: bytes por columna en la representación
+estándar frente a la compacta (categorías + enteros pequeños con máscara de nulos),
+con y sin la columna 'description'.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/memory_report.py
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pages.sections.data_loader import get_clean_data, to_compact  # noqa: E402
+
+
+def bytes_por_columna(df):
+    # memory_usage(deep=True) cuenta también las cadenas Python referenciadas por las columnas 'object'
+    return df.memory_usage(deep=True, index=False)
+
+
+def formato(n):
+    return "—" if pd.isna(n) else f"{n / 1024:,.1f} KiB"
+
+
+def main():
+    estandar = get_clean_data(compact=False)
+    compacto = to_compact(estandar)
+    sin_descripcion = to_compact(estandar, include_description=False)
+
+    informe = pd.DataFrame({
+        "estándar": bytes_por_columna(estandar),
+        "compacto": bytes_por_columna(compacto),
+        "compacto sin description": bytes_por_columna(sin_descripcion),
+    })
+    informe["tipo compacto"] = compacto.dtypes.astype(str)
+
+    print(f"Filas: {len(estandar)}\n")
+    print(f"{'Columna':<18}{'Estándar':>14}{'Compacto':>14}{'Sin description':>18}  Tipo compacto")
+    for columna, fila in informe.iterrows():
+        print(
+            f"{columna:<18}{formato(fila['estándar']):>14}{formato(fila['compacto']):>14}"
+            f"{formato(fila['compacto sin description']):>18}  {fila['tipo compacto']}"
+        )
+
+    totales = informe[["estándar", "compacto", "compacto sin description"]].sum()
+    print(
+        f"{'TOTAL':<18}{formato(totales['estándar']):>14}{formato(totales['compacto']):>14}"
+        f"{formato(totales['compacto sin description']):>18}"
+    )
+    print(
+        f"\nReducción: x{totales['estándar'] / totales['compacto']:.1f} (compacto), "
+        f"x{totales['estándar'] / totales['compacto sin description']:.1f} (compacto sin description)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Tamaño de lo que se envía al navegador por cada gráfico y por cada pestaña de /analisis.
+
+Para cada constructor get_* de pages/sections/figures.py se muestra el tamaño del JSON de la figura
+(lo que viaja en la respuesta del callback), cuánto de él son los datos de las trazas y cuánto el
+layout (plantilla, ejes, títulos), y el tamaño comprimido con gzip. Al final, el de cada pestaña.
+
+Con --limite termina con código 1 si algún gráfico supera ese tamaño (en KiB), para detectar figuras
+que vuelven a mandar una fila por título en lugar de datos ya agregados.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/payload_report.py [--csv data/synthetic/netflix_100000.csv] [--limite 64]
+"""
+import argparse
+import gzip
+import inspect
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _sizes(payload):
+    # Bytes del JSON y del JSON comprimido
+    return len(payload), len(gzip.compress(payload.encode("utf-8")))
+
+
+def figure_payloads():
+    """
+    (nombre, bytes JSON, bytes de las trazas, bytes del layout, bytes gzip) de cada gráfico,
+    construido sin la caché de figuras.
+    """
+    from plotly.io.json import to_json_plotly
+    from pages.sections import figures
+
+    rows = []
+    for name, builder in inspect.getmembers(figures, inspect.isfunction):
+        if not name.startswith("get_") or builder.__module__ != figures.__name__:
+            continue
+        fig = getattr(builder, "uncached", builder)()
+        total, compressed = _sizes(fig.to_json())
+        data = len(to_json_plotly(fig.to_plotly_json()["data"]))
+        layout = len(to_json_plotly(fig.to_plotly_json()["layout"]))
+        rows.append((name, total, data, layout, compressed))
+    return rows
+
+
+def tab_payloads():
+    # Árbol de componentes serializado de cada pestaña (como lo devuelve render_content)
+    from plotly.io.json import to_json_plotly
+    from pages.sections import section_characteristics, section_graphics
+
+    return [
+        (f"{section.__name__.rsplit('.', 1)[-1]}.layout", *_sizes(to_json_plotly(section.layout.uncached())))
+        for section in (section_characteristics, section_graphics)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="catálogo a usar (por defecto, el de NETFLIX_CSV o data/netflix.csv)")
+    parser.add_argument("--limite", type=float, help="tamaño máximo permitido por gráfico, en KiB")
+    args = parser.parse_args()
+
+    # El catálogo se elige antes de importar la aplicación (data_loader lee NETFLIX_CSV al importarse)
+    if args.csv:
+        os.environ["NETFLIX_CSV"] = os.path.abspath(args.csv)
+    os.environ.setdefault("NETFLIX_SNAPSHOT", "0")
+    os.chdir(ROOT)
+
+    rows = figure_payloads()
+    print(f"{'Gráfico':<36}{'JSON':>12}{'Trazas':>12}{'Layout':>12}{'gzip':>12}")
+    for name, total, data, layout, compressed in sorted(rows, key=lambda row: -row[1]):
+        print(
+            f"{name:<36}{total / 1024:>8.1f} KiB{data / 1024:>8.1f} KiB"
+            f"{layout / 1024:>8.1f} KiB{compressed / 1024:>8.1f} KiB"
+        )
+
+    print(f"\n{'Pestaña':<36}{'JSON':>12}{'gzip':>12}")
+    for name, total, compressed in tab_payloads():
+        print(f"{name:<36}{total / 1024:>8.1f} KiB{compressed / 1024:>8.1f} KiB")
+
+    if args.limite is not None:
+        over = [(name, total) for name, total, *_ in rows if total > args.limite * 1024]
+        if over:
+            print(f"\n{len(over)} gráficos superan {args.limite:g} KiB:")
+            for name, total in over:
+                print(f"  {name:<36}{total / 1024:>8.1f} KiB")
+            sys.exit(1)
+        print(f"\nNingún gráfico supera {args.limite:g} KiB")
+
+
+if __name__ == "__main__":
+    main()
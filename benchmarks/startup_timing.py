@@ -0,0 +1,73 @@
+"""
+Comparativa de tiempos de arranque de get_clean_data.
+
+Mide, en procesos nuevos (como un worker de gunicorn recién lanzado), el tiempo de
+carga del dataset limpio en tres escenarios:
+  - sin instantánea (lectura del CSV y limpieza completa),
+  - primer arranque (limpieza completa + escritura de la instantánea),
+  - arranque con la instantánea Parquet ya generada.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/startup_timing.py [--repeticiones 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Código que ejecuta cada proceso hijo: importa pandas aparte para medir sólo la carga
+CHILD_CODE = """
+import time
+import pandas
+from pages.sections import data_loader
+t0 = time.perf_counter()
+data_loader.get_clean_data()
+print(time.perf_counter() - t0)
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(env_extra):
+    env = dict(os.environ, **env_extra)
+    salida = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    # Se usa una carpeta temporal para no tocar la instantánea real del proyecto
+    snapshot_dir = tempfile.mkdtemp(prefix="netflix-snapshot-")
+    try:
+        sin_cache = [medir({"NETFLIX_SNAPSHOT": "0"}) for _ in range(args.repeticiones)]
+
+        primer_arranque = []
+        for _ in range(args.repeticiones):
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            primer_arranque.append(medir({"NETFLIX_SNAPSHOT_DIR": snapshot_dir}))
+
+        con_cache = [medir({"NETFLIX_SNAPSHOT_DIR": snapshot_dir}) for _ in range(args.repeticiones)]
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    print(f"{'Escenario':<32}{'mediana (ms)':>14}{'mín (ms)':>12}")
+    for nombre, tiempos in [
+        ("CSV sin instantánea", sin_cache),
+        ("CSV + escritura de instantánea", primer_arranque),
+        ("Instantánea Parquet", con_cache),
+    ]:
+        print(f"{nombre:<32}{statistics.median(tiempos) * 1000:>14.1f}{min(tiempos) * 1000:>12.1f}")
+    print(f"Aceleración: x{statistics.median(sin_cache) / statistics.median(con_cache):.1f}")
+
+
+if __name__ == "__main__":
+    main()
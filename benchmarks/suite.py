@@ -0,0 +1,296 @@
+"""
+Batería de benchmarks de la aplicación a varias escalas del catálogo.
+
+Para cada escala (el catálogo real o un catálogo sintético de N títulos, ver synthetic_catalog.py)
+se lanza un proceso nuevo que mide, paso a paso:
+  - get_clean_data (lectura del CSV y limpieza, sin instantánea),
+  - get_cube (cubo de agregación con las vistas materializadas),
+  - get_time_index (índice temporal con sumas acumuladas por fecha de subida),
+  - get_aggregates (agregados compartidos por todos los gráficos),
+  - cada constructor get_* de pages/sections/figures.py,
+  - section_characteristics.layout() y section_graphics.layout() (sin y con la caché de figuras).
+
+De cada paso se guarda el tiempo (mínimo de varias repeticiones), el pico de memoria (tracemalloc,
+en una ejecución aparte) y el tamaño del JSON serializado de la figura o el layout. La carga y los
+agregados se miden sin caché (se vacía antes de cada repetición); los gráficos, con ellos ya en caché.
+
+Los resultados se escriben en JSON. Con --baseline se comparan con una ejecución anterior y el
+script termina con código 1 si algún paso es más lento que en la baseline por encima de la tolerancia
+o si algún paso de la baseline (en las escalas medidas) ya no se mide. Los pasos nuevos sin
+referencia en la baseline se listan como aviso. Al comparar se usan por defecto más repeticiones
+(BASELINE_REPETITIONS) y varios procesos por escala (BASELINE_PROCESSES, quedándose con el mínimo):
+el ruido de una sola medida, o de un proceso que cae en un núcleo más lento, no cuenta como regresión.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/suite.py [--escalas real 100000 1000000] [--salida benchmarks/results.json]
+    python benchmarks/suite.py --baseline benchmarks/baseline.json [--tolerancia 0.25]
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Escalas por defecto: catálogo real y catálogos sintéticos de 100.000 y 1.000.000 de títulos
+DEFAULT_SCALES = ["real", "100000", "1000000"]
+
+# Diferencia mínima (en segundos) para considerar una regresión: evita falsos positivos
+# en pasos de pocos milisegundos donde el ruido supera la tolerancia relativa
+MIN_REGRESSION_SECONDS = 0.005
+
+# Repeticiones por defecto de cada paso (mínimo de todas ellas): al comparar con una baseline se usan
+# más para que el mínimo sea estable y la tolerancia no salte por ruido
+DEFAULT_REPETITIONS = 3
+BASELINE_REPETITIONS = 7
+
+# Procesos por escala: el tiempo de un mismo paso varía más entre procesos que entre repeticiones
+# de un proceso (ubicación en la CPU, disposición de la memoria), así que al comparar con una
+# baseline cada escala se mide en varios procesos nuevos y se toma el mejor de ellos
+DEFAULT_PROCESSES = 1
+BASELINE_PROCESSES = 3
+
+
+def _steps():
+    """
+    Lista de pasos (nombre, función, devuelve_figura) que se miden en el proceso hijo.
+    El orden importa: la carga y los agregados van primero para que el resto se mida con ellos en caché.
+    """
+    from pages.sections import data_loader, aggregates, cube, time_index, figures, section_characteristics, section_graphics
+    from pages.sections.figure_cache import FIGURE_CACHE
+
+    def clean_data():
+        data_loader._get_dataset.cache_clear()
+        return data_loader.get_clean_data()
+
+    def build_aggregates():
+        return aggregates.CatalogAggregates.from_dataset(data_loader.get_dataset())
+
+    def build_cube():
+        return cube.AggregationCube.from_dataset(data_loader.get_dataset())
+
+    def build_time_index():
+        return time_index.TimeIndex.from_dataset(data_loader.get_dataset())
+
+    steps = [
+        ("get_clean_data", clean_data, False),
+        ("get_cube", build_cube, False),
+        ("get_time_index", build_time_index, False),
+        ("get_aggregates", build_aggregates, False),
+        # Agregados en caché para el resto de pasos (no se mide)
+        (None, aggregates.get_aggregates, False),
+    ]
+    # Los constructores se miden sin la caché de figuras (builder.uncached); las pestañas, con ella
+    for name, builder in inspect.getmembers(figures, inspect.isfunction):
+        if name.startswith("get_") and builder.__module__ == figures.__name__:
+            steps.append((name, getattr(builder, "uncached", builder), True))
+    for periodo in ["mes", "día"]:
+        by_period = getattr(figures.get_bar_plot_by_period, "uncached", figures.get_bar_plot_by_period)
+        steps.append((f"get_bar_plot_by_period[{periodo}]", lambda p=periodo: by_period(p), True))
+    steps += [
+        ("section_characteristics.layout", section_characteristics.layout.uncached, False),
+        ("section_graphics.layout", lambda: (FIGURE_CACHE.clear(), section_graphics.layout())[1], False),
+        ("section_graphics.layout[caché]", section_graphics.layout, False),
+    ]
+    return steps
+
+
+def _json_size(result, is_figure):
+    # Bytes del JSON que recibe el navegador: figuras, componentes de Dash o su versión ya serializada
+    # a diccionario (los layouts de las pestañas que salen de la caché de figuras)
+    import plotly.utils
+    from plotly.io.json import to_json_plotly
+    if is_figure:
+        return len(result.to_json())
+    if hasattr(result, "to_plotly_json"):
+        return len(to_json_plotly(result))
+    if isinstance(result, dict):
+        return len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+    return None
+
+
+def run_scale(repeticiones):
+    """
+    Mide todos los pasos en el proceso actual (se llama en un proceso hijo por escala).
+    La primera ejecución de cada paso mide el pico de memoria; las siguientes, el tiempo
+    (tracemalloc ralentiza mucho la ejecución, así que no se mezclan ambas medidas).
+    """
+    import pandas as pd
+
+    # Mismo modo de pandas que la aplicación (ver app.py)
+    pd.set_option("mode.copy_on_write", True)
+    results = []
+    for name, step, is_figure in _steps():
+        if name is None:
+            step()
+            continue
+
+        tracemalloc.start()
+        result = step()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        times = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            step()
+            times.append(time.perf_counter() - t0)
+
+        results.append({
+            "step": name,
+            "time_s": min(times),
+            "peak_mib": peak / 2**20,
+            "json_bytes": _json_size(result, is_figure),
+        })
+    return results
+
+
+def _catalog_path(scale):
+    # El catálogo real o uno sintético (generado una sola vez por escala y semilla 0)
+    if scale == "real":
+        return os.path.join(ROOT, "data", "netflix.csv")
+
+    from synthetic_catalog import write_catalog
+    path = os.path.join(ROOT, "data", "synthetic", f"netflix_{scale}.csv")
+    if not os.path.exists(path):
+        print(f"Generando catálogo sintético de {scale} títulos...", file=sys.stderr)
+        write_catalog(path, int(scale))
+    return path
+
+
+def measure(scale, repeticiones, procesos=1):
+    """
+    Mide la escala en 'procesos' procesos nuevos, sin cachés ni instantáneas previas,
+    y se queda con el menor tiempo y el menor pico de memoria de cada paso.
+    """
+    best = {}
+    for _ in range(procesos):
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            env = dict(
+                os.environ, NETFLIX_CSV=_catalog_path(scale), NETFLIX_SNAPSHOT="0",
+                NETFLIX_SNAPSHOT_DIR=snapshot_dir, NETFLIX_PRELOAD="0",
+            )
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--hijo", "--repeticiones", str(repeticiones)],
+                cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+            )
+        for r in json.loads(salida.stdout.strip().splitlines()[-1]):
+            previous = best.setdefault(r["step"], r)
+            previous["time_s"] = min(previous["time_s"], r["time_s"])
+            previous["peak_mib"] = min(previous["peak_mib"], r["peak_mib"])
+    return [dict(r, scale=scale) for r in best.values()]
+
+
+def compare(results, baseline, tolerancia):
+    """
+    Devuelve los pasos más lentos que en la baseline por encima de la tolerancia relativa
+    (y de MIN_REGRESSION_SECONDS en valor absoluto).
+    """
+    previous = {(r["scale"], r["step"]): r["time_s"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        before = previous.get((r["scale"], r["step"]))
+        if before is None:
+            continue
+        if r["time_s"] > before * (1 + tolerancia) and r["time_s"] - before > MIN_REGRESSION_SECONDS:
+            regressions.append({**r, "baseline_s": before, "ratio": r["time_s"] / before})
+    return regressions
+
+
+def unmatched(results, baseline):
+    """
+    Pasos sin pareja entre la ejecución y la baseline: (nuevos, ausentes).
+    - nuevos: pasos medidos que no están en la baseline (no se pueden comparar).
+    - ausentes: pasos de la baseline, en alguna de las escalas medidas, que no se han medido
+      (p. ej. un gráfico renombrado o eliminado sin actualizar la baseline).
+    """
+    measured = {(r["scale"], r["step"]) for r in results}
+    previous = {(r["scale"], r["step"]) for r in baseline["results"]}
+    scales = {scale for scale, _ in measured}
+    new = sorted(measured - previous)
+    missing = sorted(key for key in previous - measured if key[0] in scales)
+    return new, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", nargs="+", default=DEFAULT_SCALES, help="'real' o número de títulos sintéticos")
+    parser.add_argument(
+        "--repeticiones", type=int,
+        help=f"repeticiones de cada paso ({DEFAULT_REPETITIONS} por defecto, {BASELINE_REPETITIONS} con --baseline)",
+    )
+    parser.add_argument(
+        "--procesos", type=int,
+        help=f"procesos por escala ({DEFAULT_PROCESSES} por defecto, {BASELINE_PROCESSES} con --baseline)",
+    )
+    parser.add_argument("--salida", default=os.path.join(ROOT, "benchmarks", "results.json"))
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento relativo permitido (0.25 = 25 %%)")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.repeticiones is None:
+        args.repeticiones = BASELINE_REPETITIONS if args.baseline else DEFAULT_REPETITIONS
+    if args.procesos is None:
+        args.procesos = BASELINE_PROCESSES if args.baseline else DEFAULT_PROCESSES
+
+    if args.hijo:
+        print(json.dumps(run_scale(args.repeticiones)))
+        return
+
+    results = []
+    for scale in args.escalas:
+        print(f"Midiendo escala {scale}...", file=sys.stderr)
+        results += measure(scale, args.repeticiones, args.procesos)
+
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeticiones": args.repeticiones,
+            "procesos": args.procesos,
+        },
+        "results": results,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"{'Escala':>9}  {'Paso':<40}{'Tiempo':>11}{'Pico mem.':>13}{'JSON':>12}")
+    for r in results:
+        json_kib = "—" if r["json_bytes"] is None else f"{r['json_bytes'] / 1024:,.1f} KiB"
+        print(f"{r['scale']:>9}  {r['step']:<40}{r['time_s'] * 1000:>8.1f} ms{r['peak_mib']:>9.1f} MiB{json_kib:>12}")
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerancia)
+        new, missing = unmatched(results, baseline)
+
+        if new:
+            print(f"\nAviso: {len(new)} pasos sin referencia en la baseline (no se comparan):")
+            for scale, step in new:
+                print(f"  {scale:>9}  {step}")
+        if missing:
+            print(f"\n{len(missing)} pasos de la baseline que no se han medido (¿renombrados o eliminados?):")
+            for scale, step in missing:
+                print(f"  {scale:>9}  {step}")
+        if regressions:
+            print(f"\n{len(regressions)} pasos más lentos que la baseline (tolerancia {args.tolerancia:.0%}):")
+            for r in regressions:
+                print(f"  {r['scale']:>9}  {r['step']:<40}{r['baseline_s'] * 1000:>8.1f} ms -> {r['time_s'] * 1000:.1f} ms (x{r['ratio']:.2f})")
+        if regressions or missing:
+            sys.exit(1)
+        print(f"\nSin regresiones respecto a {args.baseline} (tolerancia {args.tolerancia:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Generador de catálogos sintéticos con el mismo esquema que data/netflix.csv, para pruebas de escala.
+
+Los catálogos son realistas porque se construyen a partir del catálogo real:
+  - las columnas escalares (tipo, año, fecha de subida, clasificación, duración, descripción) se toman
+    juntas de una fila real elegida al azar, así que conservan sus formatos de texto
+    ("September 25, 2021", "90 min", "2 Seasons"), sus correlaciones y su proporción de valores inválidos,
+  - las columnas multivaluadas conservan el número de elementos (y los nulos) de esa misma fila,
+    pero sus elementos se sortean con la popularidad de cola larga del catálogo real:
+      · géneros: los de la fila real (dependen del tipo de contenido),
+      · países: sorteados entre los países reales con su frecuencia real,
+      · actores y directores: sorteados entre un vocabulario que crece con el tamaño del catálogo
+        (ley de Heaps) con nombres nuevos formados por nombres y apellidos reales; la popularidad
+        de cada nombre nuevo se toma de la distribución de frecuencias real.
+  - opcionalmente se repite una fracción de filas para ejercitar la eliminación de duplicados.
+
+El resultado es determinista dada la semilla (y el tamaño de bloque).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/synthetic_catalog.py --titulos 100000 [--semilla 0] [--salida data/synthetic/netflix_100000.csv]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Catálogo real del que se toman las distribuciones
+REAL_CSV_PATH = os.path.join(ROOT, "data", "netflix.csv")
+
+# Exponente de la ley de Heaps: el vocabulario de actores y directores crece como n^HEAPS_EXPONENT
+HEAPS_EXPONENT = 0.8
+
+# Columnas cuyo valor se copia de la fila real de referencia
+SCALAR_COLUMNS = ['type', 'date_added', 'release_year', 'rating', 'duration', 'description']
+
+# Filas por bloque al generar (la memoria depende del bloque, no del tamaño del catálogo)
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class _Vocabulary:
+    """
+    Vocabulario de entidades con su peso de popularidad y muestreo por la función de distribución acumulada.
+    """
+
+    def __init__(self, names, weights):
+        self.names = np.asarray(names, dtype=object)
+        self.cdf = np.cumsum(weights, dtype=np.float64)
+        self.cdf /= self.cdf[-1]
+
+    def sample(self, rng, size):
+        return self.names[np.searchsorted(self.cdf, rng.random(size), side="right").clip(max=len(self.names) - 1)]
+
+
+def _entity_counts(serie):
+    # Frecuencia real de cada entidad de una columna multivaluada
+    return serie.dropna().str.split(", ").explode().str.strip().value_counts()
+
+
+def _scaled_vocabulary(counts, n_titles, n_real, rng):
+    """
+    Vocabulario de actores o directores para un catálogo de n_titles títulos: las entidades reales
+    más nombres nuevos (nombre real + apellido real) hasta el tamaño que marca la ley de Heaps.
+    """
+    target = int(len(counts) * max(1.0, n_titles / n_real) ** HEAPS_EXPONENT)
+    names = list(counts.index)
+    weights = [counts.to_numpy(dtype=np.float64)]
+
+    missing = target - len(names)
+    if missing > 0:
+        parts = counts.index.to_series().str.split(" ", n=1)
+        parts = parts[parts.str.len() == 2]
+        firsts = parts.str[0].to_numpy(dtype=object)
+        lasts = parts.str[1].to_numpy(dtype=object)
+
+        # Se generan combinaciones de sobra y se descartan las repetidas o ya existentes
+        seen = set(names)
+        new_names = []
+        while len(new_names) < missing:
+            batch = 2 * (missing - len(new_names))
+            candidates = pd.unique(firsts[rng.integers(len(firsts), size=batch)] + " " + lasts[rng.integers(len(lasts), size=batch)])
+            for name in candidates:
+                if name not in seen:
+                    seen.add(name)
+                    new_names.append(name)
+                    if len(new_names) == missing:
+                        break
+        names += new_names
+        weights.append(rng.choice(counts.to_numpy(dtype=np.float64), size=missing))
+
+    return _Vocabulary(names, np.concatenate(weights))
+
+
+def _join_lists(values, lengths):
+    # Une los elementos sorteados en cadenas "a, b, c" según la longitud de cada lista (0 = nulo)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return [", ".join(values[start:end]) if end > start else np.nan for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def generate_catalog(n_titles, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, duplicate_rate=0.0, source=REAL_CSV_PATH):
+    """
+    Genera un catálogo sintético de n_titles filas (más las duplicadas) con el esquema del CSV,
+    devolviéndolo por bloques de chunk_size filas (DataFrames).
+    """
+    rng = np.random.default_rng(seed)
+    real = pd.read_csv(source)
+    n_real = len(real)
+
+    # Longitud de cada lista en la fila real (0 si es nula)
+    lengths = {col: real[col].str.split(", ").str.len().fillna(0).to_numpy(dtype=np.int64) for col in ['cast', 'director', 'country']}
+    trailing_comma = real['country'].str.endswith(",", na=False).to_numpy()
+
+    vocabularies = {
+        'cast': _scaled_vocabulary(_entity_counts(real['cast']), n_titles, n_real, rng),
+        'director': _scaled_vocabulary(_entity_counts(real['director']), n_titles, n_real, rng),
+    }
+    country_counts = _entity_counts(real['country'].str.rstrip(", "))
+    vocabularies['country'] = _Vocabulary(country_counts.index, country_counts.to_numpy(dtype=np.float64))
+
+    # Veces que ya se ha usado cada fila real (para numerar los títulos repetidos)
+    uses = np.zeros(n_real, dtype=np.int64)
+
+    for start in range(0, n_titles, chunk_size):
+        size = min(chunk_size, n_titles - start)
+        source_rows = rng.integers(n_real, size=size)
+
+        chunk = pd.DataFrame({'show_id': [f"s{i}" for i in range(start + 1, start + size + 1)]})
+        chunk['type'] = real['type'].to_numpy()[source_rows]
+
+        # Títulos reales; cuando una fila real se reutiliza, su título se numera para que sean distintos
+        occurrence = pd.Series(source_rows).groupby(source_rows).cumcount().to_numpy() + uses[source_rows]
+        uses += np.bincount(source_rows, minlength=n_real)
+        titles = pd.Series(real['title'].to_numpy(dtype=object)[source_rows])
+        chunk['title'] = titles.where(occurrence == 0, titles + " " + pd.Series(occurrence + 1).astype(str))
+
+        for col in ['director', 'cast', 'country']:
+            col_lengths = lengths[col][source_rows]
+            chunk[col] = _join_lists(vocabularies[col].sample(rng, int(col_lengths.sum())), col_lengths)
+        chunk.loc[trailing_comma[source_rows], 'country'] += ","
+
+        for col in SCALAR_COLUMNS:
+            chunk[col] = real[col].to_numpy()[source_rows]
+        chunk['listed_in'] = real['listed_in'].to_numpy()[source_rows]
+        chunk = chunk[real.columns]
+
+        # Filas repetidas (copias exactas de otras filas del bloque)
+        if duplicate_rate > 0:
+            duplicates = chunk.iloc[rng.integers(size, size=int(size * duplicate_rate))]
+            chunk = pd.concat([chunk, duplicates], ignore_index=True)
+
+        yield chunk
+
+
+def write_catalog(path, n_titles, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, duplicate_rate=0.0):
+    # Escribe el catálogo sintético en 'path' bloque a bloque
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    for i, chunk in enumerate(generate_catalog(n_titles, seed, chunk_size, duplicate_rate)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titulos", type=int, default=100_000, help="número de títulos del catálogo")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--duplicados", type=float, default=0.0, help="fracción de filas repetidas")
+    parser.add_argument("--bloque", type=int, default=DEFAULT_CHUNK_SIZE, help="filas por bloque")
+    parser.add_argument("--salida", help="ruta del CSV (por defecto data/synthetic/netflix_<titulos>.csv)")
+    args = parser.parse_args()
+
+    salida = args.salida or os.path.join(ROOT, "data", "synthetic", f"netflix_{args.titulos}.csv")
+    t0 = time.perf_counter()
+    write_catalog(salida, args.titulos, args.semilla, args.bloque, args.duplicados)
+    print(f"{args.titulos} títulos escritos en {salida} ({time.perf_counter() - t0:.1f} s, {os.path.getsize(salida) / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
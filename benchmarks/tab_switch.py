@@ -0,0 +1,92 @@
+"""
+Latencia del cambio de pestaña en /analisis.
+
+Lanza la aplicación en un proceso nuevo (sin artefactos pre-renderizados), abre una vez cada pestaña
+para que los datos y las cachés se llenen como en un uso normal y después alterna entre las dos
+pestañas llamando al callback render_content por HTTP (cliente de pruebas de Flask), igual que hace
+el navegador. Muestra la mediana y el máximo por pestaña, incluida la serialización de la respuesta.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/tab_switch.py [--cambios 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TABS = ["tab-1", "tab-2"]
+
+
+def _request(tab):
+    return {
+        "output": "tabs-content.children",
+        "outputs": {"id": "tabs-content", "property": "children"},
+        "inputs": [
+            {"id": "tabs", "property": "value", "value": tab},
+            {"id": "filtros-globales", "property": "data", "value": None},
+        ],
+        "changedPropIds": ["tabs.value"],
+        "state": [],
+    }
+
+
+def run_switches(cambios):
+    # Se ejecuta en el proceso hijo
+    from app import app
+
+    client = app.server.test_client()
+    client.get("/_dash-layout")
+    client.get("/_dash-dependencies")
+
+    first = {}
+    for tab in TABS:
+        t0 = time.perf_counter()
+        client.post("/_dash-update-component", json=_request(tab))
+        first[tab] = time.perf_counter() - t0
+
+    times = {tab: [] for tab in TABS}
+    for i in range(cambios):
+        tab = TABS[i % 2]
+        t0 = time.perf_counter()
+        response = client.post("/_dash-update-component", json=_request(tab))
+        times[tab].append(time.perf_counter() - t0)
+        assert response.status_code == 200
+    return {"first": first, "times": times}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cambios", type=int, default=20, help="número de cambios de pestaña medidos")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(run_switches(args.cambios)))
+        return
+
+    with tempfile.TemporaryDirectory() as prerender_dir:
+        env = dict(os.environ, NETFLIX_PRERENDER_DIR=prerender_dir)
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--hijo", "--cambios", str(args.cambios)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+    results = json.loads(salida.stdout.strip().splitlines()[-1])
+
+    print(f"{'Pestaña':<10}{'Primera vez':>14}{'Mediana':>12}{'Máximo':>12}")
+    for tab in TABS:
+        times = results["times"][tab]
+        print(
+            f"{tab:<10}{results['first'][tab] * 1000:>11.1f} ms"
+            f"{statistics.median(times) * 1000:>9.1f} ms{max(times) * 1000:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Memoria total de un despliegue con gunicorn según el número de workers.
+
+Lanza "gunicorn app:server" con 1, 2 y 4 workers, con y sin carga previa del catálogo en el
+proceso maestro (NETFLIX_PRELOAD, ver gunicorn.conf.py), hace que todos los workers atiendan
+peticiones de las dos pestañas del análisis y suma la memoria del maestro y de los workers:
+  - RSS: memoria residente de cada proceso (las páginas compartidas cuentan en todos ellos),
+  - PSS: memoria proporcional (cada página compartida se reparte entre los procesos que la usan),
+    que es la medida real del consumo total del despliegue.
+
+Con la carga previa el PSS total debería mantenerse casi plano al añadir workers.
+Sólo funciona en Linux (lee /proc/<pid>/smaps_rollup).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/worker_memory.py [--workers 1 2 4] [--peticiones 40]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Petición del callback que cambia de pestaña en la página de análisis
+TAB_CALLBACK = {
+    "output": "tabs-content.children",
+    "outputs": {"id": "tabs-content", "property": "children"},
+    "inputs": [{"id": "tabs", "property": "value", "value": None}],
+    "changedPropIds": ["tabs.value"],
+    "state": [],
+}
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_servidor(url, timeout=120):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            urllib.request.urlopen(url, timeout=5).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+def pedir_pestana(base, tab):
+    cuerpo = dict(TAB_CALLBACK, inputs=[dict(TAB_CALLBACK["inputs"][0], value=tab)])
+    peticion = urllib.request.Request(
+        f"{base}/_dash-update-component", data=json.dumps(cuerpo).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    urllib.request.urlopen(peticion, timeout=120).read()
+
+
+def memoria(pid):
+    # Rss y Pss (en KiB) de un proceso a partir de /proc/<pid>/smaps_rollup
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if partes[0] in ("Rss:", "Pss:"):
+                valores[partes[0][:-1].lower()] = int(partes[1])
+    return valores
+
+
+def hijos(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def medir(workers, preload, peticiones):
+    port = puerto_libre()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, NETFLIX_PRELOAD="1" if preload else "0")
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:server"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        esperar_servidor(f"{base}/analisis")
+
+        # Peticiones concurrentes para que todos los workers carguen los datos y construyan los gráficos
+        with ThreadPoolExecutor(max_workers=2 * workers) as pool:
+            list(pool.map(lambda i: pedir_pestana(base, ["tab-1", "tab-2"][i % 2]), range(peticiones * workers)))
+
+        procesos = [proceso.pid] + hijos(proceso.pid)
+        total = {"rss": 0, "pss": 0}
+        for pid in procesos:
+            for clave, valor in memoria(pid).items():
+                total[clave] += valor
+        return {"workers": workers, "preload": preload, "rss_mib": total["rss"] / 1024, "pss_mib": total["pss"] / 1024}
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--peticiones", type=int, default=40, help="peticiones por worker")
+    parser.add_argument("--json", action="store_true", help="salida en JSON")
+    args = parser.parse_args()
+
+    resultados = [medir(w, preload, args.peticiones) for preload in (False, True) for w in args.workers]
+
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+
+    print(f"{'Modo':<14}{'Workers':>8}{'RSS total':>14}{'PSS total':>14}")
+    for r in resultados:
+        modo = "preload" if r["preload"] else "perezoso"
+        print(f"{modo:<14}{r['workers']:>8}{r['rss_mib']:>10.1f} MiB{r['pss_mib']:>10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Configuración de gunicorn (se carga automáticamente al ejecutar "gunicorn app:server" desde la raíz del proyecto)
+import gc
+import os
+
+# Despliegue con datos compartidos entre workers (se desactiva con NETFLIX_PRELOAD=0):
+# la aplicación y el catálogo limpio se cargan una sola vez en el proceso maestro antes de crear
+# los workers, que los heredan por copy-on-write en lugar de construir cada uno su propia copia
+preload_app = os.environ.get("NETFLIX_PRELOAD", "1") != "0"
+
+
+def when_ready(server):
+    # Se ejecuta en el proceso maestro justo antes de crear los workers
+    if not preload_app:
+        return
+
+    from plotly.io.json import to_json_plotly
+    from pages.sections import aggregates, prerender, section_characteristics, section_graphics
+    from pages.sections.figure_pipeline import build_figures
+
+    # Con artefactos pre-renderizados válidos (cargados por app.py) no hace falta cargar los datos
+    if prerender.loaded_version is None:
+        aggregates.warm_up()
+
+    # Se construyen y serializan una vez las dos pestañas del análisis para que los módulos que
+    # pandas y plotly importan bajo demanda también queden cargados (y compartidos) en el maestro
+    for section in (section_characteristics, section_graphics):
+        to_json_plotly(section.layout())
+    # La pestaña de gráficos sólo construye su primera sección; el resto de figuras se construyen
+    # aquí para que los workers hereden también esos módulos y la caché de figuras ya llena
+    build_figures([(builder, ()) for builder in section_graphics.GRAPHICS_FIGURES])
+
+    # Los objetos ya creados pasan a la generación permanente del recolector de basura:
+    # así sus recorridos en cada worker no escriben en las páginas compartidas (lo que las copiaría)
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Se ejecuta en cada worker recién creado, antes de que arranque sus hilos: es el único momento
+    # seguro para crear con fork el grupo de procesos de figuras (NETFLIX_FIGURE_POOL=process), cuyos
+    # procesos heredan los agregados que el worker heredó del maestro
+    if not preload_app:
+        return
+
+    from pages.sections import figure_pipeline
+
+    if figure_pipeline.FIGURE_POOL == "process":
+        figure_pipeline.start_process_pool()
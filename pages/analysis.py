@@ -7,6 +7,10 @@ from dash import html, dcc, register_page, callback, Output, Input
 import pages.sections.section_characteristics as section_characteristics
 import pages.sections.section_graphics as section_graphics
 
+# Panel de filtros globales, común a las dos pestañas
+import pages.sections.section_filters as section_filters
+from pages.sections.filters import normalize_filters
+
 # Este archivo representa una página del sistema multipágina de Dash.
 # Se registra la ruta "/analisis" como URL para acceder a esta vista.
 register_page(__name__, path="/analisis")
@@ -25,6 +29,9 @@ layout = html.Div([
     # Título principal de la sección
     html.H2("ANALISIS DEL CONJUNTO DE DATOS", className="text-center text-danger text-gradient my-4 fw-bold"),
 
+    # Filtros globales (tipo, clasificación, fechas, país y género) que se aplican a las dos pestañas
+    section_filters.layout(),
+
     # Componente de pestañas (Tabs) para separar la interfaz en dos secciones: características y análisis visual
     dcc.Tabs(
         id="tabs",                   # ID que usaremos para identificar el valor de la pestaña activa
@@ -53,13 +60,17 @@ layout = html.Div([
 # Callback de Dash que actualiza el contenido según la pestaña seleccionada
 @callback(
     Output("tabs-content", "children"),  # Indicamos que cambiaremos el contenido de este div
-    Input("tabs", "value")               # La función se activa cuando cambia el valor de la pestaña activa
+    Input("tabs", "value"),              # La función se activa cuando cambia el valor de la pestaña activa
+    Input("filtros-globales", "data")    # o cuando cambia la selección de los filtros globales
 )
-def render_content(tab):
+def render_content(tab, filtros):
+    # Selección normalizada (None = catálogo completo), que también forma parte de la clave de caché
+    filtros = normalize_filters(filtros)
+
     # Si se selecciona la pestaña 1, se muestra la tabla con descripciones y estadísticas del dataset
     if tab == "tab-1":
-        return section_characteristics.layout()
+        return section_characteristics.layout(filtros)
 
     # Si se selecciona la pestaña 2, se muestra el análisis visual (gráficos)
     elif tab == "tab-2":
-        return section_graphics.layout()
+        return section_graphics.layout(filtros)
@@ -0,0 +1,507 @@
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from pages.sections.data_loader import (
+    CSV_PATH, CHUNK_SIZE, INCREMENTAL_UPDATES, MONTH_NAMES, WEEKDAY_NAMES, DateDimension, get_dataset,
+    get_data_fingerprint, get_date_dimension, iter_clean_chunks, clean_new_rows, read_new_rows, append_rows,
+    get_dataset_version,
+)
+from pages.sections.bridges import BridgeTable, get_bridge, MULTI_VALUED_COLUMNS
+from pages.sections.crosstab import IncidenceMatrix
+from pages.sections.heavy_hitters import SpaceSavingCounts, default_capacity
+from pages.sections.hierarchy import HierarchicalTopK, default_path_capacity
+from pages.sections.filters import get_filter_index, with_date_range
+from pages.sections.cube import QUERIES, get_cube
+from pages.sections.time_index import PERIODS, get_time_index
+
+# Modo de ingesta de los agregados: "memory" (a partir del DataFrame completo en caché)
+# o "chunked" (lectura del CSV por bloques, con memoria acotada por el tamaño de bloque)
+INGESTION_MODE = os.environ.get("NETFLIX_INGESTION", "memory")
+
+# Valores no informativos que el sunburst excluye de directores y actores
+SUNBURST_EXCLUDE = {"unknown", "Unknown", "Not Available", "No cast", ""}
+
+# Columnas cuyos recuentos sólo se usan para rankings y se resumen con SpaceSavingCounts (heavy_hitters.py)
+TOPK_COLUMNS = ["country", "cast", "director"]
+
+# Pares título-entidad que se cuentan de una vez al resumir las columnas de TOPK_COLUMNS
+TOPK_BLOCK_PAIRS = int(os.environ.get("NETFLIX_TOPK_BLOCK", "1000000"))
+
+# Número de selecciones de los filtros globales (filters.py) cuyos agregados se guardan en memoria
+FILTERED_AGGREGATES_CACHE = int(os.environ.get("NETFLIX_FILTER_CACHE", "16"))
+
+
+class MergeableCounts:
+    """
+    Recuento por clave que se puede combinar con otros recuentos parciales (merge).
+
+    - counts: Series con el número de apariciones de cada clave (índice simple o MultiIndex).
+    - first_seen: Series opcional con el orden de primera aparición de cada clave en el catálogo.
+      Permite reproducir exactamente el orden de value_counts (incluidos los empates)
+      aunque los datos se hayan procesado por bloques.
+    """
+
+    def __init__(self, counts, first_seen=None):
+        self.counts = counts
+        self.first_seen = first_seen
+
+    @classmethod
+    def from_keys(cls, keys, order=None):
+        """
+        Cuenta las claves (Series o DataFrame con una columna por nivel) ignorando las nulas.
+        'order' es el orden global de cada fila; si se indica se guarda la primera aparición.
+        """
+        keys = keys.to_frame() if isinstance(keys, pd.Series) else keys
+        keys = keys.astype({col: object for col in keys.columns if isinstance(keys[col].dtype, pd.CategoricalDtype)})
+        grouped = keys.assign(_order=0 if order is None else order).groupby(list(keys.columns), observed=True)["_order"]
+
+        counts = grouped.size().rename("count")
+        first_seen = grouped.min().rename("first_seen") if order is not None else None
+        return cls(counts, first_seen)
+
+    def merge(self, other):
+        # Suma de recuentos y mínimo de la primera aparición clave a clave
+        counts = self.counts.add(other.counts, fill_value=0).astype(np.int64)
+        first_seen = None
+        if self.first_seen is not None and other.first_seen is not None:
+            first_seen = pd.concat([self.first_seen, other.first_seen]).groupby(level=list(range(self.counts.index.nlevels))).min()
+        return MergeableCounts(counts, first_seen)
+
+    def sorted(self):
+        # Recuentos ordenados por clave (como groupby(...).size())
+        return self.counts.sort_index()
+
+    def value_counts(self, exclude=None, mapping=None):
+        """
+        Recuentos ordenados de mayor a menor con el mismo orden de empates que pandas value_counts.
+        - exclude: claves que se descartan antes de ordenar.
+        - mapping: diccionario para renombrar las claves (las no incluidas se descartan),
+          equivalente a serie.map(mapping).value_counts().
+        """
+        frame = pd.DataFrame({"count": self.counts, "first_seen": self.first_seen})
+        if exclude:
+            frame = frame[~frame.index.isin(list(exclude))]
+        if mapping is not None:
+            frame = frame.groupby(frame.index.map(mapping)).agg({"count": "sum", "first_seen": "min"})
+
+        ordered = frame.sort_values("first_seen", kind="stable")["count"].rename("count")
+        return ordered.sort_values(ascending=False)
+
+
+def _code_counts(codes, order, labels, name):
+    """
+    Recuento de códigos enteros (índices de 'labels') y primera aparición de cada código (menor
+    'order'). Equivale a MergeableCounts.from_keys(labels[codes], order), con las claves ordenadas
+    como en groupby, sin crear una etiqueta por fila. Sólo se cuentan los códigos presentes
+    (np.unique), así que el coste no depende del tamaño del vocabulario.
+    """
+    present, inverse = np.unique(codes, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(present))
+    first_seen = np.full(len(present), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_seen, inverse, order)
+    by_label = np.argsort(labels[present], kind="stable")
+    index = pd.Index(labels[present[by_label]], name=name)
+    return MergeableCounts(
+        pd.Series(counts[by_label], index=index, name="count"),
+        pd.Series(first_seen[by_label], index=index, name="first_seen"),
+    )
+
+
+def _entity_counts(bridge, positions, mask=None):
+    # Recuento exacto de entidades de una tabla puente (opcionalmente sólo los pares con mask) con su
+    # orden, contando sus códigos enteros (entity_ids) sin crear una etiqueta por par
+    ids, order = bridge.entity_ids, bridge.order_keys(positions)
+    if mask is not None:
+        ids, order = ids[mask], order[mask]
+    return _code_counts(ids, order, bridge.entities, bridge.name)
+
+
+def _entity_summary(bridge, positions, capacity):
+    """
+    Resumen SpaceSavingCounts de las entidades de una tabla puente sin construir nunca el recuento
+    exacto de todas: cada bloque de TOPK_BLOCK_PAIRS pares se cuenta (sólo las entidades presentes en
+    el bloque), se recorta a 'capacity' entidades y se combina con el resumen de los bloques
+    anteriores. Sin capacidad (recuentos exactos) todos los pares forman un único bloque.
+    """
+    ids, order = bridge.entity_ids, bridge.order_keys(positions)
+    block = TOPK_BLOCK_PAIRS if capacity else max(len(ids), 1)
+    summary = None
+    for start in range(0, max(len(ids), 1), block):
+        part = SpaceSavingCounts.from_counts(
+            _code_counts(ids[start:start + block], order[start:start + block], bridge.entities, bridge.name),
+            capacity,
+        )
+        summary = part if summary is None else summary.merge(part)
+    return summary
+
+
+def _date_counts(dates, positions):
+    # Recuentos por año, mes y día de la semana de subida (sólo títulos con fecha) a partir de sus códigos
+    dated = dates.dated
+    order = positions[dated]
+    years = dates.year[dated].astype(np.int64)
+    first, last = (int(years.min()), int(years.max())) if len(years) else (0, -1)
+    return {
+        "year_added": lambda: _code_counts(years - first, order, np.arange(first, last + 1, dtype=np.int32), "year_added"),
+        "month_added": lambda: _code_counts(dates.month[dated].astype(np.int64) - 1, order, MONTH_NAMES, "month_added"),
+        "weekday_added": lambda: _code_counts(dates.weekday[dated].astype(np.int64), order, WEEKDAY_NAMES, "weekday_added"),
+    }
+
+
+def _as_summary(name, counts):
+    # Los recuentos de las columnas de rankings leídos del cubo se resumen con SpaceSavingCounts (el resto se deja igual)
+    return SpaceSavingCounts.from_counts(counts, default_capacity()) if name in TOPK_COLUMNS else counts
+
+
+class CatalogAggregates:
+    """
+    Recuentos parciales que alimentan todos los gráficos de figures.py.
+    Se calculan por bloques de filas y se combinan con merge(), de modo que el resultado
+    es el mismo tanto si se procesa el catálogo completo como si se procesa por partes.
+    """
+
+    # Nombre de cada agregado y gráfico que lo utiliza
+    NAMES = [
+        "type",               # Películas vs series
+        "rating",             # Clasificaciones por edad
+        "type_rating",        # Heatmap tipo × clasificación
+        "release_year",       # Estrenos por año (títulos con fecha de subida)
+        "year_added",         # Añadidos por año
+        "month_added",        # Añadidos por mes
+        "weekday_added",      # Añadidos por día de la semana
+        "duration_minutes",   # Histograma de duración de películas
+        "duration_seasons",   # Histograma de temporadas de series
+        "country",            # Top países
+        "listed_in",          # Treemap de géneros
+        "cast",               # Top actores
+        "director",           # Top directores
+        "year_country",       # Mapa año × país (matriz de fotogramas de choropleth_frames.py)
+        "country_genre",      # Género predominante por país
+        "sunburst",           # Sunburst: caminos director → género → actor más frecuentes
+    ]
+
+    def __init__(self, counts, factory=None):
+        """
+        'counts' son los agregados ya calculados; 'factory' (opcional) calcula bajo demanda los que
+        faltan: recibe un nombre y devuelve un diccionario nombre -> agregado con ese (y quizá otros).
+        """
+        self._counts = counts
+        self._factory = factory
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        if name not in self._counts and self._factory is not None:
+            with self._lock:
+                if name not in self._counts:
+                    self._counts.update(self._factory(name))
+        return self._counts[name]
+
+    @classmethod
+    def empty(cls):
+        return cls({})
+
+    def merge(self, other):
+        # Combina dos conjuntos de agregados parciales clave a clave (calculando antes los que falten)
+        if not self._counts and self._factory is None:
+            return other
+        if not other._counts and other._factory is None:
+            return self
+        return CatalogAggregates({name: self[name].merge(other[name]) for name in self.NAMES})
+
+    @classmethod
+    def from_frame(cls, df, bridges=None, names=None, dates=None):
+        """
+        Calcula los agregados de un DataFrame limpio (completo o un bloque).
+        El índice de df debe ser la posición de cada fila en el CSV.
+        'bridges' y 'dates' permiten reutilizar tablas puente y la dimensión de fecha (DateDimension)
+        ya construidas para este mismo df.
+        'names' limita el cálculo a esos agregados (por defecto, todos los de NAMES).
+        """
+        if bridges is None:
+            bridges = {col: BridgeTable.from_series(df[col]) for col in MULTI_VALUED_COLUMNS}
+        if dates is None:
+            dates = DateDimension.from_series(df["date_added"])
+        names = cls.NAMES if names is None else names
+
+        positions = df.index.to_numpy(dtype=np.int64)
+        has_date = dates.dated
+
+        # Cada agregado se calcula sólo si se pide
+        builders = {
+            "type": lambda: MergeableCounts.from_keys(df["type"], positions),
+            "rating": lambda: MergeableCounts.from_keys(df["rating"], positions),
+            "type_rating": lambda: MergeableCounts.from_keys(df[["type", "rating"]]),
+            "release_year": lambda: MergeableCounts.from_keys(df["release_year"][has_date], positions[has_date]),
+            "duration_minutes": lambda: MergeableCounts.from_keys(df["duration_minutes"]),
+            "duration_seasons": lambda: MergeableCounts.from_keys(df["duration_seasons"]),
+        }
+
+        # Año, mes y día de la semana de subida: recuentos de los códigos enteros de la fecha
+        builders.update(_date_counts(dates, positions))
+
+        # Recuentos de entidades de las columnas multivaluadas; los de los rankings (top 20) se guardan
+        # en un resumen de tamaño acotado en lugar de con una entrada por cada entidad distinta
+        for col in MULTI_VALUED_COLUMNS:
+            if col in TOPK_COLUMNS:
+                builders[col] = lambda col=col: _entity_summary(bridges[col], positions, default_capacity())
+            else:
+                builders[col] = lambda col=col: _entity_counts(bridges[col], positions)
+
+        # Año de subida × país: recuento de los pares (código de año, entidad) de los títulos con fecha
+        def year_country():
+            countries = bridges["country"]
+            pair_has_date = has_date[countries.title_ids]
+            years = dates.year[countries.title_ids[pair_has_date]].astype(np.int64)
+            first, last = (int(years.min()), int(years.max())) if len(years) else (0, -1)
+            n_entities = len(countries.entities)
+            cells = np.bincount(
+                (years - first) * n_entities + countries.entity_ids[pair_has_date],
+                minlength=(last - first + 1) * n_entities,
+            )
+            present = np.flatnonzero(cells)
+            index = pd.MultiIndex.from_arrays(
+                [(present // n_entities + first).astype(np.int32), countries.entities[present % n_entities]],
+                names=["Año", "País"],
+            )
+            return MergeableCounts(pd.Series(cells[present], index=index, name="count"))
+
+        # País × género (producto disperso de las matrices de incidencia)
+        def country_genre():
+            product = IncidenceMatrix.from_bridge(bridges["country"]).transpose_dot(IncidenceMatrix.from_bridge(bridges["listed_in"]))
+            return MergeableCounts(product.to_frame().set_index(["country", "listed_in"])["count"])
+
+        # Sunburst director → género → actor sin valores no informativos (HierarchicalTopK): el peso de cada
+        # director es su número de combinaciones género × actor; las listas de cada título sólo se usan aquí
+        def sunburst():
+            directors = IncidenceMatrix.from_bridge(bridges["director"])
+            genres = IncidenceMatrix.from_bridge(bridges["listed_in"])
+            cast = IncidenceMatrix.from_bridge(bridges["cast"]).without_entities(SUNBURST_EXCLUDE)
+            valid_director = ~np.isin(directors.entities[directors.indices], list(SUNBURST_EXCLUDE))
+            return HierarchicalTopK.from_levels(
+                [directors.select_entries(valid_director), genres, cast],
+                bridges["director"].order_keys(positions)[valid_director],
+                default_capacity(), default_path_capacity(),
+            )
+
+        builders["year_country"] = year_country
+        builders["country_genre"] = country_genre
+        builders["sunburst"] = sunburst
+
+        return cls({name: builders[name]() for name in names if name in builders})
+
+    @classmethod
+    def from_dataset(cls, dataset, mask=None):
+        """
+        Agregados del catálogo completo (o sólo de los títulos marcados en 'mask', una máscara booleana
+        por fila de dataset.frame) reutilizando las tablas puente del dataset compartido.
+        """
+        bridges = {col: get_bridge(col, dataset) for col in MULTI_VALUED_COLUMNS}
+        dates = get_date_dimension(dataset)
+        if mask is None:
+            return cls.from_frame(dataset.frame, bridges, dates=dates)
+        return cls.from_frame(
+            dataset.frame[mask], {col: bridge.select_titles(mask) for col, bridge in bridges.items()},
+            dates=dates.select_rows(mask),
+        )
+
+    @classmethod
+    def from_cube(cls, dataset, filters=None):
+        """
+        Agregados del catálogo (o de los títulos que cumplen 'filters') que se calculan al pedirlos:
+        los de QUERIES se leen del cubo de agregación (cube.py) como un slice o roll-up de una vista
+        materializada, sin recorrer las filas; el resto (actores, directores, sunburst) y los que el
+        cubo no puede resolver con esos filtros se calculan sobre las filas seleccionadas.
+        """
+        cube = get_cube(dataset)
+        where = cube.where(filters)
+        rows = []
+
+        def from_rows(name):
+            # Filas y tablas puente de la selección, preparadas la primera vez que hacen falta
+            if not rows:
+                bridges = {col: get_bridge(col, dataset) for col in MULTI_VALUED_COLUMNS}
+                dates = get_date_dimension(dataset)
+                if filters:
+                    mask = get_filter_index(dataset).mask(filters)
+                    rows.append((
+                        dataset.frame[mask], {col: bridge.select_titles(mask) for col, bridge in bridges.items()},
+                        dates.select_rows(mask),
+                    ))
+                else:
+                    rows.append((dataset.frame, bridges, dates))
+            frame, bridges, dates = rows[0]
+            return cls.from_frame(frame, bridges, names=[name], dates=dates)._counts
+
+        def factory(name):
+            if name in QUERIES and where is not None:
+                counts = _cube_counts(cube, name, where)
+                if counts is not None:
+                    return {name: counts}
+            return from_rows(name)
+
+        return cls({}, factory)
+
+
+def _cube_counts(cube, name, where):
+    # Agregado 'name' de QUERIES leído del cubo con las condiciones 'where' (None si ninguna vista lo resuelve)
+    group_by, fixed, index_names, _ = QUERIES[name]
+    if "dated" in fixed:
+        # Sólo títulos con fecha de subida: se excluye el código nulo de year_added
+        dated = np.arange(len(cube.labels["year_added"]) + 1) < len(cube.labels["year_added"])
+        where = {**where, "year_added": where.get("year_added", True) & dated}
+    result = cube.query(group_by, where, index_names)
+    if result is None:
+        return None
+    counts, first_seen = result
+    return _as_summary(name, MergeableCounts(counts, first_seen))
+
+
+def iter_chunked_aggregates(csv_path=CSV_PATH, chunksize=CHUNK_SIZE):
+    """
+    Lee el CSV por bloques y devuelve, tras cada bloque, los agregados de todas las filas leídas
+    hasta entonces y su RowHashIndex. Cada bloque se limpia, se resume en agregados parciales y se
+    descarta; los agregados combinados tienen tamaño acotado (los rankings y el sunburst son
+    resúmenes con capacidad máxima), así que la memoria depende del tamaño de bloque y no del
+    número de bloques, salvo los 8 bytes por fila del RowHashIndex.
+    """
+    aggregates = CatalogAggregates.empty()
+    for chunk, seen in iter_clean_chunks(csv_path, chunksize):
+        aggregates = aggregates.merge(CatalogAggregates.from_frame(chunk))
+        yield aggregates, seen
+
+
+def build_chunked_aggregates(csv_path=CSV_PATH, chunksize=CHUNK_SIZE):
+    """
+    Calcula los agregados leyendo el CSV por bloques (ver iter_chunked_aggregates).
+    Devuelve los agregados y el RowHashIndex de las filas leídas (para añadir filas nuevas).
+    """
+    aggregates, seen = CatalogAggregates.empty(), None
+    for aggregates, seen in iter_chunked_aggregates(csv_path, chunksize):
+        pass
+    return aggregates, seen
+
+
+@lru_cache(maxsize=1)
+def _get_chunked_aggregates(csv_path, chunksize):
+    # Agregados, índice de filas y versión de los datos
+    return build_chunked_aggregates(csv_path, chunksize) + (_chunked_version(csv_path),)
+
+
+def _chunked_version(csv_path):
+    # Versión de los datos en el modo por bloques: huella del CSV sin hash del contenido (no se lee el archivo)
+    fingerprint = get_data_fingerprint(csv_path, with_hash=False)
+    return f"chunked-{fingerprint['size']}-{fingerprint['mtime_ns']}-{fingerprint['code_version']}"
+
+
+# Agregados del modo por bloques con filas añadidas (apply_delta), que sustituyen a los calculados del CSV
+_appended_chunked = {}
+_appended_lock = threading.Lock()
+
+
+def _chunked_state():
+    key = (CSV_PATH, CHUNK_SIZE)
+    return _appended_chunked.get(key) or _get_chunked_aggregates(*key)
+
+
+def get_aggregates(dataset=None, filters=None):
+    """
+    Devuelve los agregados que usan los gráficos según el modo de ingesta (NETFLIX_INGESTION):
+    - "memory": a partir del dataset compartido, una vez por versión del dataset.
+    - "chunked": leyendo el CSV por bloques de NETFLIX_CHUNK_SIZE filas.
+
+    Con 'filters' (normalizados con filters.normalize_filters) sólo se cuentan los títulos que los
+    cumplen; necesita el catálogo en memoria, así que no está disponible en el modo "chunked".
+    """
+    if filters:
+        if INGESTION_MODE == "chunked" and dataset is None:
+            raise ValueError("Los filtros globales necesitan el catálogo en memoria (NETFLIX_INGESTION=memory)")
+        return _filtered_aggregates(dataset or get_dataset(), filters)
+
+    if INGESTION_MODE == "chunked" and dataset is None:
+        return _chunked_state()[0]
+
+    dataset = dataset or get_dataset()
+    return dataset.cached("aggregates", lambda: CatalogAggregates.from_cube(dataset))
+
+
+def get_period_counts(name, filters=None, date_range=None):
+    """
+    Recuentos ordenados por clave (como CatalogAggregates[name].sorted()) de un agregado temporal
+    ("release_year", "year_added", "month_added" o "weekday_added") de los títulos añadidos en
+    'date_range' ((desde, hasta) en ISO; None = todas las fechas).
+
+    Sin otros filtros el rango se resuelve con el índice temporal (time_index.py): búsquedas binarias
+    y diferencias de sumas acumuladas, sin recorrer las filas. Con filtros, el rango se añade a ellos.
+    """
+    if date_range and not filters:
+        if INGESTION_MODE == "chunked":
+            raise ValueError("El rango de fechas necesita el catálogo en memoria (NETFLIX_INGESTION=memory)")
+        index = get_time_index()
+        if name in PERIODS:
+            return index.period_counts(name, *date_range)
+        return index.counts(name, *date_range)
+    return get_aggregates(filters=with_date_range(filters, date_range))[name].sorted()
+
+
+@lru_cache(maxsize=FILTERED_AGGREGATES_CACHE)
+def _filtered_aggregates(dataset, filters):
+    # Agregados de los títulos seleccionados: del cubo si los filtros se pueden expresar con sus dimensiones
+    # y, si no, de las filas de la máscara (bitsets del índice de filtros)
+    return CatalogAggregates.from_cube(dataset, filters)
+
+
+def get_data_version():
+    """
+    Identificador de la versión de los datos que usan los gráficos: cambia si cambia el CSV,
+    el código de limpieza o se añaden filas (apply_delta). Sirve como clave de las cachés de figuras
+    y no necesita cargar los datos ni calcular los agregados.
+    """
+    if INGESTION_MODE == "chunked":
+        appended = _appended_chunked.get((CSV_PATH, CHUNK_SIZE))
+        return appended[2] if appended else _chunked_version(CSV_PATH)
+    return get_dataset_version()
+
+
+# Al añadir filas a un dataset sus agregados se actualizan sólo con las filas nuevas
+INCREMENTAL_UPDATES["aggregates"] = lambda aggregates, delta: aggregates.merge(CatalogAggregates.from_frame(delta))
+
+
+def apply_delta(rows):
+    """
+    Añade títulos nuevos (DataFrame con las columnas del CSV o ruta de un CSV delta) y actualiza
+    los agregados de los gráficos con un coste proporcional al tamaño del lote, sin recalcular
+    el catálogo completo. El resultado coincide con el de recalcularlo todo con las filas añadidas al CSV.
+
+    - "memory": se añaden al dataset compartido (append_rows), cuyos agregados se actualizan con merge().
+      Las filas cuyo hash ya estaba se comparan campo a campo con las del catálogo antes de descartarlas.
+    - "chunked": se limpian a continuación de las filas ya leídas y sus agregados se combinan con los
+      existentes. Las filas anteriores no se guardan, así que una fila cuyo hash de 64 bits ya estaba se
+      descarta sin confirmarla (ver clean_new_rows).
+    """
+    if INGESTION_MODE != "chunked":
+        return get_aggregates(append_rows(rows))
+
+    raw = read_new_rows(rows)
+    with _appended_lock:
+        aggregates, seen, version = _chunked_state()
+        delta, seen = clean_new_rows(raw, seen)
+        aggregates = aggregates.merge(CatalogAggregates.from_frame(delta))
+        _appended_chunked[(CSV_PATH, CHUNK_SIZE)] = (aggregates, seen, f"{version.split('+')[0]}+{seen.rows}")
+    return _appended_chunked[(CSV_PATH, CHUNK_SIZE)][0]
+
+
+def warm_up():
+    """
+    Carga el dataset compartido y calcula los agregados de los gráficos.
+    Con gunicorn.conf.py se llama en el proceso maestro antes de crear los workers, que heredan
+    estas estructuras (de sólo lectura) en lugar de construir cada uno la suya.
+    """
+    get_dataset()
+    aggregates = get_aggregates()
+    # Los agregados se calculan al pedirlos: aquí se piden todos para que los hereden los workers
+    for name in CatalogAggregates.NAMES:
+        aggregates[name]
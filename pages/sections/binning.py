@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+
+
+def _round_up(value, steps):
+    # Primer escalón estrictamente mayor que el valor (Lib.roundUp de plotly.js)
+    return next((step for step in steps if step > value), steps[-1])
+
+
+def auto_bins(values, counts, nbins):
+    """
+    Intervalos (start, end, size) que elegiría plotly.js para un histograma con 'nbins' divisiones
+    sobre los valores indicados, cada uno repetido counts[i] veces (autobin de los ejes lineales).
+
+    Se replica en el servidor para enviar al navegador sólo los recuentos por intervalo y no una fila
+    por título: con los mismos intervalos el gráfico se ve exactamente igual.
+    """
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts, dtype=np.int64)
+    lo, hi = float(values.min()), float(values.max())
+
+    # Tamaño del intervalo: (max - min) / nbins redondeado hacia arriba a 1, 2 o 5 × 10^n
+    size0 = (hi - lo) / nbins or 1.0
+    base = 10 ** math.floor(math.log10(size0))
+    dtick = base * _round_up(size0 / base, [2, 5, 10])
+
+    # Primera marca del eje (rango ampliado un 0,01 %) y un intervalo antes
+    delta = (hi - lo) * 0.0001
+    start = math.ceil((lo - delta) / dtick) * dtick - dtick
+
+    def near_edge(v):
+        return (1 + (v - start) * 100 / dtick) % 100 < 2
+
+    # Desplazamiento de los bordes para que no caigan sobre los valores (autoShiftNumericBins)
+    total = counts.sum()
+    if np.all(values % 1 == 0):
+        if dtick < 1:
+            start = lo - 0.5 * dtick
+        else:
+            start -= 0.5
+            if start + dtick < lo:
+                start += dtick
+    else:
+        at_edge = counts[near_edge(values)].sum()
+        at_middle = counts[near_edge(values + dtick / 2)].sum()
+        if at_middle < total * 0.1 and (at_edge > total * 0.3 or near_edge(lo) or near_edge(hi)):
+            half = dtick / 2
+            start += half if start + half < lo else -half
+
+    n_intervals = 1 + math.floor((hi - start) / dtick)
+    return start, start + n_intervals * dtick, dtick
+
+
+def binned_counts(counts, nbins):
+    """
+    Histograma de un recuento por valor (Series valor → apariciones) con los intervalos de auto_bins.
+    Devuelve (centros, recuentos, (start, end, size)).
+    """
+    values = counts.index.to_numpy(dtype=float)
+    weights = counts.to_numpy(dtype=np.int64)
+    if not len(values):
+        # Sin valores (p. ej. una selección de los filtros globales sin películas): histograma vacío
+        return np.array([], dtype=float), np.array([], dtype=np.int64), (0.0, 1.0, 1.0)
+    start, end, size = auto_bins(values, weights, nbins)
+
+    n_intervals = int(round((end - start) / size))
+    edges = start + size * np.arange(n_intervals + 1)
+    totals, _ = np.histogram(values, bins=edges, weights=weights)
+    return edges[:-1] + size / 2, totals.astype(np.int64), (start, end, size)
@@ -0,0 +1,172 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pages.sections.data_loader import INCREMENTAL_UPDATES, get_dataset
+
+# Columnas con varios valores por título separados por ", "
+MULTI_VALUED_COLUMNS = ['country', 'cast', 'director', 'listed_in']
+
+# Desplazamiento usado para codificar el orden de aparición (fila, posición en la lista) en un solo entero
+ORDER_SHIFT = 16
+
+
+def merge_sorted(values, other):
+    """
+    Unión de un array ordenado de valores distintos ('values', p. ej. el diccionario de entidades) con
+    los valores de 'other', sin volver a ordenar 'values': sólo se ordenan los valores nuevos, que se
+    intercalan en su posición. Devuelve la unión y la posición en ella de cada elemento de 'values'
+    y de 'other'.
+    """
+    other = np.asarray(other, dtype=values.dtype)
+    positions = np.searchsorted(values, other)
+    found = positions < len(values)
+    found[found] = values[positions[found]] == other[found]
+    new = np.unique(other[~found])
+    if not len(new):
+        return values, np.arange(len(values)), positions
+
+    # Cada valor anterior se desplaza tantas posiciones como valores nuevos quedan delante de él
+    insert_at = np.searchsorted(values, new)
+    merged = np.insert(values, insert_at, new)
+    shifted = np.arange(len(values)) + np.searchsorted(insert_at, np.arange(len(values)), side="right")
+    return merged, shifted, np.searchsorted(merged, other)
+
+
+class BridgeTable:
+    """
+    Tabla puente normalizada de una columna multivaluada.
+
+    - title_ids: posición (fila) de cada título en dataset.frame, int32.
+    - entity_ids: identificador de la entidad (país, actor, director o género), int32.
+    - entities: diccionario de entidades (cadenas internadas, ordenadas alfabéticamente),
+      de modo que entities[entity_id] es el nombre de la entidad.
+
+    Los pares (title_id, entity_id) siguen el mismo orden que produce
+    serie.str.split(", ").explode(): por título y, dentro de cada título, por posición en la lista.
+    """
+
+    def __init__(self, title_ids, entity_ids, entities, n_titles, name):
+        self.title_ids = title_ids
+        self.entity_ids = entity_ids
+        self.entities = entities
+        self.n_titles = n_titles
+        self.name = name
+
+    @classmethod
+    def from_series(cls, serie):
+        """
+        Construye la tabla puente a partir de una serie de cadenas separadas por ", ".
+        Cada cadena distinta se divide una sola vez; los nulos no generan pares.
+        """
+        codes, uniques = pd.factorize(serie)
+        uniques = pd.Series(np.asarray(uniques, dtype=object))
+
+        # División de los valores distintos y diccionario de entidades (ordenado alfabéticamente)
+        tokens = uniques.str.split(", ")
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        token_codes, entities = pd.factorize(tokens.explode(), sort=True)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        # Expansión a pares (title_id, entity_id) sin volver a crear cadenas por título
+        title_index = np.flatnonzero(codes >= 0)
+        per_title = lengths[codes[title_index]]
+        total = int(per_title.sum())
+        starts = np.repeat(offsets[codes[title_index]], per_title)
+        within = np.arange(total) - np.repeat(np.cumsum(per_title) - per_title, per_title)
+
+        return cls(
+            title_ids=np.repeat(title_index, per_title).astype(np.int32),
+            entity_ids=token_codes[starts + within].astype(np.int32),
+            entities=np.array([sys.intern(str(e)) for e in entities], dtype=object),
+            n_titles=len(serie),
+            name=serie.name,
+        )
+
+    def select_titles(self, keep):
+        """
+        Tabla puente de los títulos marcados en 'keep' (máscara booleana por título), renumerados
+        según su posición entre los seleccionados (como en dataset.frame[keep]).
+        """
+        new_ids = np.cumsum(keep) - 1
+        pairs = keep[self.title_ids]
+        return BridgeTable(
+            title_ids=new_ids[self.title_ids[pairs]].astype(np.int32),
+            entity_ids=self.entity_ids[pairs],
+            entities=self.entities,
+            n_titles=int(keep.sum()),
+            name=self.name,
+        )
+
+    def concat(self, other):
+        """
+        Tabla puente de los títulos de esta tabla seguidos de los de 'other' (p. ej. filas añadidas al
+        catálogo), igual que from_series sobre las dos series concatenadas. Sólo se recorren los pares:
+        los identificadores se traducen al diccionario combinado, sin volver a dividir cadenas.
+        """
+        entities, shifted, other_positions = merge_sorted(self.entities, other.entities)
+        entity_ids = self.entity_ids
+        if len(entities) != len(self.entities):
+            entity_ids = shifted.astype(np.int32)[entity_ids]
+        return BridgeTable(
+            title_ids=np.concatenate([self.title_ids, other.title_ids + self.n_titles]).astype(np.int32),
+            entity_ids=np.concatenate([entity_ids, other_positions.astype(np.int32)[other.entity_ids]]),
+            entities=entities,
+            n_titles=self.n_titles + other.n_titles,
+            name=self.name,
+        )
+
+    def order_keys(self, positions):
+        # Orden global de cada par: fila del CSV (positions[title_id]) y posición dentro de la lista
+        if not len(self.title_ids):
+            return np.array([], dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, self.title_ids[1:] != self.title_ids[:-1]])
+        lengths = np.diff(np.r_[starts, len(self.title_ids)])
+        token_positions = np.arange(len(self.title_ids)) - np.repeat(starts, lengths)
+        return (positions[self.title_ids].astype(np.int64) << ORDER_SHIFT) + token_positions
+
+    def entity_codes(self, names):
+        # Identificadores de las entidades indicadas que existen en el diccionario
+        return np.flatnonzero(np.isin(self.entities, list(names)))
+
+    def value_counts(self, exclude=None):
+        """
+        Número de apariciones de cada entidad, ordenado de mayor a menor.
+        Equivale a serie.dropna().str.split(", ").explode().value_counts()
+        (incluido el orden de los empates), opcionalmente excluyendo algunos valores.
+        """
+        entity_ids = self.entity_ids
+        if exclude:
+            entity_ids = entity_ids[~np.isin(entity_ids, self.entity_codes(exclude))]
+
+        # Recuento por entidad y orden de primera aparición, como hace pandas en value_counts
+        counts = np.bincount(entity_ids, minlength=len(self.entities))
+        present, first_seen = np.unique(entity_ids, return_index=True)
+        order = present[np.argsort(first_seen, kind="stable")]
+
+        result = pd.Series(counts[order], index=pd.Index(self.entities[order], name=self.name), name="count")
+        return result.sort_values(ascending=False)
+
+    def to_frame(self):
+        # Vista en DataFrame de los pares, útil para cruces entre tablas puente
+        return pd.DataFrame({"title_id": self.title_ids, self.name: self.entity_ids})
+
+
+def get_bridge(column, dataset=None):
+    """
+    Devuelve la tabla puente de 'column' para el dataset indicado (por defecto, el compartido).
+    Se construye una sola vez por versión del dataset.
+    """
+    if column not in MULTI_VALUED_COLUMNS:
+        raise KeyError(f"'{column}' no es una columna multivaluada")
+
+    dataset = dataset or get_dataset()
+    return dataset.cached(("bridge", column), lambda: BridgeTable.from_series(dataset.frame[column]))
+
+
+# Al añadir filas a un dataset cada tabla puente ya calculada se amplía con la de las filas nuevas
+INCREMENTAL_UPDATES.update({
+    ("bridge", column): lambda bridge, delta, column=column: bridge.concat(BridgeTable.from_series(delta[column]))
+    for column in MULTI_VALUED_COLUMNS
+})
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+
+from pages.sections.aggregates import get_aggregates, get_data_version
+
+
+class YearCountryMatrix:
+    """
+    Recuentos año de subida × país en una matriz densa (años ordenados × países ordenados).
+
+    El mapa del gráfico 9 pide un año cada vez (con el deslizador o el botón de reproducir) en lugar de
+    recibir todos los fotogramas de golpe: cada fotograma es una fila de la matriz. La vista acumulada
+    (todo lo añadido hasta ese año) sale de las sumas prefijo por columnas, calculadas una sola vez.
+    """
+
+    def __init__(self, years, countries, counts):
+        self.years = years
+        self.countries = countries
+        self.counts = counts
+        # cumulative[i] = suma de las filas 0..i (títulos añadidos hasta years[i] incluido)
+        self.cumulative = np.cumsum(counts, axis=0, dtype=np.int64)
+
+    @classmethod
+    def from_counts(cls, counts):
+        # 'counts' es el recuento con MultiIndex (Año, País) del agregado year_country
+        years, year_ids = np.unique(counts.index.get_level_values("Año").to_numpy(dtype=np.int64), return_inverse=True)
+        countries, country_ids = np.unique(counts.index.get_level_values("País").to_numpy(dtype=object), return_inverse=True)
+        matrix = np.zeros((len(years), len(countries)), dtype=np.int64)
+        np.add.at(matrix, (year_ids, country_ids), counts.to_numpy(dtype=np.int64))
+        return cls(years, countries, matrix)
+
+    def year_index(self, year):
+        # Posición del año en la matriz (el año anterior más cercano si no hay títulos ese año); sirve
+        # para avanzar el deslizador desde un año cualquiera
+        return int(np.clip(np.searchsorted(self.years, year, side="right") - 1, 0, len(self.years) - 1))
+
+    def frame(self, year, cumulative=False):
+        """
+        Países con algún título en el fotograma del año indicado y su recuento
+        (los añadidos ese año o, con cumulative=True, los añadidos hasta ese año).
+        Un año sin títulos añadidos da un fotograma vacío; en la vista acumulada, el del último
+        año anterior con títulos (vacío si es anterior al primero).
+        """
+        position = int(np.searchsorted(self.years, year, side="right")) - 1
+        if position < 0 or (not cumulative and self.years[position] != year):
+            return self.countries[:0], np.zeros(0, dtype=np.int64)
+        row = (self.cumulative if cumulative else self.counts)[position]
+        present = np.flatnonzero(row)
+        return self.countries[present], row[present]
+
+
+# Matriz de la última versión de los datos (y selección de los filtros globales) pedida
+_matrix_lock = threading.Lock()
+_matrix = (None, None)
+
+
+def get_year_country_matrix(filters=None):
+    # Se construye una vez por versión de los datos y selección (al añadir filas se vuelve a construir)
+    global _matrix
+    key = (get_data_version(), filters)
+    with _matrix_lock:
+        if _matrix[0] != key:
+            _matrix = (key, YearCountryMatrix.from_counts(get_aggregates(filters=filters)["year_country"].counts))
+        return _matrix[1]
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+# Número máximo de pares (entidad, entidad) que se generan a la vez al multiplicar dos matrices.
+# Limita la memoria temporal del producto independientemente del tamaño del catálogo
+PRODUCT_BLOCK_PAIRS = 1 << 20
+
+
+class IncidenceMatrix:
+    """
+    Matriz de incidencia dispersa título×entidad en formato CSR, respaldada por arrays de NumPy.
+
+    Las entradas del título t son indices[indptr[t]:indptr[t + 1]] (identificadores de entidad,
+    en el mismo orden que en la columna original). Una entidad repetida en un mismo título
+    aparece dos veces, igual que al hacer explode sobre la columna.
+    """
+
+    def __init__(self, indptr, indices, entities, name):
+        self.indptr = indptr
+        self.indices = indices
+        self.entities = entities
+        self.name = name
+
+    @property
+    def shape(self):
+        return len(self.indptr) - 1, len(self.entities)
+
+    @property
+    def degrees(self):
+        # Número de entradas de cada título
+        return np.diff(self.indptr)
+
+    @classmethod
+    def from_bridge(cls, bridge):
+        # La tabla puente ya está ordenada por título, así que basta con contar entradas por título
+        counts = np.bincount(bridge.title_ids, minlength=bridge.n_titles)
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(indptr, bridge.entity_ids, bridge.entities, bridge.name)
+
+    def row_ids(self):
+        # Título de cada entrada (inverso de indptr)
+        return np.repeat(np.arange(self.shape[0], dtype=np.int32), self.degrees)
+
+    def without_entities(self, names):
+        """
+        Devuelve una copia de la matriz sin las entradas de las entidades indicadas
+        (por ejemplo, valores no informativos como "Unknown").
+        """
+        return self.select_entries(~np.isin(self.entities[self.indices], list(names)))
+
+    def select_entries(self, keep):
+        # Copia de la matriz sólo con las entradas marcadas en 'keep' (máscara booleana por entrada)
+        counts = np.bincount(self.row_ids()[keep], minlength=self.shape[0])
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return IncidenceMatrix(indptr, self.indices[keep], self.entities, self.name)
+
+    def transpose_dot(self, other, weights=None):
+        """
+        Producto disperso Aᵀ·diag(w)·B entre dos matrices de incidencia sobre los mismos títulos.
+        El resultado [i, j] es el número de (títulos, ponderados por w) en los que coinciden la
+        entidad i de esta matriz y la entidad j de 'other'; es decir, el recuento que produciría
+        explotar ambas columnas y agrupar por las dos.
+
+        Los pares se generan por bloques de títulos de unos PRODUCT_BLOCK_PAIRS pares (un título
+        nunca se parte entre bloques), así que la memoria temporal no depende del tamaño del catálogo.
+        """
+        n_titles = self.shape[0]
+        weights = np.ones(n_titles, dtype=np.int64) if weights is None else np.asarray(weights)
+        n_cols = other.shape[1]
+
+        deg_a, deg_b = self.degrees, other.degrees
+        pairs_per_title = deg_a * deg_b * (weights != 0)
+
+        # Se divide la lista de títulos en bloques consecutivos con un número acotado de pares
+        cumulative = np.cumsum(pairs_per_title)
+        total = int(cumulative[-1]) if n_titles else 0
+        boundaries = np.searchsorted(cumulative, np.arange(PRODUCT_BLOCK_PAIRS, total, PRODUCT_BLOCK_PAIRS), side="right")
+        boundaries = np.unique(np.concatenate([[0], boundaries, [n_titles]]))
+
+        # Recuentos parciales (claves distintas del bloque y su suma) de cada bloque
+        partial_keys = [np.array([], dtype=np.int64)]
+        partial_values = [np.array([], dtype=np.float64)]
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            titles = np.arange(start, end)
+            titles = titles[pairs_per_title[titles] > 0]
+            if not len(titles):
+                continue
+
+            # Pares (entrada de A, entrada de B) de cada título: k -> (k // q, k % q)
+            p, q = deg_a[titles], deg_b[titles]
+            n_pairs = p * q
+            local = np.arange(n_pairs.sum()) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+            q_rep = np.repeat(q, n_pairs)
+            a_entries = np.repeat(self.indptr[titles], n_pairs) + local // q_rep
+            b_entries = np.repeat(other.indptr[titles], n_pairs) + local % q_rep
+
+            block_keys = self.indices[a_entries].astype(np.int64) * n_cols + other.indices[b_entries]
+            block_values = np.repeat(weights[titles], n_pairs)
+
+            # Cada bloque se reduce por separado a sus claves distintas
+            block_keys, inverse = np.unique(block_keys, return_inverse=True)
+            partial_keys.append(block_keys)
+            partial_values.append(np.bincount(inverse, weights=block_values))
+
+        # Una única reducción final de los recuentos parciales de todos los bloques
+        keys, inverse = np.unique(np.concatenate(partial_keys), return_inverse=True)
+        values = np.bincount(inverse, weights=np.concatenate(partial_values), minlength=len(keys))
+
+        return SparseCounts(
+            rows=(keys // n_cols).astype(np.int32),
+            cols=(keys % n_cols).astype(np.int32),
+            values=np.rint(values).astype(np.int64),
+            row_entities=self.entities,
+            col_entities=other.entities,
+            row_name=self.name,
+            col_name=other.name,
+        )
+
+
+class SparseCounts:
+    """
+    Tabla de recuentos dispersa (formato coordenadas) resultado de IncidenceMatrix.transpose_dot.
+    Las entradas están ordenadas por fila y, dentro de cada fila, por columna; sólo se guardan
+    las combinaciones con recuento distinto de cero.
+    """
+
+    def __init__(self, rows, cols, values, row_entities, col_entities, row_name, col_name):
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+        self.row_entities = row_entities
+        self.col_entities = col_entities
+        self.row_name = row_name
+        self.col_name = col_name
+
+    def to_frame(self, value_name="count"):
+        # Equivale a groupby([fila, columna]).size().reset_index() sobre las columnas explotadas
+        return pd.DataFrame({
+            self.row_name: self.row_entities[self.rows],
+            self.col_name: self.col_entities[self.cols],
+            value_name: self.values,
+        })
+
+    def row_argmax(self):
+        # Columna con mayor recuento de cada fila (ver row_argmax)
+        return row_argmax(self.to_frame(), self.row_name, self.col_name)
+
+
+def row_argmax(frame, row, col, value="count"):
+    """
+    Máximo por filas de una tabla de recuentos dispersa en formato largo (fila, columna, recuento):
+    devuelve, para cada fila, la columna con mayor recuento. En caso de empate se queda con la
+    primera columna en orden alfabético, igual que groupby().idxmax() sobre la tabla ordenada.
+    """
+    order = np.lexsort((
+        pd.factorize(frame[col], sort=True)[0],
+        -frame[value].to_numpy(),
+        pd.factorize(frame[row], sort=True)[0],
+    ))
+    first = frame.iloc[order].drop_duplicates(row)
+    return first.reset_index(drop=True)
+
@@ -0,0 +1,379 @@
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from pages.sections.data_loader import MONTH_NAMES, WEEKDAY_NAMES, get_dataset, get_date_dimension
+from pages.sections.bridges import get_bridge
+from pages.sections.filters import CATEGORICAL_FILTERS
+
+# Máximo de celdas (sumando todas las vistas materializadas) del cubo de agregación. Cada celda
+# guarda un recuento y, si hace falta, la primera aparición (8 + 8 bytes): 2 millones ≈ 32 MiB
+CUBE_MAX_CELLS = int(os.environ.get("NETFLIX_CUBE_CELLS", "2000000"))
+
+# Dimensiones del cubo: columnas con un valor por título y columnas multivaluadas (un título cuenta
+# una vez por cada entidad de su lista, como al hacer explode)
+SCALAR_DIMENSIONS = [
+    "type", "rating", "release_year", "year_added", "month_added", "weekday_added",
+    "duration_minutes", "duration_seasons",
+]
+MULTI_VALUED_DIMENSIONS = ["country", "listed_in"]
+
+# Dimensiones sobre las que se filtran habitualmente las consultas (filtros globales de filters.py
+# que el cubo puede resolver). Al elegir las vistas se tienen en cuenta las consultas con estos filtros
+FILTER_DIMENSIONS = ["type", "rating", "release_year", "year_added"]
+
+# Consultas que hacen los gráficos (agregados de CatalogAggregates que salen del cubo):
+# nombre -> (dimensiones agrupadas, restricciones fijas, nombres del índice, si guarda la primera aparición)
+# La restricción "dated" deja sólo los títulos con fecha de subida (year_added no nulo)
+QUERIES = {
+    "type": (("type",), (), None, True),
+    "rating": (("rating",), (), None, True),
+    "type_rating": (("type", "rating"), (), None, False),
+    "release_year": (("release_year",), ("dated",), None, True),
+    "year_added": (("year_added",), (), None, True),
+    "month_added": (("month_added",), (), None, True),
+    "weekday_added": (("weekday_added",), (), None, True),
+    "duration_minutes": (("duration_minutes",), (), None, False),
+    "duration_seasons": (("duration_seasons",), (), None, False),
+    "country": (("country",), (), None, True),
+    "listed_in": (("listed_in",), (), None, True),
+    "year_country": (("year_added", "country"), (), ("Año", "País"), False),
+    "country_genre": (("country", "listed_in"), (), None, False),
+}
+
+# Peso de una consulta según el número de filtros que lleva (las consultas sin filtros son las más
+# frecuentes: las hace cada gráfico al abrir la pestaña)
+FILTER_WEIGHT = 0.5
+
+# Coste relativo de resolver una consulta recorriendo las filas (por título) frente a leer una celda
+ROW_COST = 8
+
+
+def _encode(serie):
+    """
+    Códigos enteros de una columna y su diccionario de valores (ordenado); los nulos reciben el
+    último código (len(valores)), así que sumar una dimensión completa cuenta todos los títulos.
+    """
+    serie = serie.astype(object) if isinstance(serie.dtype, pd.CategoricalDtype) else serie
+    codes, uniques = pd.factorize(serie, sort=True)
+    codes = codes.astype(np.int64)
+    codes[codes < 0] = len(uniques)
+    return codes, uniques
+
+
+def _encode_codes(codes, valid, names):
+    """
+    Como _encode para una columna ya codificada con enteros (posiciones en 'names'; 'valid' marca las
+    filas no nulas): los códigos se renumeran para que los valores presentes queden ordenados, sin
+    convertir cada fila en su valor.
+    """
+    present = np.flatnonzero(np.bincount(codes[valid], minlength=len(names)))
+    present = present[np.argsort(names[present], kind="stable")]
+    remap = np.zeros(len(names), dtype=np.int64)
+    remap[present] = np.arange(len(present))
+    result = np.full(len(codes), len(present), dtype=np.int64)
+    result[valid] = remap[codes[valid]]
+    return result, pd.Index(names[present])
+
+
+class AggregationCube:
+    """
+    Cubo de agregación con materialización parcial: recuentos de títulos agrupados por combinaciones
+    de dimensiones (tipo, clasificación, años, mes, día, duración, país, género), calculados una vez
+    por versión del dataset.
+
+    - labels[dim]: valores de cada dimensión (el código len(labels[dim]) es el nulo).
+    - views: {dimensiones: (recuentos, primera aparición o None)}, cada uno un array denso con un eje
+      por dimensión. Sólo se materializan las vistas que elige select_views para las consultas de
+      QUERIES (con y sin filtros) dentro de CUBE_MAX_CELLS celdas.
+
+    Una consulta (dimensiones agrupadas + condiciones sobre otras dimensiones) se resuelve con la vista
+    materializada más pequeña que la contiene: se recortan los ejes filtrados (slice) y se suman los
+    demás (roll-up), sin recorrer las filas. Un eje multivaluado no se puede sumar (contaría pares
+    título-entidad en lugar de títulos), así que la vista debe tener exactamente las dimensiones
+    multivaluadas agrupadas.
+    """
+
+    def __init__(self, labels, views):
+        self.labels = labels
+        self.views = views
+
+    @property
+    def cells(self):
+        return sum(counts.size for counts, _ in self.views.values())
+
+    @classmethod
+    def from_dataset(cls, dataset, max_cells=None):
+        frame = dataset.frame
+        positions = frame.index.to_numpy(dtype=np.int64)
+
+        # Códigos de las dimensiones con un valor por título
+        codes, labels = {}, {}
+        for dim in ["type", "rating", "release_year", "duration_minutes", "duration_seasons"]:
+            codes[dim], labels[dim] = _encode(frame[dim])
+
+        # Las de la fecha de subida salen de sus códigos enteros (nulas en los títulos sin fecha)
+        dates = get_date_dimension(dataset)
+        dated = dates.dated
+        years = dates.year[dated].astype(np.int64)
+        first, last = (int(years.min()), int(years.max())) if len(years) else (0, -1)
+        date_codes = {
+            "year_added": (dates.year.astype(np.int64) - first, np.arange(first, last + 1, dtype=np.int32)),
+            "month_added": (dates.month.astype(np.int64) - 1, MONTH_NAMES),
+            "weekday_added": (dates.weekday.astype(np.int64), WEEKDAY_NAMES),
+        }
+        for dim, (dim_codes, names) in date_codes.items():
+            codes[dim], labels[dim] = _encode_codes(dim_codes, dated, names)
+
+        bridges = {dim: get_bridge(dim, dataset) for dim in MULTI_VALUED_DIMENSIONS}
+        for dim, bridge in bridges.items():
+            labels[dim] = pd.Index(bridge.entities, name=dim)
+
+        shapes = {dim: len(labels[dim]) + 1 for dim in labels}
+        pairs = {dim: len(bridge.title_ids) for dim, bridge in bridges.items()}
+        selected = select_views(shapes, len(frame), pairs, CUBE_MAX_CELLS if max_cells is None else max_cells)
+
+        # Las vistas se calculan de mayor a menor número de dimensiones: cada una sale del roll-up de la
+        # vista ya calculada más pequeña que la contiene (mismas dimensiones multivaluadas) o, si no hay,
+        # de las filas; las filas de cada combinación de dimensiones multivaluadas se preparan una vez
+        views, layouts = {}, {}
+        for dims in sorted(selected, key=len, reverse=True):
+            with_first = selected[dims]
+            multi = tuple(dim for dim in dims if dim in MULTI_VALUED_DIMENSIONS)
+            parents = [
+                parent for parent in views
+                if set(dims) < set(parent) and multi == tuple(dim for dim in parent if dim in MULTI_VALUED_DIMENSIONS)
+                and (not with_first or views[parent][1] is not None)
+            ]
+            if parents:
+                parent = min(parents, key=lambda parent: views[parent][0].size)
+                views[dims] = _roll_up(parent, views[parent], dims)
+            else:
+                if multi not in layouts:
+                    layouts[multi] = _rows(multi, bridges, positions)
+                views[dims] = _materialize(dims, codes, layouts[multi], shapes, with_first)
+        return cls(labels, {dims: views[dims] for dims in selected})
+
+    def where(self, filters):
+        """
+        Condiciones del cubo ({dimensión: máscara booleana sobre sus códigos}) equivalentes a los filtros
+        globales normalizados, o None si alguno no se puede expresar con sus dimensiones: los de país y
+        género (un título con varias entidades elegidas se contaría varias veces) y los rangos de fecha
+        de subida que no abarcan años completos se resuelven recorriendo las filas.
+        """
+        where = {}
+        for col, value in (filters or ()):
+            if col in CATEGORICAL_FILTERS:
+                where[col] = np.append(np.isin(np.asarray(self.labels[col], dtype=object), list(value)), False)
+            elif col in ("release_year", "date_added"):
+                lo, hi = value
+                if col == "date_added":
+                    if (lo is not None and not lo.endswith("-01-01")) or (hi is not None and not hi.endswith("-12-31")):
+                        return None
+                    lo, hi = (None if bound is None else int(bound[:4]) for bound in (lo, hi))
+                    col = "year_added"
+                years = np.asarray(self.labels[col], dtype=np.int64)
+                inside = np.ones(len(years), dtype=bool)
+                if lo is not None:
+                    inside &= years >= lo
+                if hi is not None:
+                    inside &= years <= hi
+                where[col] = np.append(inside, False)
+            else:
+                return None
+        return where
+
+    def _view_for(self, group_by, where_dims):
+        # Vista materializada más pequeña que resuelve la consulta (o None)
+        needed = set(group_by) | set(where_dims)
+        multi = set(group_by) & set(MULTI_VALUED_DIMENSIONS)
+        candidates = [
+            dims for dims in self.views
+            if needed <= set(dims) and set(dims) & set(MULTI_VALUED_DIMENSIONS) == multi
+        ]
+        return min(candidates, key=lambda dims: self.views[dims][0].size, default=None)
+
+    def can_answer(self, group_by, where_dims=()):
+        return self._view_for(group_by, where_dims) is not None
+
+    def query(self, group_by, where=None, names=None):
+        """
+        Recuentos agrupados por 'group_by' de los títulos que cumplen 'where' ({dimensión: máscara
+        booleana sobre sus códigos, nulo incluido}). Devuelve (counts, first_seen) como Series con el
+        índice formado por los valores de las dimensiones agrupadas (sin nulos ni celdas vacías);
+        first_seen es None si la vista no la guarda. Devuelve None si ninguna vista la resuelve.
+        """
+        where = where or {}
+        dims = self._view_for(group_by, where)
+        if dims is None:
+            return None
+        counts, first = self.views[dims]
+
+        # Slice: sólo las posiciones permitidas de cada eje con condición
+        kept = {}
+        for axis, dim in enumerate(dims):
+            positions = np.arange(counts.shape[axis])
+            if dim in where:
+                positions = np.flatnonzero(where[dim])
+            if dim in group_by:
+                # Los nulos no forman grupo (como groupby)
+                positions = positions[positions < len(self.labels[dim])]
+            kept[dim] = positions
+            counts = counts.take(positions, axis=axis)
+            first = None if first is None else first.take(positions, axis=axis)
+
+        # Roll-up: suma de los ejes no agrupados (y mínimo de la primera aparición)
+        rolled = tuple(axis for axis, dim in enumerate(dims) if dim not in group_by)
+        counts = counts.sum(axis=rolled)
+        first = None if first is None else first.min(axis=rolled, initial=np.iinfo(np.int64).max)
+        remaining = [dim for dim in dims if dim in group_by]
+        order = [remaining.index(dim) for dim in group_by]
+        counts = counts.transpose(order)
+        first = None if first is None else first.transpose(order)
+
+        cells = np.nonzero(counts)
+        names = list(names or group_by)
+        arrays = [self.labels[dim].take(kept[dim][cell]) for dim, cell in zip(group_by, cells)]
+        if len(arrays) == 1:
+            index = pd.Index(arrays[0], name=names[0])
+        else:
+            index = pd.MultiIndex.from_arrays(arrays, names=names)
+
+        result = pd.Series(counts[cells].astype(np.int64), index=index, name="count")
+        first_seen = None if first is None else pd.Series(first[cells], index=index, name="first_seen")
+        return result, first_seen
+
+
+def _rows(multi, bridges, positions):
+    """
+    Filas sobre las que se cuentan las vistas con las dimensiones multivaluadas 'multi': los títulos,
+    los pares título-entidad si hay una o sus combinaciones si hay dos. Devuelve (título de cada fila,
+    {dimensión multivaluada: código de la entidad de cada fila}, orden de aparición de cada fila o None).
+    """
+    n_titles = len(positions)
+    title_ids = np.arange(n_titles)
+    order = positions
+    entity_codes = {}
+
+    if multi:
+        bridge = bridges[multi[0]]
+        title_ids, entity_codes[multi[0]] = bridge.title_ids.astype(np.int64), bridge.entity_ids.astype(np.int64)
+        order = bridge.order_keys(positions)
+    if len(multi) == 2:
+        # Combinaciones de las entidades de las dos columnas en cada título
+        other = bridges[multi[1]]
+        degree = np.bincount(other.title_ids, minlength=n_titles)
+        offsets = np.cumsum(degree) - degree
+        repeat = degree[title_ids]
+        within = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+        entity_codes[multi[1]] = other.entity_ids[np.repeat(offsets[title_ids], repeat) + within].astype(np.int64)
+        entity_codes[multi[0]] = np.repeat(entity_codes[multi[0]], repeat)
+        title_ids = np.repeat(title_ids, repeat)
+        order = None
+    return title_ids, entity_codes, order
+
+
+def _materialize(dims, codes, rows, shapes, with_first):
+    # Recuentos (y primera aparición) de la vista 'dims' en un array denso, contando las filas 'rows' (ver _rows)
+    title_ids, entity_codes, order = rows
+    shape = tuple(shapes[dim] for dim in dims)
+    flat = np.ravel_multi_index(
+        [entity_codes[dim] if dim in entity_codes else codes[dim][title_ids] for dim in dims], shape
+    )
+    counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+    first = None
+    if with_first and order is not None:
+        # Primera aparición de cada celda: menor orden de sus filas
+        first = np.full(counts.size, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first, flat, order)
+        first = first.reshape(shape)
+    return counts, first
+
+
+def _roll_up(parent_dims, parent, dims):
+    # Vista 'dims' a partir de una vista que la contiene: suma de recuentos (y mínimo de la primera aparición)
+    counts, first = parent
+    rolled = tuple(axis for axis, dim in enumerate(parent_dims) if dim not in dims)
+    return counts.sum(axis=rolled), None if first is None else first.min(axis=rolled)
+
+
+def workload():
+    """
+    Consultas esperadas: cada agregado de QUERIES sin filtros y con cada combinación de FILTER_DIMENSIONS.
+    Devuelve una lista de (dimensiones necesarias, dimensiones multivaluadas, peso, primera aparición).
+    """
+    queries = []
+    for group_by, fixed, _, with_first in QUERIES.values():
+        base = set(group_by) | ({"year_added"} if "dated" in fixed else set())
+        multi = frozenset(set(group_by) & set(MULTI_VALUED_DIMENSIONS))
+        for size in range(len(FILTER_DIMENSIONS) + 1):
+            for filters in itertools.combinations(FILTER_DIMENSIONS, size):
+                queries.append((frozenset(base | set(filters)), multi, FILTER_WEIGHT ** size, with_first))
+    return queries
+
+
+def select_views(shapes, n_titles, pair_rows, max_cells):
+    """
+    Materialización parcial (selección voraz de vistas, como en Harinarayan, Rajaraman y Ullman):
+    parte de las vistas de las consultas sin filtros (siempre se materializan) y añade en cada paso
+    la vista candidata con más beneficio por celda, hasta agotar max_cells. El beneficio de una vista
+    es lo que ahorra (en celdas leídas, ponderado por el peso de cada consulta) frente a la mejor
+    forma actual de resolver cada consulta: otra vista más grande o recorrer las filas (ROW_COST por fila).
+
+    Devuelve {dimensiones de la vista (en el orden de SCALAR_DIMENSIONS + MULTI_VALUED_DIMENSIONS):
+    si guarda la primera aparición}.
+    """
+    all_dims = SCALAR_DIMENSIONS + MULTI_VALUED_DIMENSIONS
+    queries = workload()
+
+    def view(dims):
+        return tuple(dim for dim in all_dims if dim in dims)
+
+    def size(dims):
+        return int(np.prod([shapes[dim] for dim in dims]))
+
+    def answers(dims, query):
+        needed, multi = query[0], query[1]
+        return needed <= set(dims) and set(dims) & set(MULTI_VALUED_DIMENSIONS) == multi
+
+    def row_cost(query):
+        return ROW_COST * (n_titles + sum(pair_rows[dim] for dim in query[1]))
+
+    selected = {view(query[0]) for query in queries if query[2] == 1}
+    candidates = {view(query[0]) for query in queries} - selected
+    sizes = {dims: size(dims) for dims in selected | candidates}
+    budget = max_cells - sum(sizes[dims] for dims in selected)
+
+    # Consultas que resuelve cada vista candidata y coste actual de cada consulta (se actualiza al elegir)
+    answered = {dims: [i for i, query in enumerate(queries) if answers(dims, query)] for dims in candidates}
+    cost = [
+        min([sizes[dims] for dims in selected if answers(dims, query)] + [row_cost(query)]) for query in queries
+    ]
+
+    while True:
+        best, best_ratio = None, 0.0
+        for dims in candidates:
+            if sizes[dims] > budget:
+                continue
+            benefit = sum(queries[i][2] * max(0, cost[i] - sizes[dims]) for i in answered[dims])
+            if benefit / sizes[dims] > best_ratio:
+                best, best_ratio = dims, benefit / sizes[dims]
+        if best is None:
+            break
+        selected.add(best)
+        candidates.discard(best)
+        budget -= sizes[best]
+        for i in answered[best]:
+            cost[i] = min(cost[i], sizes[best])
+
+    # La primera aparición sólo se guarda en las vistas que resuelven alguna consulta que la usa
+    return {dims: any(query[3] and answers(dims, query) for query in queries) for dims in sorted(selected)}
+
+
+def get_cube(dataset=None):
+    # Cubo del dataset indicado (por defecto, el compartido), uno por versión del dataset
+    dataset = dataset or get_dataset()
+    return dataset.cached("cube", lambda: AggregationCube.from_dataset(dataset))
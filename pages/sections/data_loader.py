@@ -1,65 +1,753 @@
+import numpy as np
 import pandas as pd
 import os
+import sys
+import json
+import hashlib
+import inspect
+import threading
 from functools import lru_cache
+from pandas.api.types import union_categoricals
 
-# Decorador que permite cachear el resultado para no recargar el dataset en cada llamada
-@lru_cache(maxsize=1)
-def get_clean_data():
+# Ruta relativa al archivo CSV (se puede cambiar con NETFLIX_CSV, p. ej. para usar un catálogo sintético)
+CSV_PATH = os.environ.get("NETFLIX_CSV", "data/netflix.csv")
+
+# Carpeta donde se guarda la instantánea binaria (Parquet) del DataFrame ya limpio.
+# Se puede cambiar con la variable de entorno NETFLIX_SNAPSHOT_DIR o desactivar con NETFLIX_SNAPSHOT=0
+SNAPSHOT_DIR = os.environ.get("NETFLIX_SNAPSHOT_DIR", os.path.join("data", ".cache"))
+SNAPSHOT_ENABLED = os.environ.get("NETFLIX_SNAPSHOT", "1") != "0"
+
+# Número de filas por bloque en la lectura por bloques del CSV (ver iter_clean_chunks)
+CHUNK_SIZE = int(os.environ.get("NETFLIX_CHUNK_SIZE", "50000"))
+
+# Versión manual de la lógica de limpieza. Junto al hash del código de este módulo
+# forma la "versión del código" que invalida la instantánea cuando la limpieza cambia
+CLEANING_VERSION = 2
+
+
+# Lista de valores considerados inválidos o no informativos
+INVALID_VALUES = {"", "Unknown", "unknown", "Not Available", "No cast", "nan", "NaN", "N/A"}
+
+# Columnas de texto libre que sólo necesitan eliminar espacios al inicio/fin
+FREE_TEXT_COLUMNS = ['title', 'description']
+
+# Columnas de texto con pocos valores distintos que en modo compacto se guardan como 'category'
+CATEGORICAL_COLUMNS = ['type', 'rating', 'country', 'listed_in', 'director', 'duration']
+
+# Tipos enteros pequeños con máscara de nulos para el modo compacto
+COMPACT_INTEGER_DTYPES = {
+    'release_year': "Int16",
+    'duration_minutes': "Int16",
+    'duration_seasons': "Int8",
+}
+
+# Traducción al español de los tipos de contenido
+TYPE_LABELS_ES = {"Movie": "Película", "TV Show": "Serie"}
+TYPE_LABELS_ES_PLURAL = {"Movie": "Películas", "TV Show": "Series"}
+
+# Significado de cada clasificación por edad
+RATING_LABELS = {
+    "G": "Apta para todos",
+    "PG": "Supervisión sugerida",
+    "PG-13": "Mayores de 13",
+    "R": "Mayores de 17",
+    "NC-17": "Sólo adultos",
+    "TV-Y": "Niños pequeños",
+    "TV-Y7": "Niños mayores",
+    "TV-Y7-FV": "Violencia fantasía",
+    "TV-G": "Audiencia general",
+    "TV-PG": "Guía parental",
+    "TV-14": "Mayores de 14",
+    "TV-MA": "Adultos",
+    "NR": "Sin clasificar",
+    "UR": "No clasificada",
+    "Unrated": "Sin calificación",
+    "UNKNOWN": "Desconocida"
+}
+
+# Expresión que separa la duración en número y unidad ("90 min", "2 Seasons", "1 Season")
+DURATION_PATTERN = r"(?P<numero>\d+)\s*(?P<unidad>min|Season)"
+
+# Formato de 'date_added' en el CSV ("September 25, 2021"); las fechas que no lo siguen quedan nulas
+DATE_FORMAT = "%B %d, %Y"
+
+# Nombres de los meses (1-12) y de los días de la semana (0 = lunes), como month_name/day_name de pandas
+MONTH_NAMES = np.array([
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+], dtype=object)
+WEEKDAY_NAMES = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], dtype=object)
+
+# Ordinal de día de los títulos sin fecha de subida (nunca entra en un rango de fechas)
+NO_DATE = np.iinfo(np.int64).min
+
+
+# Columnas identificativas sobre las que se calcula el hash de fila para detectar duplicados
+DEDUP_HASH_COLUMNS = ['show_id', 'title']
+
+def _map_unique_values(serie, funcion):
     """
-    Carga y limpia el dataset de Netflix desde 'data/netflix.csv'.
-    Devuelve un DataFrame procesado, listo para análisis y visualización.
+    Aplica 'funcion' (vectorizada) sólo a los valores distintos de la serie
+    y propaga el resultado a todas las filas mediante los códigos de factorización.
+    Las columnas repetitivas (rating, país, duración...) se limpian así una sola vez por valor.
     """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    resultado = funcion(pd.Series(uniques, dtype=object))
+    if isinstance(resultado, pd.DataFrame):
+        return pd.DataFrame(resultado.to_numpy()[codes], index=serie.index, columns=resultado.columns)
+    return pd.Series(resultado.to_numpy()[codes], index=serie.index, name=serie.name)
 
-    # Ruta relativa al archivo CSV
-    csv_path = "data/netflix.csv"
 
-    # Comprobación de que el archivo existe, lanza un error si no está
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError("No se encontró el archivo 'netflix.csv' en la carpeta 'data/'")
+def _clean_key_column(serie):
+    # Relleno de nulos, conversión a texto, eliminación de espacios y sustitución de valores basura
+    return serie.fillna("Unknown").astype(str).str.strip().replace(INVALID_VALUES, "Unknown")
 
-    # Carga inicial del CSV en un DataFrame de pandas
-    df = pd.read_csv(csv_path)
 
-    # Conversión de la columna 'date_added' al tipo datetime (fechas)
-    df['date_added'] = pd.to_datetime(df['date_added'], errors='coerce')
+def _clean_country(serie):
+    # Limpieza general eliminando también las comas sobrantes al final
+    return _clean_key_column(serie).str.replace(r"\s*,\s*$", "", regex=True)
 
-    # Lista de valores considerados inválidos o no informativos
-    invalid_values = {"", "Unknown", "unknown", "Not Available", "No cast", "nan", "NaN", "N/A"}
 
-    # Limpieza general de columnas clave (relleno de nulos, conversión a texto, eliminación de espacios)
-    for col in ['director', 'cast', 'country', 'rating']:
-        df[col] = (
-            df[col]
-            .fillna("Unknown")                # Sustituye nulos
-            .astype(str)                      # Asegura tipo texto
-            .str.strip()                      # Elimina espacios al inicio/fin
-            .replace(invalid_values, "Unknown")  # Sustituye valores basura
-        )
+def _clean_rating(serie):
+    # Normalización de valores de clasificación (para evitar duplicados mal escritos)
+    return _clean_key_column(serie).str.upper().str.replace(".", "", regex=False)
+
 
-    # Normalización de valores en la columna 'rating' (para evitar duplicados mal escritos)
-    df['rating'] = df['rating'].str.upper().str.replace(".", "", regex=False)
+def _parse_duration(serie):
+    # Una única extracción de número y unidad por valor distinto de 'duration'
+    duration = serie.str.extract(DURATION_PATTERN)
+    numero = duration['numero'].astype(float)
+    return pd.DataFrame({
+        'duration_minutes': numero.where(duration['unidad'] == "min"),
+        'duration_seasons': numero.where(duration['unidad'] == "Season"),
+    })
 
-    # Limpieza de la columna 'country' para evitar comas sobrantes al final
-    df['country'] = df['country'].str.replace(r",\s*$", "", regex=True)
+
+def _drop_duplicate_rows(df):
+    """
+    Elimina filas duplicadas a partir de un hash de 64 bits por fila en lugar de comparar filas completas.
+    Sólo las filas cuyo hash se repite se comparan campo a campo, de modo que una colisión
+    nunca elimina una fila distinta. Conserva la primera aparición, como drop_duplicates.
+    """
+    row_hashes = pd.util.hash_pandas_object(df[DEDUP_HASH_COLUMNS], index=False)
+    candidates = row_hashes.duplicated(keep=False)
+    if not candidates.any():
+        return df
+
+    # Comprobación exacta sólo sobre el subconjunto (pequeño) de filas con hash repetido
+    exact_duplicates = df[candidates].duplicated()
+    return df.drop(index=exact_duplicates.index[exact_duplicates])
+
+
+def _clean_columns(df):
+    """
+    Pasos de limpieza previos a la eliminación de duplicados: fechas, columnas clave y duraciones.
+    Cada columna se procesa una sola vez con operaciones vectorizadas de pandas.
+    """
+
+    # Conversión de la columna 'date_added' al tipo datetime (fechas) con el formato del CSV,
+    # sin que pandas tenga que deducirlo
+    df['date_added'] = pd.to_datetime(df['date_added'], format=DATE_FORMAT, errors='coerce')
+
+    # Limpieza de columnas clave (relleno de nulos, espacios, valores basura y normalizaciones)
+    df['director'] = _map_unique_values(df['director'], _clean_key_column)
+    df['cast'] = _map_unique_values(df['cast'], _clean_key_column)
+    df['country'] = _map_unique_values(df['country'], _clean_country)
+    df['rating'] = _map_unique_values(df['rating'], _clean_rating)
 
     # Creación de nuevas columnas numéricas:
     # - duración en minutos para películas
-    df['duration_minutes'] = df['duration'].apply(
-        lambda x: int(x.split()[0]) if pd.notnull(x) and 'min' in x else None
-    )
-
     # - duración en número de temporadas para series
-    df['duration_seasons'] = df['duration'].apply(
-        lambda x: int(x.split()[0]) if pd.notnull(x) and 'Season' in x else None
-    )
+    duration = _map_unique_values(df['duration'], _parse_duration).astype(float)
+    df['duration_minutes'] = duration['duration_minutes']
+    df['duration_seasons'] = duration['duration_seasons']
+
+    return df
 
-    # Eliminación de filas duplicadas
-    df.drop_duplicates(inplace=True)
 
-    # Limpieza extra de columnas de texto (elimina espacios en títulos, descripciones, etc.)
-    text_columns = ['title', 'director', 'cast', 'country', 'rating', 'listed_in', 'description']
-    for col in text_columns:
+def _strip_free_text(df):
+    """
+    Pasos de limpieza posteriores a la eliminación de duplicados (como en la versión original).
+    """
+
+    # Limpieza de columnas de texto libre (elimina espacios en títulos, descripciones, etc.)
+    for col in FREE_TEXT_COLUMNS:
         df[col] = df[col].astype(str).str.strip()
 
-    # Devuelve el DataFrame limpio y listo para usar
+    # Los géneros se repiten mucho entre títulos, así que se limpian por valor distinto
+    df['listed_in'] = _map_unique_values(df['listed_in'], lambda serie: serie.astype(str).str.strip())
+
     return df
+
+
+def _clean_data(df):
+    """
+    Aplica todos los pasos de limpieza al DataFrame leído del CSV.
+    Devuelve un DataFrame procesado, listo para análisis y visualización.
+    """
+    df = _clean_columns(df)
+
+    # Eliminación de filas duplicadas (antes de normalizar el texto libre, como en la versión original)
+    df = _drop_duplicate_rows(df)
+
+    return _strip_free_text(df)
+
+
+class RowHashIndex:
+    """
+    Estado de ingesta del catálogo: hashes de 64 bits de las filas ya incorporadas (antes de
+    normalizar el texto libre), guardados como pocos arrays ordenados de uint64 (8 bytes por fila,
+    sin objetos Python), y número de filas de origen leídas (incluidas las descartadas por duplicadas).
+
+    Permite detectar duplicados entre bloques del CSV o entre el catálogo y un lote de filas nuevas.
+    Los arrays nunca se modifican, así que with_rows() devuelve un índice nuevo que los comparte.
+    """
+
+    def __init__(self, levels=(), rows=0):
+        self._levels = list(levels)
+        self.rows = rows
+
+    def __len__(self):
+        return sum(len(level) for level in self._levels)
+
+    @property
+    def hashes(self):
+        # Todos los hashes en un solo array ordenado
+        return np.sort(np.concatenate(self._levels)) if self._levels else np.array([], dtype=np.uint64)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self._levels:
+            positions = np.searchsorted(level, hashes).clip(max=len(level) - 1)
+            found |= level[positions] == hashes
+        return found
+
+    def with_rows(self, hashes, rows):
+        """
+        Devuelve un índice nuevo con los hashes añadidos y 'rows' filas de origen más.
+        """
+        levels = self._levels + ([np.sort(hashes)] if len(hashes) else [])
+        # Se fusionan los niveles de vez en cuando para que las búsquedas sigan siendo rápidas
+        if len(levels) > 8:
+            levels = [np.sort(np.concatenate(levels))]
+        return RowHashIndex(levels, self.rows + rows)
+
+
+def clean_new_rows(raw, seen, confirm=None):
+    """
+    Limpia un bloque de filas con el formato del CSV (un bloque del archivo o un lote de títulos nuevos)
+    con la misma limpieza que get_clean_data, a continuación de las filas ya incorporadas en 'seen':
+
+    - el índice del resultado es la posición de cada fila en el catálogo (seen.rows, seen.rows + 1...),
+    - los duplicados dentro del bloque se eliminan igual que en _clean_data,
+    - las filas cuyo hash ya está en 'seen' (duplicadas de filas anteriores) se descartan.
+
+    'confirm' (opcional) recibe las filas limpias cuyo hash ya estaba en 'seen' y devuelve una máscara
+    de las que de verdad ya estaban (ver CatalogDataset._contains_rows); las demás se conservan. Sin
+    ella, como en la lectura por bloques, donde las filas anteriores no se guardan, un hash repetido
+    basta para descartar la fila: una fila distinta sólo se pierde si su hash de 64 bits coincide con
+    el de otra ya leída (probabilidad del orden de filas_nuevas × filas_leídas / 2^64).
+
+    Devuelve el bloque limpio y el RowHashIndex que incluye sus filas ('seen' no se modifica).
+    """
+    raw = raw.set_axis(pd.RangeIndex(seen.rows, seen.rows + len(raw)))
+    chunk = _drop_duplicate_rows(_clean_columns(raw))
+
+    # Se descartan las filas ya vistas anteriormente (confirmadas campo a campo si se puede)
+    row_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    repeated = seen.contains(row_hashes)
+    chunk = _strip_free_text(chunk.copy())
+    if confirm is not None and repeated.any():
+        repeated[repeated] = confirm(chunk[repeated])
+
+    return chunk[~repeated], seen.with_rows(row_hashes[~repeated], len(raw))
+
+
+def iter_clean_chunks(csv_path=CSV_PATH, chunksize=CHUNK_SIZE, seen=None):
+    """
+    Lee el CSV en bloques de 'chunksize' filas y devuelve cada bloque ya limpio,
+    con la misma limpieza que get_clean_data. El índice de cada bloque es la posición
+    de la fila en el CSV, igual que en el DataFrame completo.
+
+    Los duplicados dentro de un bloque se eliminan igual que en _clean_data; los duplicados entre
+    bloques se detectan con un hash de 64 bits de la fila completa, que es el único estado que
+    crece con el tamaño del archivo (8 bytes por fila).
+
+    Cada elemento es un par (bloque, RowHashIndex con todas las filas leídas hasta ese bloque);
+    'seen' permite continuar la lectura a partir de un estado anterior (p. ej. un CSV delta).
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"No se encontró el archivo '{csv_path}'")
+
+    seen = RowHashIndex() if seen is None else seen
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk, seen = clean_new_rows(chunk, seen)
+        yield chunk, seen
+
+
+@lru_cache(maxsize=1)
+def _cleaning_code_version():
+    # Combina la versión manual con un hash del código fuente de este módulo,
+    # de modo que cualquier cambio en la limpieza invalida la instantánea automáticamente
+    source = inspect.getsource(sys.modules[__name__]).encode("utf-8")
+    return f"{CLEANING_VERSION}-{hashlib.sha256(source).hexdigest()[:16]}"
+
+
+def _file_sha256(path):
+    # Hash del contenido del archivo leído por bloques (no carga el CSV entero en memoria)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_data_fingerprint(csv_path=CSV_PATH, with_hash=True):
+    """
+    Devuelve la huella del CSV de origen: tamaño, fecha de modificación,
+    hash del contenido y versión del código de limpieza.
+    Con with_hash=False se omite el hash (sólo metadatos del sistema de archivos).
+    """
+    stat = os.stat(csv_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _file_sha256(csv_path) if with_hash else None,
+        "code_version": _cleaning_code_version(),
+    }
+
+
+def _snapshot_paths(csv_path):
+    # La instantánea, los hashes de sus filas (ver RowHashIndex) y sus metadatos se nombran a partir del nombre del CSV
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return (
+        os.path.join(SNAPSHOT_DIR, f"{name}.parquet"),
+        os.path.join(SNAPSHOT_DIR, f"{name}.hashes.npy"),
+        os.path.join(SNAPSHOT_DIR, f"{name}.meta.json"),
+    )
+
+
+def _read_snapshot_meta(csv_path):
+    # Metadatos (huella del CSV) de la instantánea, o None si no existen o no se pueden leer
+    _, _, meta_path = _snapshot_paths(csv_path)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _load_snapshot(csv_path):
+    """
+    Devuelve el DataFrame guardado en la instantánea, su huella y el RowHashIndex de sus filas
+    si sigue siendo válido para el CSV actual y el código de limpieza actual.
+    En cualquier otro caso devuelve None.
+    """
+    data_path, hashes_path, _ = _snapshot_paths(csv_path)
+    meta = _read_snapshot_meta(csv_path)
+    if meta is None or not os.path.exists(data_path) or not os.path.exists(hashes_path):
+        return None
+
+    # Comprobación rápida: versión del código y tamaño del archivo
+    current = get_data_fingerprint(csv_path, with_hash=False)
+    if meta.get("code_version") != current["code_version"] or meta.get("size") != current["size"]:
+        return None
+
+    # Si la fecha de modificación cambió (p. ej. tras un checkout) se confirma con el hash del contenido
+    if meta.get("mtime_ns") != current["mtime_ns"]:
+        if meta.get("sha256") != _file_sha256(csv_path):
+            return None
+
+    try:
+        df = pd.read_parquet(data_path)
+        row_hashes = np.load(hashes_path)
+        if row_hashes.dtype != np.uint64 or len(row_hashes) != len(df):
+            return None
+        return df, meta, RowHashIndex().with_rows(row_hashes, meta["rows"])
+    except Exception:
+        # Una instantánea corrupta o ilegible nunca debe impedir la carga desde el CSV
+        return None
+
+
+def _save_snapshot(df, csv_path, fingerprint, row_index):
+    data_path, hashes_path, meta_path = _snapshot_paths(csv_path)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+
+        # Escritura atómica: varios workers de gunicorn pueden arrancar a la vez
+        tmp_suffix = f".{os.getpid()}.tmp"
+        df.to_parquet(data_path + tmp_suffix)
+        # Los hashes de fila (uno por fila conservada, ordenados) van en su propio archivo .npy, no
+        # alineados con las filas del DataFrame: permiten detectar duplicados al añadir filas nuevas
+        # (append_rows) sin releer el CSV
+        with open(hashes_path + tmp_suffix, "wb") as f:
+            np.save(f, row_index.hashes)
+        with open(meta_path + tmp_suffix, "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f)
+        os.replace(data_path + tmp_suffix, data_path)
+        os.replace(hashes_path + tmp_suffix, hashes_path)
+        # Los metadatos se escriben los últimos: sólo entonces la instantánea se considera válida
+        os.replace(meta_path + tmp_suffix, meta_path)
+    except Exception:
+        # Sin permisos de escritura o sin pyarrow la aplicación sigue funcionando sin caché
+        pass
+
+
+def to_compact(df, include_description=True):
+    """
+    Devuelve una copia compacta del DataFrame limpio:
+    - columnas de texto repetitivas como 'category' (un código entero por fila + tabla de valores),
+    - años y duraciones como enteros pequeños con máscara de nulos (Int16/Int8),
+    - opcionalmente sin la columna 'description', la más pesada del dataset.
+    """
+    df = df.drop(columns=[] if include_description else ['description'])
+    return df.astype({
+        **{col: "category" for col in CATEGORICAL_COLUMNS},
+        **COMPACT_INTEGER_DTYPES,
+    })
+
+
+def format_rating_label(rating):
+    # Etiqueta completa de una clasificación: código + significado
+    return f"{rating}\n({RATING_LABELS[rating]})" if rating in RATING_LABELS else rating
+
+
+class DateDimension:
+    """
+    Fecha de subida ('date_added') de cada fila en enteros compactos, calculados una sola vez por
+    dataset (ver get_date_dimension) para contar por año, mes o día de la semana sin volver a
+    convertir fechas ni generar nombres de mes y de día en cada agregado.
+
+    - day: ordinal del día (días desde 1970-01-01); NO_DATE en las filas sin fecha.
+    - year, month (1-12) y weekday (0 = lunes); 0 en las filas sin fecha.
+    """
+
+    def __init__(self, day, year, month, weekday):
+        self.day = day
+        self.year = year
+        self.month = month
+        self.weekday = weekday
+
+    @property
+    def dated(self):
+        # Máscara de las filas con fecha de subida
+        return self.day != NO_DATE
+
+    @classmethod
+    def from_series(cls, date_added):
+        dates = date_added.to_numpy(dtype="datetime64[D]")
+        return cls.from_days(np.where(np.isnat(dates), NO_DATE, dates.astype(np.int64)))
+
+    @classmethod
+    def from_days(cls, day):
+        # A partir de los ordinales de día (NO_DATE = sin fecha)
+        dated = day != NO_DATE
+        months = np.where(dated, day, 0).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        return cls(
+            day,
+            np.where(dated, months // 12 + 1970, 0).astype(np.int16),
+            np.where(dated, months % 12 + 1, 0).astype(np.int8),
+            # El 1 de enero de 1970 fue jueves (3)
+            np.where(dated, (day + 3) % 7, 0).astype(np.int8),
+        )
+
+    def select_rows(self, mask):
+        # Sólo las filas marcadas en 'mask' (máscara booleana o posiciones)
+        return DateDimension(self.day[mask], self.year[mask], self.month[mask], self.weekday[mask])
+
+    def concat(self, other):
+        # Filas de este dataset seguidas de las de 'other'
+        return DateDimension(*(np.concatenate([a, b]) for a, b in zip(
+            (self.day, self.year, self.month, self.weekday), (other.day, other.year, other.month, other.weekday)
+        )))
+
+
+def _require_copy_on_write():
+    # Las vistas de CatalogDataset.frame comparten memoria con el DataFrame en caché: sin Copy-on-Write
+    # una asignación sobre ellas (df.loc[...] = ...) modificaría los datos de todas las peticiones. Se
+    # activa al crear un dataset, no al importar el módulo, para no cambiar pandas a quien sólo lo importe
+    if not pd.get_option("mode.copy_on_write"):
+        pd.set_option("mode.copy_on_write", True)
+
+
+# Actualizaciones incrementales de las estructuras precalculadas de un dataset (ver CatalogDataset.cached)
+# al añadir filas nuevas: clave -> funcion(valor_anterior, filas_nuevas) que devuelve el valor actualizado.
+# Las estructuras sin actualización registrada se vuelven a calcular cuando se pidan
+INCREMENTAL_UPDATES = {
+    "date_dimension": lambda dates, delta: dates.concat(DateDimension.from_series(delta["date_added"])),
+    "clean_row_hashes": lambda hashes, delta: np.concatenate([hashes, _clean_row_hashes(delta)]),
+}
+
+
+class CatalogDataset:
+    """
+    Dataset limpio compartido por todas las peticiones (y todos los hilos) de un worker.
+
+    - frame: vista ligera de sólo lectura del DataFrame limpio. Se puede filtrar o añadir
+      columnas sobre ella sin afectar a los datos compartidos (Copy-on-Write, que el propio dataset
+      activa al crearse: la garantía no depende de que el punto de entrada lo haya hecho).
+    - cached(clave, funcion): estructuras precalculadas (tablas puente, índices...) ligadas a esta versión.
+    - version: identificador de la versión de los datos (hash del CSV + versión del código).
+    - row_index: hashes de las filas incorporadas (ver RowHashIndex), para añadir filas nuevas.
+
+    Las filas añadidas con appended() se guardan como bloques aparte (blocks) y sólo se unen al
+    DataFrame, todas de una vez, la primera vez que se pide 'frame'.
+    """
+
+    def __init__(self, frame, version, row_index=None, blocks=()):
+        _require_copy_on_write()
+        self._frame = frame
+        self._blocks = list(blocks)
+        self.version = version
+        self.row_index = row_index
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    @property
+    def frame(self):
+        # Cada llamada devuelve un objeto DataFrame nuevo que comparte memoria con el original
+        if self._blocks:
+            with self._lock:
+                if self._blocks:
+                    self._frame = _concat_frames(self._frame, self._blocks)
+                    self._blocks = []
+        return self._frame.copy(deep=False)
+
+    def cached(self, key, factory):
+        """
+        Devuelve el objeto guardado con 'key', calculándolo con factory() la primera vez.
+        El cálculo se hace una sola vez aunque varios hilos lo pidan a la vez.
+        """
+        if key not in self._cache:
+            with self._lock:
+                if key not in self._cache:
+                    self._cache[key] = factory()
+        return self._cache[key]
+
+    def appended(self, raw):
+        """
+        Devuelve un dataset nuevo con las filas de 'raw' (formato del CSV) añadidas al final,
+        igual que si se hubieran añadido al CSV y se hubiera limpiado el archivo completo.
+        Este dataset no se modifica. Las estructuras con actualización incremental registrada
+        (INCREMENTAL_UPDATES) se actualizan sólo con las filas nuevas.
+        """
+        if self.row_index is None:
+            raise ValueError("El dataset no tiene índice de filas; no se pueden añadir filas nuevas")
+
+        delta, row_index = clean_new_rows(raw, self.row_index, confirm=self._contains_rows)
+        delta = self._as_frame_rows(delta)
+
+        # La versión nueva depende de la anterior y del contenido de las filas añadidas
+        delta_hashes = pd.util.hash_pandas_object(delta, index=True).to_numpy()
+        digest = hashlib.sha256(self.version.encode("utf-8") + delta_hashes.tobytes()).hexdigest()[:16]
+
+        # El dataset nuevo comparte el DataFrame y los bloques de este y añade el de las filas nuevas
+        with self._lock:
+            frame, blocks, cache = self._frame, self._blocks + ([delta] if len(delta) else []), dict(self._cache)
+        dataset = CatalogDataset(frame, f"{self.version}+{digest}", row_index, blocks)
+
+        for key, value in cache.items():
+            update = INCREMENTAL_UPDATES.get(key)
+            if update is not None:
+                dataset._cache[key] = update(value, delta)
+
+        return dataset
+
+
+    def _as_frame_rows(self, rows):
+        # Filas limpias en la misma representación (compacta o no) y con las mismas columnas que el dataset
+        if any(isinstance(dtype, pd.CategoricalDtype) for dtype in self._frame.dtypes):
+            rows = to_compact(rows)
+        return rows[self._frame.columns]
+
+    def _contains_rows(self, rows):
+        """
+        Máscara de las filas limpias de 'rows' que ya están en el dataset (en las columnas que guarda).
+        Igual que _drop_duplicate_rows: un hash de cada fila del dataset (calculado una vez y ampliado
+        al añadir filas) reduce la búsqueda a las filas con el mismo hash, que se comparan campo a campo.
+        """
+        rows = self._as_frame_rows(rows)
+        hashes = self.cached("clean_row_hashes", lambda: _clean_row_hashes(self.frame))
+        candidates = pd.DataFrame({"hash": _clean_row_hashes(rows), "new": np.arange(len(rows))})
+        pairs = pd.DataFrame({"hash": hashes, "old": np.arange(len(hashes))})
+        pairs = pairs[pairs["hash"].isin(candidates["hash"])].merge(candidates, on="hash")
+
+        frame = self.frame
+        equal = np.ones(len(pairs), dtype=bool)
+        for col in frame.columns:
+            old = frame[col].iloc[pairs["old"].to_numpy()].astype(object).to_numpy()
+            new = rows[col].iloc[pairs["new"].to_numpy()].astype(object).to_numpy()
+            # Dos nulos son iguales (como en drop_duplicates); sólo se comparan los pares sin nulos
+            old_null, new_null = pd.isna(old), pd.isna(new)
+            same = old_null & new_null
+            both = ~(old_null | new_null)
+            same[both] = old[both] == new[both]
+            equal &= same
+
+        found = np.zeros(len(rows), dtype=bool)
+        found[pairs["new"].to_numpy()[equal]] = True
+        return found
+
+
+def _clean_row_hashes(frame):
+    # Hash de 64 bits de cada fila limpia (los categóricos dan el mismo hash que sus valores)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+
+def _concat_frames(frame, blocks):
+    # Concatena los bloques de filas nuevas manteniendo las columnas categóricas (con la unión de
+    # categorías, ordenada): una sola concatenación para todos los bloques pendientes
+    result = pd.concat([frame] + blocks)
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            combined = union_categoricals([frame[col]] + [block[col] for block in blocks], sort_categories=True)
+            result[col] = pd.Series(combined, index=result.index, name=col)
+    return result
+
+
+def _compact_default():
+    # El modo compacto puede activarse para toda la aplicación con NETFLIX_COMPACT=1
+    return os.environ.get("NETFLIX_COMPACT", "0") == "1"
+
+
+# Datasets con filas añadidas (append_rows), que sustituyen a los cargados del CSV
+_appended_datasets = {}
+_appended_lock = threading.Lock()
+
+
+def get_dataset(compact=None, include_description=True):
+    """
+    Devuelve el CatalogDataset compartido con el catálogo limpio.
+    Los parámetros tienen el mismo significado que en get_clean_data.
+    """
+    if compact is None:
+        compact = _compact_default()
+    key = (compact, include_description)
+    if key in _appended_datasets:
+        return _appended_datasets[key]
+    return _get_dataset(compact, include_description)
+
+
+def get_date_dimension(dataset=None):
+    # Fecha de subida en enteros (DateDimension) del dataset indicado (por defecto, el compartido)
+    dataset = dataset or get_dataset()
+    return dataset.cached("date_dimension", lambda: DateDimension.from_series(dataset.frame["date_added"]))
+
+
+def read_new_rows(rows):
+    # Lote de filas nuevas: DataFrame con las columnas del CSV o ruta de un CSV delta
+    if isinstance(rows, pd.DataFrame):
+        return rows.copy(deep=False)
+    if not os.path.exists(rows):
+        raise FileNotFoundError(f"No se encontró el archivo '{rows}'")
+    return pd.read_csv(rows)
+
+
+def append_rows(rows, compact=None, include_description=True):
+    """
+    Añade títulos nuevos al dataset compartido sin volver a leer ni limpiar el catálogo completo.
+    'rows' es un DataFrame con las columnas del CSV o la ruta de un CSV delta con el mismo formato.
+
+    Las filas nuevas se limpian igual que el resto y las que ya estaban en el catálogo se descartan.
+    El resultado coincide con el de añadir las filas al CSV y recargarlo, y las siguientes llamadas
+    a get_dataset/get_clean_data devuelven el dataset nuevo (con una versión distinta).
+    Los parámetros compact e include_description indican qué representación se actualiza.
+    """
+    raw = read_new_rows(rows)
+    if compact is None:
+        compact = _compact_default()
+    with _appended_lock:
+        dataset = get_dataset(compact, include_description).appended(raw)
+        _appended_datasets[(compact, include_description)] = dataset
+    return dataset
+
+
+def get_clean_data(compact=None, include_description=True):
+    """
+    Carga y limpia el dataset de Netflix desde 'data/netflix.csv'.
+    Devuelve una vista de sólo lectura del DataFrame procesado, listo para análisis y visualización.
+
+    El resultado se guarda en una instantánea Parquet en 'data/.cache/' y se reutiliza
+    en los siguientes arranques mientras no cambien el CSV ni el código de limpieza.
+
+    Con compact=True se devuelve la representación compacta (ver to_compact) y con
+    include_description=False se omite la columna 'description'. Si compact es None
+    se usa el valor de la variable de entorno NETFLIX_COMPACT.
+    """
+    return get_dataset(compact, include_description).frame
+
+
+def _version_of(fingerprint):
+    # Versión de los datos: hash del contenido del CSV + versión del código de limpieza
+    return f"{fingerprint['sha256'][:16]}-{fingerprint['code_version']}"
+
+
+# Versión de cada dataset ya cargado en memoria, por (compact, include_description)
+_dataset_versions = {}
+
+# Huellas del CSV ya conocidas (p. ej. la guardada con los artefactos pre-renderizados) con las que
+# get_dataset_version obtiene la versión de los datos sin leer el archivo, igual que con la instantánea
+KNOWN_FINGERPRINTS = []
+
+
+def get_dataset_version(compact=None, include_description=True):
+    """
+    Devuelve la versión del dataset compartido (la de CatalogDataset.version) sin necesidad de cargarlo.
+    Si todavía no está en memoria se obtiene de la huella del CSV (tamaño, fecha y versión del código),
+    reutilizando el hash del contenido de la instantánea o de KNOWN_FINGERPRINTS si el archivo no ha cambiado.
+    """
+    if compact is None:
+        compact = _compact_default()
+    key = (compact, include_description)
+    if key in _appended_datasets:
+        return _appended_datasets[key].version
+    if key in _dataset_versions:
+        return _dataset_versions[key]
+
+    current = get_data_fingerprint(CSV_PATH, with_hash=False)
+    for known in KNOWN_FINGERPRINTS + [_read_snapshot_meta(CSV_PATH)]:
+        if known and all(known.get(k) == current[k] for k in ("size", "mtime_ns", "code_version")):
+            return _version_of(known)
+    return _version_of(dict(current, sha256=_file_sha256(CSV_PATH)))
+
+
+# Decorador que permite cachear el resultado para no recargar el dataset en cada llamada
+@lru_cache(maxsize=4)
+def _get_dataset(compact, include_description):
+    df, fingerprint, row_index = _load_clean_data()
+    version = _version_of(fingerprint)
+    _dataset_versions[(compact, include_description)] = version
+
+    # La versión compacta se deriva sin guardar en caché el DataFrame completo,
+    # así cada worker sólo mantiene en memoria la representación que usa
+    if compact:
+        return CatalogDataset(to_compact(df, include_description), version, row_index)
+    if not include_description:
+        return CatalogDataset(df.drop(columns=['description']), version, row_index)
+    return CatalogDataset(df, version, row_index)
+
+
+def _load_clean_data():
+    # Comprobación de que el archivo existe, lanza un error si no está
+    if not os.path.exists(CSV_PATH):
+        raise FileNotFoundError(f"No se encontró el archivo '{CSV_PATH}'")
+
+    # Intento de carga rápida desde la instantánea binaria
+    if SNAPSHOT_ENABLED:
+        snapshot = _load_snapshot(CSV_PATH)
+        if snapshot is not None:
+            return snapshot
+
+    # Carga inicial del CSV en un DataFrame de pandas y limpieza completa
+    # (equivale a _clean_data, conservando además los hashes de fila)
+    fingerprint = get_data_fingerprint(CSV_PATH)
+    df, row_index = clean_new_rows(pd.read_csv(CSV_PATH), RowHashIndex())
+    fingerprint["rows"] = row_index.rows
+
+    # Se guarda la instantánea para los próximos arranques
+    if SNAPSHOT_ENABLED:
+        _save_snapshot(df, CSV_PATH, fingerprint, row_index)
+
+    # Devuelve el DataFrame limpio, su huella y el índice de filas
+    return df, fingerprint, row_index
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from inspect import signature
+
+from plotly.io.json import to_json_plotly
+
+from pages.sections.aggregates import get_data_version
+
+# Tamaño máximo (en MiB de JSON) de la caché de figuras; con NETFLIX_FIGURE_CACHE_MB=0 se desactiva
+FIGURE_CACHE_MAX_BYTES = int(float(os.environ.get("NETFLIX_FIGURE_CACHE_MB", "64")) * 2**20)
+
+
+class FigureCache:
+    """
+    Caché LRU de figuras ya serializadas a JSON, con tamaño máximo en bytes.
+
+    La clave incluye la versión de los datos, así que una figura nunca se sirve con datos antiguos:
+    al cambiar el CSV o añadir filas las entradas anteriores dejan de usarse y acaban desalojadas.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        # JSON guardado con 'key' o None si no está (cuenta como acierto o fallo)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def get_or_build(self, key, build):
+        """
+        Devuelve el JSON guardado con 'key' o lo calcula con build() (que devuelve el JSON).
+        Si varios hilos piden a la vez una figura que no está, puede calcularse más de una vez.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        value = build()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """
+        Guarda el JSON 'value' con clave 'key' (también se usa para cargar JSON ya calculados,
+        como los artefactos pre-renderizados). Los que superan el tamaño máximo no se guardan.
+        """
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self.size += len(value)
+            # Se desalojan las figuras usadas hace más tiempo hasta volver al tamaño máximo
+            while self.size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.size -= len(old)
+                self.evictions += 1
+
+    def stats(self):
+        # Contadores de la caché (para diagnóstico y benchmarks)
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# Caché compartida por todos los constructores de figuras del worker
+FIGURE_CACHE = FigureCache()
+
+
+def figure_key(builder, args=(), kwargs=None):
+    # Clave de la caché: nombre completo del constructor, argumentos normalizados y versión de los datos
+    # (get_x() y get_x(valor_por_defecto) comparten entrada)
+    bound = signature(builder).bind(*args, **(kwargs or {}))
+    bound.apply_defaults()
+    return (f"{builder.__module__}.{builder.__qualname__}", tuple(bound.arguments.items()), get_data_version())
+
+
+def cached_figure(builder):
+    """
+    Decorador para los constructores get_* de figures.py (y otros constructores de componentes
+    que dependen de los datos, como las tablas de características): guarda el JSON del resultado
+    con clave (nombre del constructor, argumentos, versión de los datos) y devuelve un diccionario
+    nuevo en cada llamada, listo para dcc.Graph(figure=...) o como contenido de un componente,
+    sin volver a construirlo. La función original queda disponible como builder.uncached.
+    """
+    @wraps(builder)
+    def wrapper(*args, **kwargs):
+        key = figure_key(builder, args, kwargs)
+        serialized = FIGURE_CACHE.get_or_build(key, lambda: to_json_plotly(builder(*args, **kwargs)))
+        return json.loads(serialized)
+
+    wrapper.uncached = builder
+    return wrapper
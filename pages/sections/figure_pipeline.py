@@ -0,0 +1,141 @@
+"""
+Construcción en paralelo de las figuras de una pestaña.
+
+section_graphics.layout() necesita catorce figuras independientes entre sí: en lugar de construirlas
+una detrás de otra (la latencia de la pestaña sería la suma de todas), build_figures() reparte las que
+no están en la caché de figuras entre un grupo de hilos o de procesos y devuelve los resultados en el
+orden pedido, así que la latencia queda cerca de la del constructor más lento.
+
+Todas las figuras leen los mismos agregados (get_aggregates), que se calculan una sola vez antes de
+repartir el trabajo y se comparten en modo solo lectura: los hilos los ven directamente y los procesos
+los heredan al crearse (fork, copy-on-write). Cada figura se serializa a JSON donde se construye y se
+guarda en la caché de figuras del proceso principal, igual que con cached_figure.
+
+El grupo de procesos es único y persistente: se crea una vez con start_process_pool() mientras el
+proceso todavía no tiene otros hilos (con gunicorn, en post_fork; ver gunicorn.conf.py), porque un fork
+desde un proceso con hilos puede dejar en los hijos cerrojos tomados para siempre. Si no se ha creado,
+o los datos han cambiado desde el fork (los procesos tendrían los agregados antiguos), build_figures
+usa el grupo de hilos en lugar de crear procesos a mitad de una petición.
+
+Configuración:
+  - NETFLIX_FIGURE_POOL: "thread" (por defecto), "process" (con start_process_pool) o "serial" (una detrás de otra),
+  - NETFLIX_FIGURE_WORKERS: número de hilos o procesos (por defecto, el número de CPUs).
+"""
+import atexit
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from plotly.io.json import to_json_plotly
+
+from pages.sections.aggregates import get_aggregates, get_data_version
+from pages.sections.figure_cache import FIGURE_CACHE, figure_key
+
+# Tipo de grupo de trabajo y número de hilos o procesos
+FIGURE_POOL = os.environ.get("NETFLIX_FIGURE_POOL", "thread").lower()
+FIGURE_WORKERS = int(os.environ.get("NETFLIX_FIGURE_WORKERS", os.cpu_count() or 1))
+
+# Tiempos de la última llamada a build_figures (para diagnóstico y benchmarks):
+# {"total_s": ..., "pool": ..., "workers": ..., "builders": {nombre: segundos o None si estaba en caché}}
+last_timings = {}
+
+
+def _render(module, name, args, kwargs):
+    # Construye y serializa una figura sin caché; se ejecuta en un hilo o en un proceso del grupo
+    builder = getattr(importlib.import_module(module), name)
+    t0 = time.perf_counter()
+    serialized = to_json_plotly(builder.uncached(*args, **kwargs))
+    return serialized, time.perf_counter() - t0
+
+
+# Grupo de procesos persistente (start_process_pool) y versión de los datos que heredaron sus procesos
+_process_pool = None
+_process_pool_version = None
+_process_pool_lock = threading.Lock()
+
+
+def start_process_pool(workers=None):
+    """
+    Crea el grupo de procesos que usa build_figures en el modo "process" (si ya existe, lo sustituye).
+    Debe llamarse con los agregados ya calculados y antes de que el proceso arranque otros hilos:
+    los procesos se crean todos aquí con fork y heredan los datos de ese momento.
+    """
+    global _process_pool, _process_pool_version
+    # Con fork los procesos heredan los agregados ya calculados en lugar de volver a leer el CSV
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown()
+        _process_pool = ProcessPoolExecutor(max_workers=workers or FIGURE_WORKERS, mp_context=context)
+        # Con fork el grupo crea todos sus procesos en el primer envío: se fuerza ahora y no en una petición
+        _process_pool.submit(os.getpid).result()
+        _process_pool_version = get_data_version()
+    return _process_pool
+
+
+@atexit.register
+def _stop_process_pool():
+    # Al salir se cierra el grupo persistente (si no, el intérprete lo encuentra a medio desmontar)
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown()
+
+
+def _shared_process_pool():
+    # Grupo de procesos persistente si existe y sus procesos tienen los datos actuales (si no, None)
+    with _process_pool_lock:
+        if _process_pool is not None and _process_pool_version == get_data_version():
+            return _process_pool
+    return None
+
+
+def build_figures(calls, pool=None, workers=None):
+    """
+    Construye las figuras de 'calls' (lista de (constructor decorado con cached_figure, argumentos)
+    o (constructor, argumentos, argumentos con nombre)) y devuelve la lista de diccionarios en el mismo orden, listos para dcc.Graph(figure=...).
+    Las que ya están en la caché de figuras no se vuelven a construir.
+    """
+    global last_timings
+    pool = pool or FIGURE_POOL
+    workers = workers or FIGURE_WORKERS
+    t0 = time.perf_counter()
+
+    calls = [(call[0], tuple(call[1]), dict(call[2]) if len(call) > 2 else {}) for call in calls]
+    keys = [figure_key(builder, args, kwargs) for builder, args, kwargs in calls]
+    serialized = [FIGURE_CACHE.get(key) for key in keys]
+    timings = [None] * len(calls)
+    pending = [i for i, value in enumerate(serialized) if value is None]
+
+    if pending:
+        # Los agregados (de cada selección de los filtros globales) se calculan una sola vez aquí
+        # y todos los constructores los leen
+        for filtros in {calls[i][2].get("filtros") for i in pending}:
+            get_aggregates(filters=filtros)
+        jobs = [(calls[i][0].__module__, calls[i][0].__name__, calls[i][1], calls[i][2]) for i in pending]
+
+        processes = _shared_process_pool() if pool == "process" else None
+        if pool == "serial" or workers <= 1 or len(pending) == 1:
+            results = [_render(*job) for job in jobs]
+        elif processes is not None:
+            results = list(processes.map(_render, *zip(*jobs)))
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(pending)), thread_name_prefix="figuras") as executor:
+                results = list(executor.map(_render, *zip(*jobs)))
+
+        for i, (value, elapsed) in zip(pending, results):
+            FIGURE_CACHE.put(keys[i], value)
+            serialized[i], timings[i] = value, elapsed
+
+    last_timings = {
+        "total_s": time.perf_counter() - t0,
+        "pool": pool,
+        "workers": workers,
+        "builders": {f"{key[0].rsplit('.', 1)[-1]}{list(args) or ''}": elapsed
+                     for key, (_, args, _), elapsed in zip(keys, calls, timings)},
+    }
+    return [json.loads(value) for value in serialized]
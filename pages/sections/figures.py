@@ -1,18 +1,29 @@
 # Importación de librerías necesarias
 import pandas as pd
 import plotly.express as px  # Librería para gráficos interactivos
-from pages.sections.data_loader import get_clean_data  # Función que carga y limpia el dataset
+from pages.sections.data_loader import format_rating_label, TYPE_LABELS_ES, TYPE_LABELS_ES_PLURAL
+from pages.sections.aggregates import get_aggregates, get_period_counts  # Recuentos precalculados que alimentan los gráficos
+from pages.sections.crosstab import row_argmax  # Máximo por filas de una tabla de recuentos dispersa
+from pages.sections.binning import binned_counts  # Histogramas agrupados en el servidor (mismos intervalos que plotly.js)
+from pages.sections.choropleth_frames import get_year_country_matrix  # Matriz año × país del mapa por fotogramas
+from pages.sections.figure_cache import cached_figure  # Caché de figuras serializadas por versión de los datos
+
+# Todos los gráficos aceptan 'filtros' (filtros globales normalizados con filters.normalize_filters):
+# con ellos sólo se cuentan los títulos seleccionados (None = catálogo completo)
+
+# Los rankings de países, actores y directores y el sunburst salen de resúmenes de tamaño acotado
+# (heavy_hitters.py, hierarchy.py): si su top no está garantizado (algún recuento puede sobrar o una
+# entidad descartada podría entrar) se indica en el título del gráfico
+def _mark_approximate(fig, summary, k=20, exclude=None):
+    if not summary.top_is_exact(k, exclude):
+        fig.update_layout(title_text="Recuentos aproximados", title_font_size=12)
+    return fig
 
 # Gráfico 1: Comparativa de Películas vs Series (Gráfico de pastel con estilo "dona")
-def get_pie_chart_type():
-    # Obtenemos el DataFrame limpio a partir del archivo CSV
-    df = get_clean_data()
-
-    # Traducimos los tipos de contenido al español para mostrarlos en el gráfico
-    df["type_es"] = df["type"].map({"Movie": "Películas", "TV Show": "Series"})
-
-    # Contamos la cantidad de cada tipo y lo convertimos en un nuevo DataFrame
-    pie_data = df["type_es"].value_counts().reset_index()
+@cached_figure
+def get_pie_chart_type(filtros=None):
+    # Contamos la cantidad de cada tipo (traducido al español) y lo convertimos en un nuevo DataFrame
+    pie_data = get_aggregates(filters=filtros)["type"].value_counts(mapping=TYPE_LABELS_ES_PLURAL).reset_index()
     pie_data.columns = ["Tipo", "Cantidad"]  # Renombramos columnas para claridad
 
     # Creamos el gráfico de pastel con Plotly Express
@@ -48,41 +59,14 @@ def get_pie_chart_type():
     return fig
 
 # Gráfico 2: Clasificación por edades (Gráfico de burbujas interactivo)
-def get_bubble_chart_rating():
-    # Cargamos los datos limpios
-    df = get_clean_data()
-
-    # Diccionario de etiquetas explicativas para cada tipo de clasificación por edad
-    rating_labels = {
-        "G": "Apta para todos",
-        "PG": "Supervisión sugerida",
-        "PG-13": "Mayores de 13",
-        "R": "Mayores de 17",
-        "NC-17": "Sólo adultos",
-        "TV-Y": "Niños pequeños",
-        "TV-Y7": "Niños mayores",
-        "TV-Y7-FV": "Violencia fantasía",
-        "TV-G": "Audiencia general",
-        "TV-PG": "Guía parental",
-        "TV-14": "Mayores de 14",
-        "TV-MA": "Adultos",
-        "NR": "Sin clasificar",
-        "UR": "No clasificada",
-        "Unrated": "Sin calificación",
-        "UNKNOWN": "Desconocida"
-    }
-
-    # Filtramos los registros que no tienen clasificación
-    df_filtered = df.dropna(subset=["rating"])
-
-    # Contamos cuántas veces aparece cada clasificación
-    rating_counts = df_filtered["rating"].value_counts().reset_index()
+@cached_figure
+def get_bubble_chart_rating(filtros=None):
+    # Contamos cuántas veces aparece cada clasificación (los registros sin clasificación no se cuentan)
+    rating_counts = get_aggregates(filters=filtros)["rating"].value_counts().reset_index()
     rating_counts.columns = ["rating", "cantidad"]
 
     # Añadimos una etiqueta descriptiva combinando el código y su significado
-    rating_counts["rating_label"] = rating_counts["rating"].apply(
-        lambda r: f"{r}\n({rating_labels[r]})" if r in rating_labels else r
-    )
+    rating_counts["rating_label"] = rating_counts["rating"].apply(format_rating_label)
 
     # Calculamos el porcentaje que representa cada clasificación respecto al total
     total = rating_counts["cantidad"].sum()
@@ -124,29 +108,15 @@ def get_bubble_chart_rating():
     return fig
 
 # Gráfico 3: Mapa de calor que cruza tipo de contenido y clasificación por edad
-def get_heatmap_type_rating():
-    df = get_clean_data()
-
-    # Traducción del tipo al español
-    traduccion_type = {"Movie": "Película", "TV Show": "Serie"}
-    df["type_es"] = df["type"].map(traduccion_type)
-
-    # Diccionario con significados explicativos para cada clasificación
-    rating_labels = {
-        "G": "Apta para todos", "PG": "Supervisión sugerida", "PG-13": "Mayores de 13",
-        "R": "Mayores de 17", "NC-17": "Sólo adultos", "TV-Y": "Niños pequeños",
-        "TV-Y7": "Niños mayores", "TV-Y7-FV": "Violencia fantasía", "TV-G": "Audiencia general",
-        "TV-PG": "Guía parental", "TV-14": "Mayores de 14", "TV-MA": "Adultos",
-        "NR": "Sin clasificar", "UR": "No clasificada", "Unrated": "Sin calificación", "UNKNOWN": "Desconocida"
-    }
-
-    # Añadimos la etiqueta completa: código + significado
-    df["rating_label"] = df["rating"].apply(
-        lambda r: f"{r}\n({rating_labels[r]})" if r in rating_labels else r
-    )
+@cached_figure
+def get_heatmap_type_rating(filtros=None):
+    # Recuento por tipo y clasificación, con el tipo traducido y la etiqueta completa de la clasificación
+    heatmap_data = get_aggregates(filters=filtros)["type_rating"].sorted().reset_index()
+    heatmap_data["type_es"] = heatmap_data["type"].map(TYPE_LABELS_ES)
+    heatmap_data["rating_label"] = heatmap_data["rating"].map(format_rating_label)
 
     # Agrupamos por tipo y clasificación
-    heatmap_data = df.groupby(["type_es", "rating_label"]).size().reset_index(name="Cantidad")
+    heatmap_data = heatmap_data.groupby(["type_es", "rating_label"])["count"].sum().reset_index(name="Cantidad")
 
     # Creamos el heatmap
     fig = px.density_heatmap(
@@ -177,26 +147,23 @@ def get_heatmap_type_rating():
     return fig
 
 # Gráfico 4: Cantidad de estrenos por año, mes o día de la semana
-def get_bar_plot_by_period(periodo="año"):
-    df = get_clean_data()
-    df = df.dropna(subset=["date_added"]).copy()
-
-    df["date_added"] = pd.to_datetime(df["date_added"])
-
-    # Configuramos según el periodo seleccionado
+@cached_figure
+def get_bar_plot_by_period(periodo="año", filtros=None, rango=None):
+    # Recuentos de los títulos con fecha de subida (sólo los añadidos en 'rango', si se indica)
+    # según el periodo seleccionado
     if periodo == "año":
-        datos = df["release_year"].value_counts().sort_index()
+        datos = get_period_counts("release_year", filtros, rango)
         titulo = "Cantidad de estrenos por año"
         etiqueta_x = "Año"
     elif periodo == "mes":
-        datos = df["date_added"].dt.month_name().value_counts().reindex([
+        datos = get_period_counts("month_added", filtros, rango).reindex([
             "January", "February", "March", "April", "May", "June",
             "July", "August", "September", "October", "November", "December"
         ])
         titulo = "Cantidad de estrenos por mes"
         etiqueta_x = "Mes"
     elif periodo == "día":
-        datos = df["date_added"].dt.day_name().value_counts().reindex([
+        datos = get_period_counts("weekday_added", filtros, rango).reindex([
             "Monday", "Tuesday", "Wednesday", "Thursday",
             "Friday", "Saturday", "Sunday"
         ])
@@ -222,17 +189,10 @@ def get_bar_plot_by_period(periodo="año"):
     return fig
 
 # Gráfico 5: Número de contenidos añadidos a Netflix por año de subida
-def get_line_chart_date_added():
-    df = get_clean_data()
-
-    # Convertimos a datetime por seguridad
-    df['date_added'] = pd.to_datetime(df['date_added'], errors='coerce')
-
-    # Extraemos el año de subida
-    df['year_added'] = df['date_added'].dt.year
-
-    # Contamos los añadidos por año
-    year_counts = df['year_added'].value_counts().sort_index()
+@cached_figure
+def get_line_chart_date_added(filtros=None, rango=None):
+    # Contamos los añadidos por año de subida (sólo los añadidos en 'rango', si se indica)
+    year_counts = get_period_counts("year_added", filtros, rango)
 
     # Creamos el gráfico de línea
     fig = px.line(
@@ -254,19 +214,28 @@ def get_line_chart_date_added():
     return fig
 
 # Gráfico 6: Histograma de duración de películas (en minutos)
-def get_histogram_duration_movies():
-    df = get_clean_data()
+@cached_figure
+def get_histogram_duration_movies(filtros=None):
+    # Agrupamos las duraciones en el servidor (mismos intervalos que plotly.js con 50 divisiones):
+    # al navegador sólo llegan los recuentos por intervalo, no una fila por película
+    centers, totals, (start, end, size) = binned_counts(get_aggregates(filters=filtros)["duration_minutes"].counts, nbins=50)
+    df = pd.DataFrame({"duration_minutes": centers, "count": totals})
 
     # Creamos un histograma para la duración en minutos
     fig = px.histogram(
         df,
-        x="duration_minutes",             # Duración en el eje X
-        nbins=50,                         # Número de divisiones (bins)
+        x="duration_minutes",             # Duración en el eje X (centro de cada intervalo)
+        y="count",                        # Recuento ya calculado de cada intervalo
+        histfunc="sum",
         labels={"duration_minutes": "Duración (minutos)", "count": "Cantidad"}
     )
 
     # Personalización del color y estilo
-    fig.update_traces(marker_color="#FAF0E6")
+    fig.update_traces(
+        marker_color="#FAF0E6",
+        xbins=dict(start=start, end=end, size=size),
+        hovertemplate="Duración (minutos)=%{x}<br>count=%{y}<extra></extra>"
+    )
     fig.update_layout(
         plot_bgcolor="rgba(0,0,0,0)",      # Fondo del gráfico transparente
         paper_bgcolor="rgba(0,0,0,0)",     # Fondo del lienzo transparente
@@ -279,19 +248,27 @@ def get_histogram_duration_movies():
     return fig
 
 # Gráfico 7: Histograma de número de temporadas en series
-def get_histogram_duration_series():
-    df = get_clean_data()
+@cached_figure
+def get_histogram_duration_series(filtros=None):
+    # Agrupamos el número de temporadas en el servidor (mismos intervalos que plotly.js con 15 divisiones)
+    centers, totals, (start, end, size) = binned_counts(get_aggregates(filters=filtros)["duration_seasons"].counts, nbins=15)
+    df = pd.DataFrame({"duration_seasons": centers, "count": totals})
 
     # Creamos un histograma para el número de temporadas
     fig = px.histogram(
         df,
         x="duration_seasons",
-        nbins=15,  # Número de divisiones
+        y="count",
+        histfunc="sum",
         labels={"duration_seasons": "Número de temporadas", "count": "Cantidad"}
     )
 
     # Personalización del gráfico
-    fig.update_traces(marker_color="#FAF0E6")
+    fig.update_traces(
+        marker_color="#FAF0E6",
+        xbins=dict(start=start, end=end, size=size),
+        hovertemplate="Número de temporadas=%{x}<br>count=%{y}<extra></extra>"
+    )
     fig.update_layout(
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)",
@@ -304,15 +281,12 @@ def get_histogram_duration_series():
     return fig
 
 # Gráfico 8: Cantidad de contenidos por país (Top 20)
-def get_bar_chart_country():
-    df = get_clean_data()
-
-    # Dividimos y contamos países (algunos registros contienen varios separados por coma)
+@cached_figure
+def get_bar_chart_country(filtros=None):
+    # Contamos países (algunos registros contienen varios separados por coma)
+    country_summary = get_aggregates(filters=filtros)["country"]
     country_counts = (
-        df["country"]
-        .dropna()
-        .str.split(", ")
-        .explode()
+        country_summary
         .value_counts()
         .nlargest(20)  # Top 20 países
         .reset_index()
@@ -337,40 +311,38 @@ def get_bar_chart_country():
         paper_bgcolor="rgba(0,0,0,0)"
     )
 
-    return fig
-
-# Gráfico 9: Muestra la evolución temporal de contenidos añadidos por país en un mapa animado
-def get_animated_choropleth_map():
-    df = get_clean_data()
-
-    # Filtramos los registros válidos con fecha y país
-    df = df.dropna(subset=["country", "date_added"]).copy()
-    df["date_added"] = pd.to_datetime(df["date_added"])
-    df["Año"] = df["date_added"].dt.year  # Extraemos el año de subida
-
-    # Algunos títulos tienen varios países separados por coma
-    df["country"] = df["country"].str.split(", ")
-    df = df.explode("country").reset_index(drop=True)
-    df.rename(columns={"country": "País"}, inplace=True)
-
-    # Agrupamos por año y país
-    df_grouped = df.groupby(["Año", "País"]).size().reset_index(name="Cantidad")
-
-    # Creamos el mapa animado (choropleth)
+    return _mark_approximate(fig, country_summary)
+
+# Gráfico 9: Muestra la evolución temporal de contenidos añadidos por país en un mapa que se recorre año a año.
+# Cada llamada construye un solo fotograma: los títulos añadidos en 'anio' (por defecto el primer año con datos)
+# o, con acumulado=True, los añadidos hasta ese año. La pestaña los pide uno a uno desde el deslizador
+# o el botón de reproducir (ver section_graphics.actualizar_mapa)
+@cached_figure
+def get_choropleth_frame(anio=None, acumulado=False, filtros=None):
+    # Fila del año pedido en la matriz año × país (calculada una vez por versión de los datos)
+    matrix = get_year_country_matrix(filtros)
+    if len(matrix.years):
+        year = int(matrix.years[0] if anio is None else anio)
+        countries, counts = matrix.frame(year, cumulative=acumulado)
+    else:
+        # Selección de los filtros globales sin títulos con fecha de subida y país: mapa vacío
+        year, countries, counts = anio, [], []
+    df_frame = pd.DataFrame({"País": countries, "Cantidad": counts})
+
+    # Creamos el mapa (choropleth) del año elegido
     fig = px.choropleth(
-        df_grouped,
+        df_frame,
         locations="País",
         locationmode="country names",
         color="Cantidad",
-        animation_frame="Año",
         hover_name="País",
-        hover_data={"País": False, "Cantidad": True, "Año": True},
         color_continuous_scale=px.colors.sequential.Reds
     )
 
-    # Tooltip personalizado
+    # Tooltip personalizado (el año es el mismo para todo el fotograma)
+    periodo = f"Hasta {year}" if acumulado else f"Año: {year}"
     fig.update_traces(
-        hovertemplate="<b>%{hovertext}</b><br>Año: %{customdata[1]}<br>Cantidad: %{z}<extra></extra>"
+        hovertemplate=f"<b>%{{hovertext}}</b><br>{periodo}<br>Cantidad: %{{z}}<extra></extra>"
     )
 
     # Estilo visual
@@ -383,21 +355,19 @@ def get_animated_choropleth_map():
         ),
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
-        font_color="white"
+        font_color="white",
+        # Mantiene el zoom y el encuadre del usuario al cambiar de fotograma
+        uirevision="mapa-evolucion"
     )
 
     return fig
 
 # Gráfico 10: Muestra la distribución de géneros del catálogo en un treemap
-def get_treemap_genres():
-    df = get_clean_data()
-
+@cached_figure
+def get_treemap_genres(filtros=None):
     # Contamos cuántas veces aparece cada género
     genre_counts = (
-        df["listed_in"]
-        .dropna()
-        .str.split(", ")
-        .explode()
+        get_aggregates(filters=filtros)["listed_in"]
         .value_counts()
         .reset_index()
     )
@@ -457,20 +427,12 @@ def get_treemap_genres():
     return fig
 
 # Gráfico 11: Muestra el género más frecuente por país en formato mapa
-def get_choropleth_dominant_genre():
-    df = get_clean_data()
-
-    # Filtramos nulos y separamos múltiples países y géneros
-    df = df.dropna(subset=["country", "listed_in"])
-    df["country"] = df["country"].str.split(", ")
-    df["listed_in"] = df["listed_in"].str.split(", ")
-    df = df.explode("country").explode("listed_in")
-
-    # Contamos cuántas veces aparece cada género en cada país
-    genre_counts = df.groupby(["country", "listed_in"]).size().reset_index(name="count")
-
-    # Seleccionamos el género más frecuente por país
-    dominant_genres = genre_counts.loc[genre_counts.groupby("country")["count"].idxmax()].reset_index(drop=True)
+@cached_figure
+def get_choropleth_dominant_genre(filtros=None):
+    # Recuento país×género (producto disperso de las matrices de incidencia, sin explotar columnas)
+    # y género más frecuente por país como máximo de cada fila
+    genre_counts = get_aggregates(filters=filtros)["country_genre"].sorted().reset_index()
+    dominant_genres = row_argmax(genre_counts, "country", "listed_in")
     dominant_genres.columns = ["País", "Género predominante", "Cantidad"]
 
     # Creamos un mapa tipo choropleth coloreado por género
@@ -501,18 +463,14 @@ def get_choropleth_dominant_genre():
     return fig
 
 # Gráfico 12: Muestra los 20 actores que más veces aparecen en el catálogo
-def get_bar_chart_top_actors():
-    df = get_clean_data()
-
-    # Separamos los actores de cada contenido
-    cast_series = df["cast"].dropna().str.split(", ").explode()
-
+@cached_figure
+def get_bar_chart_top_actors(filtros=None):
     # Excluimos valores no informativos
     exclude = {"unknown", "Unknown", "Not Available", "No cast", ""}
-    cast_series = cast_series[~cast_series.isin(exclude)]
 
     # Obtenemos los 20 actores con más apariciones
-    top_actors = cast_series.value_counts().nlargest(20).reset_index()
+    cast_summary = get_aggregates(filters=filtros)["cast"]
+    top_actors = cast_summary.value_counts(exclude=exclude).nlargest(20).reset_index()
     top_actors.columns = ["Actor", "Apariciones"]
 
     # Gráfico de barras horizontales
@@ -536,21 +494,17 @@ def get_bar_chart_top_actors():
     )
     fig.update_coloraxes(showscale=False)
 
-    return fig
+    return _mark_approximate(fig, cast_summary, exclude=exclude)
 
 # Gráfico 13: Muestra los 20 directores más frecuentes en el catálogo
-def get_bar_chart_top_directors():
-    df = get_clean_data()
-
-    # Separamos los nombres de directores
-    director_series = df["director"].dropna().str.split(", ").explode()
-
+@cached_figure
+def get_bar_chart_top_directors(filtros=None):
     # Excluimos valores no válidos
     exclude = {"unknown", "Unknown", "Not Available", "No director", ""}
-    director_series = director_series[~director_series.isin(exclude)]
 
     # Top 20 directores más frecuentes
-    top_directors = director_series.value_counts().nlargest(20).reset_index()
+    director_summary = get_aggregates(filters=filtros)["director"]
+    top_directors = director_summary.value_counts(exclude=exclude).nlargest(20).reset_index()
     top_directors.columns = ["Director", "Apariciones"]
 
     # Gráfico de barras horizontales
@@ -574,49 +528,18 @@ def get_bar_chart_top_directors():
     )
     fig.update_coloraxes(showscale=False)
 
-    return fig
+    return _mark_approximate(fig, director_summary, exclude=exclude)
 
 # Gráfico 14: Muestra la relación jerárquica entre los directores más frecuentes, los géneros que más trabajan y sus actores más habituales
-def get_sunburst_director_genre_actor():
-    df = get_clean_data()
-
-    # Eliminamos registros con datos faltantes en las columnas clave
-    df = df.dropna(subset=["director", "cast", "listed_in"])
-
-    # Convertimos las cadenas separadas por comas a listas
-    df["director"] = df["director"].str.split(", ")
-    df["cast"] = df["cast"].str.split(", ")
-    df["listed_in"] = df["listed_in"].str.split(", ")
-
-    # Expandimos para tener un registro por combinación de director, género y actor
-    df = df.explode("director").explode("listed_in").explode("cast")
-
-    # Filtramos valores no informativos
-    exclude = {"unknown", "Unknown", "Not Available", "No cast", ""}
-    df = df[~df["director"].isin(exclude)]
-    df = df[~df["cast"].isin(exclude)]
-
-    # Nos quedamos con los 5 directores más frecuentes
-    top_directors = df["director"].value_counts().nlargest(5).index
-    df = df[df["director"].isin(top_directors)]
-
-    # Agrupamos por director, género y actor contando ocurrencias
-    grouped = df.groupby(["director", "listed_in", "cast"]).size().reset_index(name="count")
-
-    # Filtrado jerárquico: para cada director, mostramos solo sus 3 géneros más trabajados y, por cada uno, sus 2 actores más frecuentes
-    filtered_data = []
-    for director, df_dir in grouped.groupby("director"):
-        # Seleccionamos los 3 géneros más frecuentes para ese director
-        top_genres = df_dir.groupby("listed_in")["count"].sum().nlargest(3).index
-        df_dir = df_dir[df_dir["listed_in"].isin(top_genres)]
-
-        for genre, df_genre in df_dir.groupby("listed_in"):
-            # Seleccionamos los 2 actores más frecuentes dentro de ese género para ese director
-            top_actors = df_genre.nlargest(2, "count")
-            filtered_data.append(top_actors)
+@cached_figure
+def get_sunburst_director_genre_actor(filtros=None):
+    sunburst = get_aggregates(filters=filtros)["sunburst"]
 
-    # Concatenamos todos los registros filtrados
-    df_final = pd.concat(filtered_data)
+    # Filtrado jerárquico: los 5 directores más frecuentes (cada director cuenta una vez por combinación
+    # género×actor de sus títulos, sin valores no informativos); para cada uno, sus 3 géneros más trabajados
+    # y, por cada uno, sus 2 actores más frecuentes (recuento de cada combinación director × género × actor)
+    top = [5, 3, 2]
+    df_final = sunburst.top_paths(top)
 
     # Creamos el gráfico Sunburst
     fig = px.sunburst(
@@ -644,4 +567,4 @@ def get_sunburst_director_genre_actor():
     # Ocultamos la barra lateral de color
     fig.update_coloraxes(showscale=False)
 
-    return fig
\ No newline at end of file
+    return _mark_approximate(fig, sunburst, k=top)
\ No newline at end of file
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+
+from pages.sections.data_loader import INCREMENTAL_UPDATES, DateDimension, get_dataset, get_date_dimension, NO_DATE
+from pages.sections.bridges import BridgeTable, get_bridge, merge_sorted
+
+# Filtros globales de la página de análisis (se aplican a todos los gráficos y tablas):
+# - por valor de una columna categórica (el título tiene uno de los valores elegidos),
+# - por entidad de una columna multivaluada (el título tiene alguna, o todas, de las entidades elegidas),
+# - por rango (año de estreno y fecha de subida, ambos extremos incluidos).
+CATEGORICAL_FILTERS = ["type", "rating"]
+ENTITY_FILTERS = ["country", "listed_in"]
+RANGE_FILTERS = ["release_year", "date_added"]
+
+# Clave con las columnas multivaluadas cuyas entidades elegidas deben estar todas en el título (AND);
+# en el resto basta con una de ellas (OR)
+MATCH_ALL = "match_all"
+
+
+def normalize_filters(raw):
+    """
+    Convierte los filtros elegidos (diccionario columna -> valores, o -> [mínimo, máximo] en los rangos)
+    en una tupla ordenada e inmutable que sirve como clave de caché y como argumento de las figuras.
+    Se descartan los filtros vacíos; devuelve None si no queda ninguno (catálogo completo).
+    """
+    if not raw:
+        return None
+    raw = dict(raw)
+
+    items = []
+    for col in CATEGORICAL_FILTERS + ENTITY_FILTERS:
+        values = raw.get(col)
+        if values:
+            items.append((col, tuple(sorted(set(values)))))
+    for col in RANGE_FILTERS:
+        bounds = raw.get(col)
+        if bounds and any(bound is not None for bound in bounds):
+            lo, hi = bounds
+            if col == "date_added":
+                lo, hi = (None if bound is None else str(bound)[:10] for bound in (lo, hi))
+            items.append((col, (lo, hi)))
+
+    # AND sólo tiene sentido en las columnas con entidades elegidas
+    chosen = {col for col, _ in items}
+    match_all = tuple(sorted(col for col in set(raw.get(MATCH_ALL) or ()) if col in ENTITY_FILTERS and col in chosen))
+    if match_all:
+        items.append((MATCH_ALL, match_all))
+
+    return tuple(sorted(items)) or None
+
+
+def with_date_range(filters, date_range):
+    """
+    Filtros normalizados con el rango de fechas de subida 'date_range' ((desde, hasta) en ISO, None =
+    sin límite) añadido; si ya había un filtro de fecha de subida se usa la intersección de ambos.
+    """
+    if not date_range:
+        return filters
+    selected = dict(filters or ())
+    lo, hi = date_range
+    if "date_added" in selected:
+        lo = max((bound for bound in (lo, selected["date_added"][0]) if bound is not None), default=None)
+        hi = min((bound for bound in (hi, selected["date_added"][1]) if bound is not None), default=None)
+    selected["date_added"] = (lo, hi)
+    return normalize_filters(selected)
+
+
+def _bitsets(value_ids, row_ids, n_values, n_rows):
+    """
+    Un bitset por valor (n_rows bits empaquetados con np.packbits, una fila de bytes por valor):
+    el bit i del valor v está a 1 si hay algún par (v, i) en (value_ids, row_ids).
+    """
+    bits = np.zeros((n_values, (n_rows + 7) // 8), dtype=np.uint8)
+    # Un solo recorrido de los pares: cada par enciende su bit (byte row >> 3, bit más significativo
+    # primero como np.packbits) sin recorrer el catálogo por cada valor
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    np.bitwise_or.at(bits, (value_ids, row_ids >> 3), (0x80 >> (row_ids & 7)).astype(np.uint8))
+    return bits
+
+
+class FilterIndex:
+    """
+    Índices precalculados para filtrar el catálogo sin recorrer sus columnas en cada cambio de filtro.
+
+    - values[col]: valores (o entidades) de cada columna filtrable, ordenados.
+    - bits[col]: bitset de cada valor (ver _bitsets); para las columnas multivaluadas, el bit de un
+      título está a 1 si la entidad aparece en su lista (a partir de la tabla puente).
+    - release_year, date_added: año de estreno y fecha de subida (días desde 1970) de cada fila.
+
+    La selección (mask) combina bitsets con OR dentro de cada filtro (o AND en las columnas de
+    MATCH_ALL) y con AND entre filtros, todo sobre bytes empaquetados (8 filas por operación).
+    Con un millón de títulos cada bitset ocupa 125 KB.
+    """
+
+    def __init__(self, n_rows, values, bits, release_year, date_added):
+        self.n_rows = n_rows
+        self.values = values
+        self.bits = bits
+        self.release_year = release_year
+        self.date_added = date_added
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        bridges = {col: get_bridge(col, dataset) for col in ENTITY_FILTERS}
+        return cls.from_frame(dataset.frame, bridges, get_date_dimension(dataset))
+
+    @classmethod
+    def from_frame(cls, frame, bridges, dates):
+        # Índice de un DataFrame limpio con sus tablas puente de ENTITY_FILTERS y su DateDimension
+        n_rows = len(frame)
+        values, bits = {}, {}
+
+        for col in CATEGORICAL_FILTERS:
+            codes, uniques = pd.factorize(frame[col].astype(object), sort=True)
+            rows = np.flatnonzero(codes >= 0)
+            values[col] = np.asarray(uniques, dtype=object)
+            bits[col] = _bitsets(codes[rows], rows, len(uniques), n_rows)
+
+        for col in ENTITY_FILTERS:
+            bridge = bridges[col]
+            values[col] = bridge.entities
+            bits[col] = _bitsets(bridge.entity_ids, bridge.title_ids, len(bridge.entities), n_rows)
+
+        return cls(n_rows, values, bits, frame["release_year"].to_numpy(dtype=np.int64), dates.day)
+
+    def concat(self, other):
+        """
+        Índice de las filas de este índice seguidas de las de 'other' (p. ej. filas añadidas al
+        catálogo). Los bitsets se amplían copiando los bytes ya calculados y encendiendo los bits de
+        las filas nuevas; los valores nuevos se intercalan en su posición ordenada.
+        """
+        n_rows = self.n_rows + other.n_rows
+        values, bits = {}, {}
+        for col in self.values:
+            values[col], shifted, other_positions = merge_sorted(self.values[col], other.values[col])
+            bits[col] = np.zeros((len(values[col]), (n_rows + 7) // 8), dtype=np.uint8)
+            bits[col][shifted, :self.bits[col].shape[1]] = self.bits[col]
+
+            # Bits de 'other' desplazados self.n_rows filas (los bits sobrantes del último byte están a 0)
+            value_ids, rows = np.nonzero(np.unpackbits(other.bits[col], axis=1, count=other.n_rows))
+            rows = rows.astype(np.int64) + self.n_rows
+            np.bitwise_or.at(bits[col], (other_positions[value_ids], rows >> 3), (0x80 >> (rows & 7)).astype(np.uint8))
+
+        return FilterIndex(
+            n_rows, values, bits,
+            np.concatenate([self.release_year, other.release_year]), np.concatenate([self.date_added, other.date_added]),
+        )
+
+    def _value_bits(self, col, chosen, match_all):
+        # Bitset de un filtro por valores: OR (alguno) o AND (todos) de los bitsets de los valores elegidos
+        present = np.isin(np.asarray(chosen, dtype=object), self.values[col])
+        rows = np.searchsorted(self.values[col], np.asarray(chosen, dtype=object)[present])
+        if not len(rows) or (match_all and not present.all()):
+            return np.zeros(self.bits[col].shape[1], dtype=np.uint8)
+        reduce = np.bitwise_and if match_all else np.bitwise_or
+        return reduce.reduce(self.bits[col][rows], axis=0)
+
+    def _range_mask(self, col, bounds):
+        lo, hi = bounds
+        if col == "date_added":
+            column = self.date_added
+            lo, hi = (None if bound is None else np.datetime64(bound, "D").astype(np.int64) for bound in (lo, hi))
+            mask = column != NO_DATE
+        else:
+            column = self.release_year
+            mask = np.ones(self.n_rows, dtype=bool)
+        if lo is not None:
+            mask &= column >= lo
+        if hi is not None:
+            mask &= column <= hi
+        return mask
+
+    def mask(self, filters):
+        """
+        Máscara booleana (una posición por fila de dataset.frame) de los títulos que cumplen
+        todos los filtros ('filters' normalizados con normalize_filters; None = todos).
+        """
+        if not filters:
+            return np.ones(self.n_rows, dtype=bool)
+
+        filters = dict(filters)
+        match_all = set(filters.get(MATCH_ALL, ()))
+        selected = np.full((self.n_rows + 7) // 8, 0xFF, dtype=np.uint8)
+        for col in CATEGORICAL_FILTERS + ENTITY_FILTERS:
+            if col in filters:
+                selected &= self._value_bits(col, filters[col], col in match_all)
+        for col in RANGE_FILTERS:
+            if col in filters:
+                selected &= np.packbits(self._range_mask(col, filters[col]))
+        return np.unpackbits(selected, count=self.n_rows).astype(bool)
+
+    def count(self, filters):
+        # Número de títulos que cumplen los filtros
+        return int(self.mask(filters).sum()) if filters else self.n_rows
+
+
+def get_filter_index(dataset=None):
+    # Índice de filtros del dataset indicado (por defecto, el compartido), uno por versión del dataset
+    dataset = dataset or get_dataset()
+    return dataset.cached("filter_index", lambda: FilterIndex.from_dataset(dataset))
+
+
+# Al añadir filas a un dataset su índice de filtros se amplía con el de las filas nuevas
+INCREMENTAL_UPDATES["filter_index"] = lambda index, delta: index.concat(FilterIndex.from_frame(
+    delta, {col: BridgeTable.from_series(delta[col]) for col in ENTITY_FILTERS}, DateDimension.from_series(delta["date_added"]),
+))
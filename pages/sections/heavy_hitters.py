@@ -0,0 +1,141 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Error relativo de los recuentos de entidades (actores, directores, países) de los rankings:
+# el resumen guarda como mucho ceil(1 / ε) entidades y el error de cada recuento es del orden de ε·N
+# (N = número de apariciones procesadas). Con NETFLIX_TOPK_EPSILON=0 los recuentos son exactos
+TOPK_EPSILON = float(os.environ.get("NETFLIX_TOPK_EPSILON", "0.001"))
+
+
+def default_capacity(epsilon=None):
+    # Número máximo de entidades del resumen para el error indicado (None = exacto, sin límite)
+    epsilon = TOPK_EPSILON if epsilon is None else epsilon
+    return math.ceil(1 / epsilon) if epsilon > 0 else None
+
+
+class SpaceSavingCounts:
+    """
+    Recuento aproximado de las entidades más frecuentes con memoria acotada (resumen Space-Saving
+    combinable), con la misma interfaz que MergeableCounts (merge, value_counts, sorted).
+
+    - counts: cota superior del número de apariciones de cada entidad guardada.
+    - errors: máximo que puede sobrar en cada recuento (el valor real está en [count - error, count]).
+    - first_seen: primera aparición observada de cada entidad (orden de los empates).
+    - floor: cota superior de las apariciones de cualquier entidad que no está en el resumen.
+
+    Cada bloque se resume con sus recuentos exactos y se recorta a 'capacity' entidades; al combinar
+    dos resúmenes, a una entidad que falta en uno se le suma el floor de ese resumen (como valor y como
+    error). Mientras el número de entidades distintas no supera la capacidad no se descarta nada y el
+    resultado es exacto (floor == 0), así que con catálogos pequeños coincide con el recuento completo.
+    """
+
+    def __init__(self, counts, errors, first_seen, floor=0, capacity=None):
+        self.counts = counts
+        self.errors = errors
+        self.first_seen = first_seen
+        self.floor = floor
+        self.capacity = capacity
+
+    @classmethod
+    def from_counts(cls, exact, capacity=None):
+        # Resumen de un bloque a partir de sus recuentos exactos (MergeableCounts con first_seen)
+        errors = pd.Series(0, index=exact.counts.index, dtype=np.int64, name="error")
+        return cls(exact.counts.astype(np.int64), errors, exact.first_seen, 0, capacity)._truncated()
+
+    @property
+    def exact(self):
+        # True si nunca se ha descartado ninguna entidad (todos los recuentos son exactos)
+        return self.floor == 0
+
+    @property
+    def max_error(self):
+        # Error máximo de cualquier recuento, guardado o no
+        return int(max(self.floor, self.errors.max() if len(self.errors) else 0))
+
+    def _ranked(self):
+        # Entidades ordenadas de mayor a menor recuento, con los empates por orden de aparición
+        frame = pd.DataFrame({"count": self.counts, "error": self.errors, "first_seen": self.first_seen})
+        return frame.sort_values("first_seen", kind="stable").sort_values("count", ascending=False, kind="stable")
+
+    def _truncated(self):
+        if self.capacity is None or len(self.counts) <= self.capacity:
+            return self
+
+        # Mismo orden que _ranked (recuento descendente, empates por first_seen y por posición)
+        order = np.lexsort((self.first_seen.to_numpy(), -self.counts.to_numpy()))
+        kept, dropped = order[:self.capacity], order[self.capacity:]
+        floor = max(self.floor, int(self.counts.iloc[dropped].max()))
+        return self._subset(kept, floor)
+
+    def _subset(self, positions, floor):
+        # Resumen con sólo las entradas de 'positions'. Un MultiIndex recortado conserva todos los
+        # valores de sus niveles, así que se eliminan los que ya no se usan para que no crezcan al combinar
+        index = self.counts.index[positions]
+        if isinstance(index, pd.MultiIndex):
+            index = index.remove_unused_levels()
+        return SpaceSavingCounts(
+            pd.Series(self.counts.to_numpy()[positions], index=index, name="count"),
+            pd.Series(self.errors.to_numpy()[positions], index=index, name="error"),
+            pd.Series(self.first_seen.to_numpy()[positions], index=index, name="first_seen"),
+            floor, self.capacity,
+        )
+
+    def merge(self, other):
+        # Suma de recuentos clave a clave; las entidades que faltan en un resumen reciben su floor.
+        # Las entidades de 'other' se buscan en el índice de este resumen (sin alinear los dos índices),
+        # así que combinar un resumen grande con el de un lote pequeño cuesta lo que el lote
+        position = self.counts.index.get_indexer(other.counts.index)
+        both, new = position >= 0, position < 0
+
+        counts = self.counts.to_numpy(dtype=np.int64) + other.floor
+        errors = self.errors.to_numpy(dtype=np.int64) + other.floor
+        first_seen = self.first_seen.to_numpy(dtype=np.int64).copy()
+        other_counts = other.counts.to_numpy(dtype=np.int64)
+        other_errors = other.errors.to_numpy(dtype=np.int64)
+        other_first = other.first_seen.to_numpy(dtype=np.int64)
+
+        counts[position[both]] += other_counts[both] - other.floor
+        errors[position[both]] += other_errors[both] - other.floor
+        first_seen[position[both]] = np.minimum(first_seen[position[both]], other_first[both])
+
+        index = self.counts.index.append(other.counts.index[new])
+        capacity = self.capacity if other.capacity is None else other.capacity if self.capacity is None else min(self.capacity, other.capacity)
+        return SpaceSavingCounts(
+            pd.Series(np.concatenate([counts, other_counts[new] + self.floor]), index=index, name="count"),
+            pd.Series(np.concatenate([errors, other_errors[new] + self.floor]), index=index, name="error"),
+            pd.Series(np.concatenate([first_seen, other_first[new]]), index=index, name="first_seen"),
+            self.floor + other.floor, capacity,
+        )._truncated()
+
+    def sorted(self):
+        # Recuentos ordenados por clave (como groupby(...).size())
+        return self.counts.sort_index()
+
+    def value_counts(self, exclude=None, mapping=None):
+        """
+        Recuentos ordenados de mayor a menor, con los empates por orden de primera aparición (misma
+        interfaz que MergeableCounts.value_counts). El orden es estable: no depende de qué entidades
+        se hayan descartado, así que un top garantizado (top_is_exact) sale igual que con el recuento
+        exacto, también en los empates.
+        """
+        frame = pd.DataFrame({"count": self.counts, "first_seen": self.first_seen})
+        if exclude:
+            frame = frame[~frame.index.isin(list(exclude))]
+        if mapping is not None:
+            frame = frame.groupby(frame.index.map(mapping)).agg({"count": "sum", "first_seen": "min"})
+
+        ordered = frame.sort_values("first_seen", kind="stable")["count"].rename("count")
+        return ordered.sort_values(ascending=False, kind="stable")
+
+    def top_is_exact(self, k, exclude=None):
+        """
+        True si las k entidades más frecuentes (sin las excluidas) están garantizadas: sus recuentos
+        son exactos y ninguna entidad descartada puede superar al k-ésimo.
+        """
+        top = self.value_counts(exclude).iloc[:k]
+        if not len(top):
+            return self.exact
+        return bool(self.errors[top.index].max() == 0 and (self.exact or top.iloc[-1] > self.floor))
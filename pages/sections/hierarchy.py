@@ -0,0 +1,221 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from pages.sections.heavy_hitters import SpaceSavingCounts, default_capacity
+
+# Número máximo de caminos completos que se generan a la vez al contar los caminos de un bloque de títulos.
+# Limita la memoria temporal del recuento independientemente del tamaño del catálogo
+PATH_BLOCK_PATHS = 1 << 20
+
+# Número máximo de prefijos (director, director → género, camino completo) que guarda cada nivel del
+# resumen del sunburst. Con el catálogo real ningún nivel llega al límite y el resultado es exacto;
+# con NETFLIX_TOPK_EPSILON=0 tampoco se recorta
+PATH_CAPACITY = int(os.environ.get("NETFLIX_SUNBURST_PATHS", "200000"))
+
+
+def default_path_capacity():
+    # Capacidad de los niveles de caminos (None = exacto, como default_capacity)
+    return None if default_capacity() is None or PATH_CAPACITY <= 0 else PATH_CAPACITY
+
+
+def _path_counts(levels):
+    """
+    Recuento de los caminos completos de una IncidenceMatrix por nivel (todas sobre los mismos títulos),
+    como Series con un MultiIndex (un nivel por columna). Los caminos de cada título se generan con NumPy
+    por bloques de títulos de unos PATH_BLOCK_PATHS caminos, y cada bloque se reduce a sus caminos
+    distintos antes de pasar al siguiente.
+    """
+    sizes = [max(level.shape[1], 1) for level in levels]
+    n_titles = levels[0].shape[0]
+    paths_per_title = np.ones(n_titles, dtype=np.int64)
+    for level in levels:
+        paths_per_title *= level.degrees
+
+    # Bloques consecutivos de títulos con un número acotado de caminos (un título nunca se parte)
+    cumulative = np.cumsum(paths_per_title)
+    total = int(cumulative[-1]) if n_titles else 0
+    boundaries = np.searchsorted(cumulative, np.arange(PATH_BLOCK_PATHS, total, PATH_BLOCK_PATHS), side="right")
+    boundaries = np.unique(np.concatenate([[0], boundaries, [n_titles]]))
+
+    partial_keys, partial_counts = [np.array([], dtype=np.int64)], [np.array([], dtype=np.int64)]
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        row_titles = np.arange(start, end)
+        row_titles = row_titles[paths_per_title[row_titles] > 0]
+        row_keys = np.zeros(len(row_titles), dtype=np.int64)
+
+        # Cada fila (título, prefijo) se expande con las entidades del siguiente nivel en su título
+        for level, size in zip(levels, sizes):
+            deg = level.degrees[row_titles]
+            within = np.arange(deg.sum()) - np.repeat(np.cumsum(deg) - deg, deg)
+            entities = level.indices[np.repeat(level.indptr[row_titles], deg) + within]
+            row_titles = np.repeat(row_titles, deg)
+            row_keys = np.repeat(row_keys, deg) * size + entities
+
+        keys, block_counts = np.unique(row_keys, return_counts=True)
+        partial_keys.append(keys)
+        partial_counts.append(block_counts)
+
+    # Una única reducción final de los recuentos parciales de todos los bloques
+    keys, inverse = np.unique(np.concatenate(partial_keys), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(partial_counts), minlength=len(keys)).astype(np.int64)
+
+    # Claves (enteros en base mixta) -> identificadores de entidad de cada nivel, del último al primero
+    ids = []
+    for size in sizes[::-1]:
+        ids.append(keys % size)
+        keys = keys // size
+    index = pd.MultiIndex.from_arrays(
+        [level.entities[level_ids] for level, level_ids in zip(levels, ids[::-1])],
+        names=[level.name for level in levels],
+    )
+    return pd.Series(counts, index=index, name="count")
+
+
+class HierarchicalTopK:
+    """
+    Caminos más frecuentes de una jerarquía de columnas multivaluadas (p. ej. director → género → actor)
+    con memoria acotada y combinable por bloques del CSV o lotes de filas nuevas (merge).
+
+    - levels: un resumen SpaceSavingCounts por profundidad. levels[0] cuenta los valores del primer
+      nivel (con su primera aparición, para desempatar como value_counts); levels[d] cuenta los prefijos
+      de d + 1 columnas (índice MultiIndex), y el último los caminos completos.
+
+    Un camino (a, b, c) aparece en un título tantas veces como combinaciones de sus listas lo forman,
+    igual que al explotar las tres columnas y agrupar; el recuento de un prefijo es la suma de los de
+    sus caminos. Las listas de cada título sólo se usan dentro de from_levels: lo que se guarda y se
+    combina son los resúmenes, cada uno con como mucho 'capacity' (primer nivel) o 'path_capacity'
+    (prefijos) entradas, así que su tamaño no depende del número de títulos. Los prefijos de un valor
+    del primer nivel que sale del resumen se descartan con él: si vuelve a entrar su recuento tiene
+    error (errors > 0) y top_is_exact() lo detecta.
+    """
+
+    def __init__(self, levels):
+        self.levels = levels
+
+    @property
+    def names(self):
+        return list(self.levels[-1].counts.index.names)
+
+    @classmethod
+    def from_levels(cls, levels, order, capacity=None, path_capacity=None):
+        """
+        Resumen a partir de una IncidenceMatrix por nivel, todas sobre los mismos títulos (misma fila =
+        mismo título). 'order' es la primera aparición de cada entrada del primer nivel; 'capacity' y
+        'path_capacity' son el número máximo de entradas del primer nivel y de cada nivel de prefijos
+        (None = todas).
+        """
+        head = levels[0]
+
+        # Peso de cada entrada del primer nivel: producto de los grados de los niveles siguientes en su título
+        weights = np.ones(head.shape[0], dtype=np.int64)
+        for level in levels[1:]:
+            weights *= level.degrees
+        entry_weights = weights[head.row_ids()]
+        valid = entry_weights > 0
+
+        # Recuento sólo de los valores presentes, recortado a la capacidad del resumen
+        ids, inverse = np.unique(head.indices[valid], return_inverse=True)
+        first_seen = np.full(len(ids), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(first_seen, inverse, order[valid])
+        index = pd.Index(head.entities[ids], name=head.name)
+        first = SpaceSavingCounts(
+            pd.Series(np.bincount(inverse, weights=entry_weights[valid], minlength=len(ids)).astype(np.int64), index=index, name="count"),
+            pd.Series(0, index=index, dtype=np.int64, name="error"),
+            pd.Series(first_seen, index=index, name="first_seen"),
+            0, capacity,
+        )._truncated()
+
+        # Caminos completos (exactos dentro del bloque) sólo de los valores del primer nivel que quedan
+        # en el resumen; cada prefijo suma los caminos que empiezan por él
+        kept = np.isin(head.indices, np.searchsorted(head.entities, first.counts.index.to_numpy()))
+        paths = _path_counts([head.select_entries(kept)] + list(levels[1:]))
+        prefixes = [paths.groupby(level=list(range(depth + 1))).sum() for depth in range(1, len(levels) - 1)]
+
+        # Al recortar un nivel de prefijos, entre recuentos iguales se conservan antes los de los valores
+        # del primer nivel con más peso (su posición en el ranking hace de first_seen)
+        rank = pd.Series(np.arange(len(first.counts), dtype=np.int64), index=first._ranked().index)
+        return cls([first] + [_path_summary(counts, rank, path_capacity) for counts in prefixes + [paths]])
+
+    def merge(self, other):
+        # Suma nivel a nivel; se descartan los prefijos de los valores que no caben en el primer nivel
+        first = self.levels[0].merge(other.levels[0])
+        levels = [first]
+        for mine, theirs in zip(self.levels[1:], other.levels[1:]):
+            merged = mine.merge(theirs)
+            keep = merged.counts.index.get_level_values(0).isin(first.counts.index)
+            levels.append(merged if keep.all() else merged._subset(np.flatnonzero(keep), merged.floor))
+        return HierarchicalTopK(levels)
+
+    def _select(self, top, first=None):
+        # Entradas elegidas en cada nivel (lista de Series con el recuento de cada prefijo elegido)
+        if first is None:
+            first = self.levels[0].value_counts().nlargest(top[0]).index
+        chosen = [self.levels[0].counts[list(first)]]
+
+        for depth, k in enumerate(top[1:], start=1):
+            counts = self.levels[depth].counts
+            prefix = counts.index.droplevel(depth) if depth > 1 else counts.index.get_level_values(0)
+            counts = counts[prefix.isin(chosen[-1].index)]
+
+            # Top k de cada prefijo: mayor recuento y, en empate, orden alfabético
+            frame = counts.reset_index()
+            names = list(frame.columns[:-1])
+            ranked = frame.sort_values(
+                names[:-1] + ["count", names[-1]], ascending=[True] * depth + [False, True], kind="stable"
+            )
+            chosen.append(ranked.groupby(names[:-1], sort=False).head(k).set_index(names)["count"])
+        return chosen
+
+    def top_is_exact(self, top, exclude=None):
+        """
+        True si los caminos de top_paths(top) están garantizados: en cada nivel, los valores elegidos
+        tienen recuento exacto y, si el nivel descartó entradas, cada prefijo tiene sus top[d] hijos y
+        el menor supera al floor (ningún hijo descartado podría entrar).
+        """
+        if isinstance(top, int):
+            top = [top]
+        if not self.levels[0].top_is_exact(top[0], exclude):
+            return False
+
+        chosen = self._select(top)
+        for depth, (level, k) in enumerate(zip(self.levels[1:], top[1:]), start=1):
+            counts = chosen[depth]
+            if len(counts) and level.errors[counts.index].max() > 0:
+                return False
+            if not level.exact:
+                children = counts.groupby(level=list(range(depth)))
+                if (children.size() < k).any() or (children.min() <= level.floor).any():
+                    return False
+        return True
+
+    def top_paths(self, top, first=None):
+        """
+        Devuelve un DataFrame con los caminos completos seleccionados nivel a nivel y su recuento:
+        los top[0] valores del primer nivel (por defecto, los de mayor peso con los empates por orden
+        de aparición, como value_counts); para cada uno, sus top[1] valores del segundo nivel, etc.
+        En los niveles siguientes los empates se deciden por orden alfabético. 'first' permite fijar
+        los valores del primer nivel.
+
+        Las filas se ordenan por los niveles (alfabéticamente) y, dentro del último, de mayor a menor
+        recuento.
+        """
+        names = self.names
+        paths = self._select(top, first)[-1].reset_index()
+        paths = paths[names + ["count"]].sort_values(
+            names[:-1] + ["count", names[-1]], ascending=[True] * (len(names) - 1) + [False, True], kind="stable"
+        )
+        return paths.reset_index(drop=True)
+
+
+def _path_summary(counts, rank, capacity):
+    # Resumen SpaceSavingCounts de los recuentos exactos de un nivel de prefijos; first_seen es la
+    # posición en el ranking del primer nivel del valor con el que empieza cada prefijo
+    first_seen = rank.reindex(counts.index.get_level_values(0)).to_numpy()
+    return SpaceSavingCounts(
+        counts.astype(np.int64).rename("count"),
+        pd.Series(0, index=counts.index, dtype=np.int64, name="error"),
+        pd.Series(first_seen, index=counts.index, name="first_seen"),
+        0, capacity,
+    )._truncated()
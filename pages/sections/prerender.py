@@ -0,0 +1,144 @@
+"""
+Pre-renderizado de las figuras y tablas de la aplicación en tiempo de despliegue.
+
+    python -m pages.sections.prerender
+
+carga el catálogo, construye todas las figuras de figures.py (y cada periodo del gráfico de barras)
+y las dos pestañas del análisis, y las guarda ya serializadas en NETFLIX_PRERENDER_DIR
+(por defecto data/.cache/prerender/) junto con la huella del CSV y del código con que se generaron.
+
+Al arrancar, app.py llama a load_prerendered(): si los artefactos siguen siendo válidos se cargan
+en la caché de figuras y las pestañas se sirven sin leer el CSV ni calcular ningún agregado.
+Si el CSV o el código han cambiado se ignoran y todo se calcula en vivo, como sin artefactos.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from pages.sections import figures, section_characteristics, section_graphics
+from pages.sections.aggregates import INGESTION_MODE, get_data_version
+from pages.sections.data_loader import CSV_PATH, KNOWN_FINGERPRINTS, get_data_fingerprint
+from pages.sections.figure_cache import FIGURE_CACHE, figure_key
+
+# Carpeta de los artefactos (se puede cambiar con NETFLIX_PRERENDER_DIR)
+PRERENDER_DIR = os.environ.get("NETFLIX_PRERENDER_DIR", os.path.join("data", ".cache", "prerender"))
+
+# Periodos del gráfico de barras que se eligen con los botones de la pestaña de análisis
+PERIODS = ["año", "mes", "día"]
+
+# Versión de los datos de los artefactos cargados al arrancar (None si no se cargaron)
+loaded_version = None
+
+
+def _artifact_paths():
+    return os.path.join(PRERENDER_DIR, "manifest.json"), os.path.join(PRERENDER_DIR, "figures.json")
+
+
+def _render_code_version():
+    # Hash del código de todas las páginas: cualquier cambio en cómo se construyen las figuras invalida los artefactos
+    pages_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(pages_dir)):
+        for name in sorted(files):
+            if name.endswith(".py"):
+                with open(os.path.join(root, name), "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _prerender_calls():
+    # Constructores (decorados con cached_figure) y argumentos de todo lo que se pre-renderiza
+    calls = [(section_characteristics.layout, ()), (section_graphics.layout, ())]
+    for name in sorted(dir(figures)):
+        builder = getattr(figures, name)
+        if name.startswith("get_") and hasattr(builder, "uncached") and name != "get_bar_plot_by_period":
+            calls.append((builder, ()))
+    calls += [(figures.get_bar_plot_by_period, (periodo,)) for periodo in PERIODS]
+    return calls
+
+
+def prerender():
+    """
+    Construye todas las figuras y tablas y escribe los artefactos (escritura atómica).
+    Devuelve el manifiesto generado.
+    """
+    entries = []
+    for builder, args in _prerender_calls():
+        key = figure_key(builder, args)
+        entries.append({"builder": key[0], "args": [list(item) for item in key[1]], "json": to_json_plotly(builder.uncached(*args))})
+
+    manifest = {
+        "data_version": get_data_version(),
+        "fingerprint": get_data_fingerprint(CSV_PATH),
+        "render_version": _render_code_version(),
+        "ingestion_mode": INGESTION_MODE,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "figures": len(entries),
+    }
+
+    os.makedirs(PRERENDER_DIR, exist_ok=True)
+    tmp_suffix = f".{os.getpid()}.tmp"
+    manifest_path, figures_path = _artifact_paths()
+    with open(figures_path + tmp_suffix, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+    with open(manifest_path + tmp_suffix, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(figures_path + tmp_suffix, figures_path)
+    os.replace(manifest_path + tmp_suffix, manifest_path)
+    return manifest
+
+
+def load_prerendered():
+    """
+    Carga los artefactos en la caché de figuras si siguen siendo válidos: mismo código de las páginas,
+    mismo modo de ingesta y mismos datos (huella del CSV por tamaño y fecha; si la fecha cambió se
+    compara el hash del contenido). Devuelve True si se cargaron y False si no existen o están obsoletos.
+    """
+    global loaded_version
+    manifest_path, figures_path = _artifact_paths()
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get("render_version") != _render_code_version() or manifest.get("ingestion_mode") != INGESTION_MODE:
+        return False
+
+    # La huella guardada permite obtener la versión de los datos sin leer el CSV (ver get_dataset_version)
+    if manifest["fingerprint"] not in KNOWN_FINGERPRINTS:
+        KNOWN_FINGERPRINTS.append(manifest["fingerprint"])
+    if get_data_version() != manifest["data_version"]:
+        return False
+
+    try:
+        with open(figures_path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    for entry in entries:
+        key = (entry["builder"], tuple(tuple(item) for item in entry["args"]), manifest["data_version"])
+        FIGURE_CACHE.put(key, entry["json"])
+    loaded_version = manifest["data_version"]
+    return True
+
+
+def main():
+    # Mismo modo de pandas que la aplicación (ver app.py)
+    pd.set_option("mode.copy_on_write", True)
+    t0 = time.perf_counter()
+    manifest = prerender()
+    print(
+        f"{manifest['figures']} figuras y tablas pre-renderizadas en {PRERENDER_DIR} "
+        f"(versión de los datos {manifest['data_version']}, {time.perf_counter() - t0:.1f} s)"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
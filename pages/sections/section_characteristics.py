@@ -2,36 +2,49 @@ import pandas as pd
 from dash import html
 import dash_bootstrap_components as dbc
 from pages.sections.data_loader import get_clean_data  # Importamos función de limpieza de datos
+from pages.sections.figure_cache import cached_figure  # Las tablas se guardan en la caché junto a las figuras
+from pages.sections.filters import get_filter_index  # Selección de los filtros globales
+from pages.sections.section_filters import sin_resultados
 
-def layout():
-    # Carga el dataset limpio
+@cached_figure
+def layout(filtros=None):
+    # Carga el dataset limpio (sólo los títulos seleccionados si hay filtros globales)
     df = get_clean_data()
+    if filtros:
+        df = df[get_filter_index().mask(filtros)]
+        if df.empty:
+            return sin_resultados()
 
     # Extrae tipos de dato por columna y los formatea para mostrarlos como texto
     df_types = df.dtypes.astype(str).reset_index().rename(columns={"index": "Variable", 0: "Tipo de dato"})
 
-    # Lista de descripciones personalizadas para cada variable del dataset
-    descriptions = [
-        "Identificador único del contenido",
-        "Tipo de contenido (Película o Serie)",
-        "Título del contenido",
-        "Director principal",
-        "Actores involucrados",
-        "País donde se produjo",
-        "Fecha en la que se añadió a Netflix",
-        "Año de estreno",
-        "Clasificación por edad",
-        "Duración original (texto)",
-        "Categoría o género",
-        "Descripción del contenido",
-        "Duración en minutos (*)",              # Variable añadida por el usuario
-        "Número de temporadas (*)"              # Variable añadida por el usuario
-    ]
+    # Descripciones personalizadas para cada variable del dataset (por nombre de columna,
+    # para que la tabla siga siendo correcta si alguna columna se omite, p. ej. 'description' en modo compacto)
+    descriptions = {
+        "show_id": "Identificador único del contenido",
+        "type": "Tipo de contenido (Película o Serie)",
+        "title": "Título del contenido",
+        "director": "Director principal",
+        "cast": "Actores involucrados",
+        "country": "País donde se produjo",
+        "date_added": "Fecha en la que se añadió a Netflix",
+        "release_year": "Año de estreno",
+        "rating": "Clasificación por edad",
+        "duration": "Duración original (texto)",
+        "listed_in": "Categoría o género",
+        "description": "Descripción del contenido",
+        "duration_minutes": "Duración en minutos (*)",              # Variable añadida por el usuario
+        "duration_seasons": "Número de temporadas (*)"              # Variable añadida por el usuario
+    }
+
+    # Sólo se listan las variables del dataset que tienen descripción
+    df_types = df_types[df_types["Variable"].isin(descriptions)]
 
     # Función auxiliar para contar valores nulos o no válidos
+    # (las columnas de texto pueden ser 'object' o 'category' en modo compacto)
     def contar_invalidos(serie):
-        if serie.dtype == object:
-            return serie.isna().sum() + serie.str.strip().isin(["", "Unknown", "unknown", "Not Available", "NA"]).sum()
+        if serie.dtype == object or isinstance(serie.dtype, pd.CategoricalDtype):
+            return serie.isna().sum() + serie.astype(object).str.strip().isin(["", "Unknown", "unknown", "Not Available", "NA"]).sum()
         else:
             return serie.isna().sum()
 
@@ -48,6 +61,10 @@ def layout():
     # Calcula medidas estadísticas: media, desviación típica, mínimo y máximo
     stats = df[numeric_vars].describe().T
 
+    # Formato de una medida (una selección de los filtros sin películas, por ejemplo, no tiene duración en minutos)
+    def formato(valor, especificacion):
+        return "—" if pd.isna(valor) else format(valor, especificacion)
+
     # Composición del layout de la pestaña
     layout = html.Div([
         dbc.Row([
@@ -81,7 +98,7 @@ def layout():
                                 html.Td(invalid_count, className="text-light text-left"),
                             ], className="table-secondary" if i % 2 == 0 else "table-dark")
                             for i, (variable, description, dtype, invalid_count) in enumerate(
-                                zip(df_types["Variable"], descriptions, df_types["Tipo de dato"], df_types["Nulos/Inválidos"])
+                                zip(df_types["Variable"], df_types["Variable"].map(descriptions), df_types["Tipo de dato"], df_types["Nulos/Inválidos"])
                             )
                         ])
                     ],
@@ -124,10 +141,10 @@ def layout():
                         html.Tbody([
                             html.Tr([
                                 html.Td(var, className="text-light text-left"),
-                                html.Td(f"{stats.loc[var, 'mean']:.2f}", className="text-light text-center"),
-                                html.Td(f"{stats.loc[var, 'std']:.2f}", className="text-light text-center"),
-                                html.Td(int(stats.loc[var, 'max']), className="text-light text-center"),
-                                html.Td(int(stats.loc[var, 'min']), className="text-light text-center")
+                                html.Td(formato(stats.loc[var, 'mean'], ".2f"), className="text-light text-center"),
+                                html.Td(formato(stats.loc[var, 'std'], ".2f"), className="text-light text-center"),
+                                html.Td(formato(stats.loc[var, 'max'], ".0f"), className="text-light text-center"),
+                                html.Td(formato(stats.loc[var, 'min'], ".0f"), className="text-light text-center")
                             ], className="table-secondary" if i % 2 == 0 else "table-dark")
                             for i, var in enumerate(numeric_vars)
                         ])
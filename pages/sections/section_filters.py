@@ -0,0 +1,166 @@
+# Panel de filtros globales de la página de análisis: tipo, clasificación, año de estreno, fecha de subida,
+# país y género. La selección se guarda en el Store "filtros-globales" y se aplica a todos los gráficos
+# y tablas de las dos pestañas (ver filters.py)
+from dash import dcc, html, callback, clientside_callback, ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
+import dash_bootstrap_components as dbc
+
+from pages.sections.aggregates import INGESTION_MODE
+from pages.sections.data_loader import TYPE_LABELS_ES, NO_DATE
+from pages.sections.filters import get_filter_index, normalize_filters
+
+
+def sin_resultados():
+    # Contenido de una pestaña cuando ningún título cumple los filtros
+    return dbc.Alert(
+        "Ningún título cumple los filtros seleccionados.",
+        color="secondary", className="text-center mx-5 my-4"
+    )
+
+
+def layout():
+    # Con NETFLIX_INGESTION=chunked el catálogo no está en memoria y los filtros no están disponibles
+    if INGESTION_MODE == "chunked":
+        return html.Div(dcc.Store(id="filtros-globales", data=None))
+
+    return html.Div([
+        # Selección actual (None = catálogo completo); la rellena el navegador a partir de los controles
+        dcc.Store(id="filtros-globales", data=None),
+
+        html.Div([
+            dbc.Button("Filtros", id="btn-filtros", color="danger", outline=True),
+            html.Span(id="resumen-filtros", className="text-body-secondary ms-3"),
+        ], className="d-flex align-items-center mb-2"),
+
+        # Las opciones de los controles se cargan la primera vez que se abre el panel,
+        # así que la página se muestra sin leer el catálogo
+        dbc.Collapse(
+            dbc.Card(dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        html.Label("Tipo", className="text-body-secondary"),
+                        dcc.Checklist(
+                            id="filtro-tipo", options=[], value=[],
+                            labelStyle={"display": "inline-block", "margin": "0 15px 0 0"},
+                            inputStyle={"margin-right": "5px"}
+                        ),
+                    ], width=3),
+                    dbc.Col([
+                        html.Label("Clasificación", className="text-body-secondary"),
+                        dcc.Dropdown(id="filtro-rating", options=[], value=[], multi=True, placeholder="Todas"),
+                    ], width=3),
+                    dbc.Col([
+                        html.Label("País", className="text-body-secondary"),
+                        dcc.Dropdown(id="filtro-pais", options=[], value=[], multi=True, placeholder="Todos"),
+                    ], width=3),
+                    dbc.Col([
+                        html.Label("Género", className="text-body-secondary"),
+                        dcc.Dropdown(id="filtro-genero", options=[], value=[], multi=True, placeholder="Todos"),
+                    ], width=3),
+                ], className="mb-3"),
+                dbc.Row([
+                    dbc.Col([
+                        html.Label("Año de estreno", className="text-body-secondary"),
+                        dcc.RangeSlider(id="filtro-estreno", min=0, max=1, step=1, value=None, marks=None,
+                                        tooltip={"placement": "bottom"}),
+                    ], width=6),
+                    dbc.Col([
+                        html.Label("Fecha de subida", className="text-body-secondary d-block"),
+                        dcc.DatePickerRange(id="filtro-fecha-alta", display_format="DD/MM/YYYY", clearable=True,
+                                            start_date_placeholder_text="Desde", end_date_placeholder_text="Hasta"),
+                    ], width=3),
+                    dbc.Col([
+                        # Por defecto basta con que el título tenga uno de los países (o géneros) elegidos
+                        dcc.Checklist(
+                            id="filtro-coincidir",
+                            options=[
+                                {"label": "Con todos los países elegidos", "value": "country"},
+                                {"label": "Con todos los géneros elegidos", "value": "listed_in"},
+                            ],
+                            value=[],
+                            inputStyle={"margin-right": "5px"},
+                            className="text-body-secondary"
+                        ),
+                    ], width=3),
+                ]),
+            ])),
+            id="collapse-filtros",
+            is_open=False
+        ),
+    ], className="mx-5 mb-3")
+
+
+# Abre o cierra el panel en el navegador
+clientside_callback(
+    ClientsideFunction(namespace="filtros", function_name="alternar_panel"),
+    Output("collapse-filtros", "is_open"),
+    Input("btn-filtros", "n_clicks"),
+    State("collapse-filtros", "is_open"),
+    prevent_initial_call=True
+)
+
+# Opciones y límites de los controles, a partir del índice de filtros (sólo la primera vez que se abre)
+@callback(
+    Output("filtro-tipo", "options"),
+    Output("filtro-rating", "options"),
+    Output("filtro-pais", "options"),
+    Output("filtro-genero", "options"),
+    Output("filtro-estreno", "min"),
+    Output("filtro-estreno", "max"),
+    Output("filtro-estreno", "value"),
+    Output("filtro-estreno", "marks"),
+    Output("filtro-fecha-alta", "min_date_allowed"),
+    Output("filtro-fecha-alta", "max_date_allowed"),
+    Input("collapse-filtros", "is_open"),
+    State("filtro-pais", "options"),
+    prevent_initial_call=True
+)
+def cargar_opciones_filtros(abierto, opciones_pais):
+    if not abierto or opciones_pais:
+        raise PreventUpdate
+
+    index = get_filter_index()
+    years = index.release_year
+    first, last = int(years.min()), int(years.max())
+    dates = index.date_added[index.date_added != NO_DATE].astype("datetime64[D]")
+
+    return (
+        [{"label": TYPE_LABELS_ES.get(value, value), "value": value} for value in index.values["type"]],
+        [{"label": value, "value": value} for value in index.values["rating"]],
+        [{"label": value, "value": value} for value in index.values["country"] if value],
+        [{"label": value, "value": value} for value in index.values["listed_in"] if value],
+        first, last, [first, last],
+        {year: str(year) for year in range(first - first % 10 + 10, last + 1, 10)},
+        str(dates.min()), str(dates.max()),
+    )
+
+# Los controles se combinan en el navegador en el Store de la selección (sin petición al servidor);
+# el Store sólo cambia si cambia la selección, y con ello las pestañas se vuelven a dibujar
+clientside_callback(
+    ClientsideFunction(namespace="filtros", function_name="combinar"),
+    Output("filtros-globales", "data"),
+    Input("filtro-tipo", "value"),
+    Input("filtro-rating", "value"),
+    Input("filtro-pais", "value"),
+    Input("filtro-genero", "value"),
+    Input("filtro-coincidir", "value"),
+    Input("filtro-estreno", "value"),
+    Input("filtro-fecha-alta", "start_date"),
+    Input("filtro-fecha-alta", "end_date"),
+    State("filtro-estreno", "min"),
+    State("filtro-estreno", "max"),
+    State("filtros-globales", "data"),
+    prevent_initial_call=True
+)
+
+# Número de títulos seleccionados junto al botón del panel
+@callback(
+    Output("resumen-filtros", "children"),
+    Input("filtros-globales", "data")
+)
+def resumir_filtros(filtros):
+    filtros = normalize_filters(filtros)
+    if not filtros:
+        return ""
+    index = get_filter_index()
+    return f"{index.count(filtros):,} de {index.n_rows:,} títulos".replace(",", ".")
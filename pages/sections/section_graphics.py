@@ -1,5 +1,6 @@
 # Importación de componentes esenciales de Dash para diseño y callbacks
-from dash import dcc, html, callback, Input, Output, State
+from dash import dcc, html, callback, clientside_callback, ClientsideFunction, Input, Output, State, MATCH
+from dash.exceptions import PreventUpdate
 
 # Importación de funciones de gráficos desde figures.py
 from pages.sections.figures import *
@@ -8,10 +9,166 @@ import dash_bootstrap_components as dbc
 # Importación específica de un gráfico que necesita interacción con radio buttons
 from pages.sections.figures import get_bar_plot_by_period
 
+# Construcción en paralelo de las figuras de la pestaña (ver figure_pipeline.py)
+from pages.sections.figure_pipeline import build_figures
+
+# El árbol de componentes de la pestaña se guarda en la caché de figuras (por versión de los datos)
+from pages.sections.figure_cache import cached_figure
+
+# Años con datos del mapa de evolución por país (gráfico 9)
+from pages.sections.choropleth_frames import get_year_country_matrix
+
+# Filtros globales de la página de análisis (ver section_filters.py)
+from pages.sections.filters import get_filter_index, normalize_filters, with_date_range
+from pages.sections.section_filters import sin_resultados
+
+# Índice temporal de la fecha de subida para el deslizador de los gráficos 4 y 5 (ver time_index.py)
+import numpy as np
+from pages.sections.aggregates import INGESTION_MODE
+from pages.sections.time_index import get_time_index
+
+# Figuras de la pestaña en el orden en que aparecen en la página
+GRAPHICS_FIGURES = [
+    get_pie_chart_type,
+    get_bubble_chart_rating,
+    get_heatmap_type_rating,
+    get_line_chart_date_added,
+    get_histogram_duration_movies,
+    get_histogram_duration_series,
+    get_bar_chart_country,
+    get_choropleth_frame,
+    get_treemap_genres,
+    get_choropleth_dominant_genre,
+    get_bar_chart_top_actors,
+    get_bar_chart_top_directors,
+    get_sunburst_director_genre_actor,
+]
+
+# Periodos del gráfico 4: sus tres figuras se envían con la pestaña y el navegador cambia entre ellas
+# sin llamar al servidor (ver graficos.grafico_periodo en assets/custom.js)
+PERIODOS = ["año", "mes", "día"]
+
+# Número de figuras (las de la primera sección) que se construyen al abrir la pestaña; el resto se
+# piden con cargar_grafico cuando su sección se acerca a la pantalla (ver assets/custom.js)
+EAGER_FIGURES = 2
+
+# Figura ligera que ocupa el sitio de un gráfico diferido hasta que llega el real
+PLACEHOLDER_FIGURE = {
+    "data": [],
+    "layout": {
+        "paper_bgcolor": "rgba(0,0,0,0)",
+        "plot_bgcolor": "rgba(0,0,0,0)",
+        "xaxis": {"visible": False},
+        "yaxis": {"visible": False},
+        "annotations": [{"text": "Cargando gráfico...", "showarrow": False, "font": {"color": "#888888", "size": 16}}],
+    },
+}
+
+
+# Gráficos que se recortan con el deslizador de fecha de subida (además del gráfico 4, por periodo)
+TIME_FIGURES = [get_line_chart_date_added]
+
+
+def limites_subida():
+    # Primer y último mes (contados desde enero de 1970) con títulos añadidos, o None si no hay ninguno
+    days = get_time_index().days
+    if not len(days):
+        return None
+    return tuple(int(mes) for mes in days[[0, -1]].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64))
+
+
+def rango_subida(valor):
+    """
+    Fechas ISO (del primer día del mes inicial al último día del mes final) de los meses elegidos en el
+    deslizador de fecha de subida, o None si abarcan todos los meses con títulos (sin recorte).
+    """
+    limites = limites_subida()
+    if not valor or not limites or (valor[0] <= limites[0] and valor[1] >= limites[1]):
+        return None
+    desde = np.datetime64(int(valor[0]), "M").astype("datetime64[D]")
+    hasta = np.datetime64(int(valor[1]) + 1, "M").astype("datetime64[D]") - 1
+    return str(desde), str(hasta)
+
+
+def resumen_subida(rango, filtros):
+    # Títulos añadidos en el rango y tamaño del catálogo al final del rango (sólo títulos con fecha de subida)
+    if rango is None:
+        return ""
+    desde, hasta = rango
+    if filtros:
+        # Con filtros globales se cuentan con los bitsets del índice de filtros
+        index = get_filter_index()
+        anadidos = index.count(with_date_range(filtros, rango))
+        catalogo = index.count(with_date_range(filtros, (None, hasta)))
+    else:
+        # Sin filtros, con dos búsquedas binarias en el índice temporal
+        index = get_time_index()
+        anadidos, catalogo = index.count(desde, hasta), index.count(None, hasta)
+
+    def fecha(iso):
+        return "/".join(reversed(iso.split("-")))
+
+    return (
+        f"{anadidos:,} títulos añadidos entre el {fecha(desde)} y el {fecha(hasta)} · "
+        f"{catalogo:,} en el catálogo a {fecha(hasta)}"
+    ).replace(",", ".")
+
+
+def deslizador_subida():
+    # Deslizador de meses de la fecha de subida (no aparece en el modo por bloques ni sin fechas de subida)
+    limites = None if INGESTION_MODE == "chunked" else limites_subida()
+    if limites is None:
+        return dcc.Store(id="rango-subida", data=None)
+
+    primero, ultimo = limites
+    paso = max(1, (ultimo - primero) // 12 // 8)
+    return html.Div([
+        # Rango elegido en fechas ISO (None = todas); lo usan los gráficos diferidos al construirse
+        dcc.Store(id="rango-subida", data=None),
+        html.Label("Fecha de subida", className="text-body-secondary"),
+        dcc.RangeSlider(
+            id="slider-rango-subida", min=primero, max=ultimo, step=1, value=[primero, ultimo],
+            marks={mes: str(1970 + mes // 12) for mes in range(primero + (-primero) % 12, ultimo + 1, 12 * paso)},
+            allowCross=False
+        ),
+        html.Div(id="resumen-rango-subida", className="text-body-secondary text-center small"),
+    ], className="mx-5 mb-4")
+
+
+def lazy_graph(builder, figura, **kwargs):
+    # Gráfico ya construido si está en 'figura' o, si no, gráfico diferido con la figura provisional
+    if builder in figura:
+        return dcc.Graph(figure=figura[builder], **kwargs)
+    index = GRAPHICS_FIGURES.index(builder)
+    return dcc.Graph(id={"type": "grafico-diferido", "index": index}, figure=PLACEHOLDER_FIGURE, **kwargs)
+
+
+@cached_figure
+def layout(filtros=None):
+    # 'filtros': selección de los filtros globales (normalizada), que se aplica a todos los gráficos
+    if filtros and get_filter_index().count(filtros) == 0:
+        return sin_resultados()
+
+    # Sólo se construyen (a la vez) las figuras de la primera sección, así que el tiempo hasta que se
+    # muestra la pestaña no depende del resto de gráficos
+    eager = GRAPHICS_FIGURES[:EAGER_FIGURES]
+    calls = [(builder, (), {"filtros": filtros}) for builder in eager]
+    calls += [(get_bar_plot_by_period, (periodo,), {"filtros": filtros}) for periodo in PERIODOS]
+    built = build_figures(calls)
+    figura = dict(zip(eager, built))
+    figuras_periodo = dict(zip(PERIODOS, built[len(eager):]))
+
+    # Años del deslizador del mapa de evolución por país (los del catálogo completo si la selección
+    # no tiene ningún título con fecha de subida y país)
+    years = get_year_country_matrix(filtros).years.tolist() or get_year_country_matrix().years.tolist()
 
-
-def layout():
     return html.Div([
+        # Marcas de visibilidad de los gráficos diferidos: custom.js las pone a True al acercarse su sección
+        html.Div([
+            dcc.Store(id={"type": "grafico-visible", "index": index}, data=False)
+            for index in range(EAGER_FIGURES, len(GRAPHICS_FIGURES))
+        ]),
+
         # Índice de navegación
         html.Div([
             html.H5("Índice", className="text-center text-gradient my-3"),
@@ -105,10 +262,10 @@ def layout():
                         className="text-body-secondary text-center mb-3"
                     ),
                     # Gráfico
-                    dcc.Graph(figure=get_pie_chart_type()),
+                    lazy_graph(get_pie_chart_type, figura),
 
                     # Botón para mostrar la interpretación del gráfico
-                    dbc.Button("Ver interpretación", id="btn-explica-1", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 1}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody(
@@ -118,7 +275,7 @@ def layout():
                                 ), className="mx-3 my-2" , style={"textAlign": "justify"}
                             )
                         ),
-                        id="collapse-explica-1",
+                        id={"type": "collapse-explica", "index": 1},
                         is_open=False,
                         className="mt-2"
                     )
@@ -132,9 +289,9 @@ def layout():
                         "Distribución de las clasificaciones de edad del contenido disponible en Netflix.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_bubble_chart_rating()),
+                    lazy_graph(get_bubble_chart_rating, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-2", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 2}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody(
@@ -145,7 +302,7 @@ def layout():
                                 ), className="mx-3 my-2" , style={"textAlign": "justify"}
                             )
                         ),
-                        id="collapse-explica-2",
+                        id={"type": "collapse-explica", "index": 2},
                         is_open=False,
                         className="mt-2"
                     )
@@ -164,9 +321,9 @@ def layout():
                         "Análisis cruzado entre tipo de contenido y su clasificación por edad.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_heatmap_type_rating()),
+                    lazy_graph(get_heatmap_type_rating, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-3", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 3}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody(
@@ -182,7 +339,7 @@ def layout():
                                 ), className="mx-3 my-2" , style={"textAlign": "justify"}
                             )
                         ),
-                        id="collapse-explica-3",
+                        id={"type": "collapse-explica", "index": 3},
                         is_open=False,
                         className="mt-2"
                     )
@@ -215,10 +372,15 @@ def layout():
                         className="text-center text-body-secondary mb-4 custom-radio-group"
                     ),
 
-                    # El gráfico cambiará dinámicamente según la opción seleccionada
+                    # Recorte de este gráfico y del gráfico 5 a los títulos añadidos en un rango de fechas
+                    deslizador_subida(),
+
+                    # El gráfico cambiará dinámicamente según la opción seleccionada (en el navegador,
+                    # con las figuras de los tres periodos ya calculadas)
+                    dcc.Store(id="figuras-periodo", data=figuras_periodo),
                     dcc.Graph(id="grafico-periodo"),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-4", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 4}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -231,7 +393,7 @@ def layout():
 
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-4",
+                        id={"type": "collapse-explica", "index": 4},
                         is_open=False,
                         className="mt-2"
                     )
@@ -249,9 +411,9 @@ def layout():
                         "Evolución de la cantidad de contenidos agregados a Netflix a lo largo de los años.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_line_chart_date_added()),
+                    lazy_graph(get_line_chart_date_added, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-5", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 5}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -263,7 +425,7 @@ def layout():
                                     "Antes de 2015, la cantidad de agregados anuales era muy baja, lo que indica que Netflix aún no había adoptado su modelo actual de producción y distribución intensiva. El salto exponencial posterior marca el periodo en el que la plataforma se consolidó como líder global del streaming.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-5",
+                        id={"type": "collapse-explica", "index": 5},
                         is_open=False,
                         className="mt-2"
                     )
@@ -282,9 +444,9 @@ def layout():
                         "Análisis de la duración de las películas disponibles en Netflix.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_histogram_duration_movies()),
+                    lazy_graph(get_histogram_duration_movies, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-6", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 6}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -296,7 +458,7 @@ def layout():
                                     "La forma de la distribución tiene una ligera simetría con una caída gradual en ambos extremos, lo que reafirma que la plataforma prioriza la producción y adquisición de películas dentro de una duración convencional.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-6",
+                        id={"type": "collapse-explica", "index": 6},
                         is_open=False,
                         className="mt-2"
                     )
@@ -311,9 +473,9 @@ def layout():
                         "Análisis de la duración de las series presentes en Netflix.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_histogram_duration_series()),
+                    lazy_graph(get_histogram_duration_series, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-7", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 7}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -326,7 +488,7 @@ def layout():
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
 
                         ),
-                        id="collapse-explica-7",
+                        id={"type": "collapse-explica", "index": 7},
                         is_open=False,
                         className="mt-2"
                     )
@@ -344,9 +506,9 @@ def layout():
                         "Análisis de los países que más contenidos aportan al catálogo de Netflix.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_bar_chart_country()),
+                    lazy_graph(get_bar_chart_country, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-8", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 8}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -361,7 +523,7 @@ def layout():
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
 
                         ),
-                        id="collapse-explica-8",
+                        id={"type": "collapse-explica", "index": 8},
                         is_open=False,
                         className="mt-2"
                     )
@@ -382,11 +544,29 @@ def layout():
                         className="text-body-secondary text-center mb-3"
                     ),
                     html.Div(
-                        dcc.Graph(figure=get_animated_choropleth_map(),style={"width": "80%", "height": "80vh"}),
+                        lazy_graph(get_choropleth_frame, figura, style={"width": "80%", "height": "80vh"}),
                         style={"display": "flex", "justifyContent": "center"}
                     ),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-9", color="danger", className="mt-2"),
+                    # Controles del mapa: cada año se pide al servidor al moverse el deslizador o al reproducir
+                    html.Div([
+                        dbc.Button("▶ Reproducir", id="btn-play-mapa", color="danger", size="sm", className="me-3"),
+                        html.Div(
+                            dcc.Slider(
+                                id="slider-anio-mapa",
+                                min=int(years[0]),
+                                max=int(years[-1]),
+                                step=None,                                  # Sólo los años con datos
+                                value=int(years[0]),
+                                marks={int(year): str(year) for year in years}
+                            ),
+                            style={"flex": 1}
+                        ),
+                        dbc.Switch(id="switch-acumulado-mapa", label="Acumulado", value=False, className="ms-3"),
+                    ], className="d-flex align-items-center w-75 mx-auto mt-2"),
+                    dcc.Interval(id="intervalo-mapa", interval=1000, disabled=True),
+
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 9}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -400,7 +580,7 @@ def layout():
                                     "En resumen, la evolución temporal del contenido por país no solo evidencia la expansión global de Netflix, sino también su adaptación cultural, apostando por la producción local y el consumo personalizado en función de las audiencias regionales.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-9",
+                        id={"type": "collapse-explica", "index": 9},
                         is_open=False,
                         className="mt-2"
                     )
@@ -418,9 +598,9 @@ def layout():
                         "Análisis de los géneros más comunes en el catálogo de Netflix.",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_treemap_genres()),
+                    lazy_graph(get_treemap_genres, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-10", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 10}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -434,7 +614,7 @@ def layout():
                                     "En resumen, la distribución por géneros refleja una estrategia de Netflix orientada a la diversidad, con una fuerte presencia internacional y un balance entre entretenimiento generalista y nichos culturales específicos.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-10",
+                        id={"type": "collapse-explica", "index": 10},
                         is_open=False,
                         className="mt-2"
                     )
@@ -457,14 +637,14 @@ def layout():
                         className="text-body-secondary text-center mb-3"
                     ),
                     html.Div(
-                        dcc.Graph(
-                            figure=get_choropleth_dominant_genre(),
+                        lazy_graph(
+                            get_choropleth_dominant_genre, figura,
                             style={"width": "80%", "height": "80vh"}
                         ),
                         style={"display": "flex", "justifyContent": "center"}
                     ),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-11", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 11}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -481,7 +661,7 @@ def layout():
                                     "La distribución del género más visto por país refleja no solo diferencias culturales en el consumo de entretenimiento, sino también la capacidad de Netflix para adaptar su catálogo y destacar tipos de contenido según los gustos locales. Esta flexibilidad en la curaduría de su oferta permite a la plataforma consolidarse como un referente global del entretenimiento personalizado.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-11",
+                        id={"type": "collapse-explica", "index": 11},
                         is_open=False,
                         className="mt-2"
                     )
@@ -500,9 +680,9 @@ def layout():
 
             dbc.Col(
                 html.Div([
-                    dcc.Graph(figure=get_bar_chart_top_actors()),
+                    lazy_graph(get_bar_chart_top_actors, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-12", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 12}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -512,7 +692,7 @@ def layout():
                                     "Además, también aparecen actores japoneses y estadounidenses como Takahiro Sakurai o Samuel L. Jackson, lo que indica una presencia multicultural aunque claramente liderada por el mercado indio.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-12",
+                        id={"type": "collapse-explica", "index": 12},
                         is_open=False,
                         className="mt-2"
                     )
@@ -521,9 +701,9 @@ def layout():
             ),
             dbc.Col(
                 html.Div([
-                    dcc.Graph(figure=get_bar_chart_top_directors()),
+                    lazy_graph(get_bar_chart_top_directors, figura),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-13", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 13}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -533,7 +713,7 @@ def layout():
                                     "Aunque también se encuentran figuras icónicas como Steven Spielberg o Martin Scorsese, su presencia es menor en comparación, lo que indica que la recurrencia no está necesariamente ligada al prestigio, sino al volumen de obras disponibles en la plataforma.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-13",
+                        id={"type": "collapse-explica", "index": 13},
                         is_open=False,
                         className="mt-2"
                     )
@@ -554,9 +734,9 @@ def layout():
                         "Representa las colaboraciones más frecuentes de forma visual y estructurada..",
                         className="text-body-secondary text-center mb-3"
                     ),
-                    dcc.Graph(figure=get_sunburst_director_genre_actor(),style={"height": "70vh", "width": "100%"}),
+                    lazy_graph(get_sunburst_director_genre_actor, figura, style={"height": "70vh", "width": "100%"}),
 
-                    dbc.Button("Ver interpretación", id="btn-explica-14", color="danger", className="mt-2"),
+                    dbc.Button("Ver interpretación", id={"type": "btn-explica", "index": 14}, color="danger", className="mt-2"),
                     dbc.Collapse(
                         dbc.Card(
                             dbc.CardBody([
@@ -573,7 +753,7 @@ def layout():
                                     "En definitiva, este gráfico ilustra cómo ciertos directores han construido relaciones recurrentes con actores específicos dentro de géneros determinados, creando patrones de colaboración que forman parte del ADN del catálogo de Netflix.")
                             ], className="mx-3 my-2" , style={"textAlign": "justify"})
                         ),
-                        id="collapse-explica-14",
+                        id={"type": "collapse-explica", "index": 14},
                         is_open=False,
                         className="mt-2"
                     )
@@ -584,208 +764,94 @@ def layout():
 
     ])
 
-# Callback para actualizar el gráfico según el periodo seleccionado, se ejecuta cuando el usuario selecciona "Año", "Mes" o "Día" en los radio buttons
-@callback(
-    Output("grafico-periodo", "figure"),               # El gráfico que se actualizará
-    Input("radioItems-periodo", "value")               # La entrada es el valor seleccionado del RadioItems
-)
-def actualizar_grafico(periodo):
-    # Llama a una función que genera el gráfico correspondiente según el periodo elegido
-    return get_bar_plot_by_period(periodo)
-
-@callback(
-    Output("collapse-explica-1", "is_open"),           # Controla si el panel colapsable está abierto
-    Output("btn-explica-1", "children"),               # Cambia el texto del botón
-    Input("btn-explica-1", "n_clicks"),                # Cuando se hace clic en el botón
-    State("collapse-explica-1", "is_open"),            # Estado actual del panel (abierto o cerrado)
-)
-def toggle_collapse_1(n, is_open):
-    if n:
-        nuevo_estado = not is_open                     # Cambia el estado actual
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-
+# Callback que cambia el fotograma del mapa de evolución por país (año del deslizador y vista acumulada o no)
 @callback(
-    Output("collapse-explica-2", "is_open"),
-    Output("btn-explica-2", "children"),
-    Input("btn-explica-2", "n_clicks"),
-    State("collapse-explica-2", "is_open"),
+    Output({"type": "grafico-diferido", "index": GRAPHICS_FIGURES.index(get_choropleth_frame)}, "figure", allow_duplicate=True),
+    Input("slider-anio-mapa", "value"),
+    Input("switch-acumulado-mapa", "value"),
+    State("filtros-globales", "data"),
+    prevent_initial_call=True
 )
+def actualizar_mapa(anio, acumulado, filtros):
+    return get_choropleth_frame(anio, bool(acumulado), filtros=normalize_filters(filtros))
 
-def toggle_collapse_2(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
+# Callback del botón de reproducir: activa o detiene el avance automático de los años
 @callback(
-    Output("collapse-explica-3", "is_open"),
-    Output("btn-explica-3", "children"),
-    Input("btn-explica-3", "n_clicks"),
-    State("collapse-explica-3", "is_open"),
+    Output("intervalo-mapa", "disabled"),
+    Output("btn-play-mapa", "children"),
+    Input("btn-play-mapa", "n_clicks"),
+    State("intervalo-mapa", "disabled"),
+    prevent_initial_call=True
 )
+def reproducir_mapa(n, detenido):
+    return (False, "⏸ Pausar") if detenido else (True, "▶ Reproducir")
 
-def toggle_collapse_3(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
+# Callback que avanza el deslizador al año siguiente (y vuelve al primero tras el último) mientras se reproduce
 @callback(
-    Output("collapse-explica-4", "is_open"),
-    Output("btn-explica-4", "children"),
-    Input("btn-explica-4", "n_clicks"),
-    State("collapse-explica-4", "is_open"),
+    Output("slider-anio-mapa", "value"),
+    Input("intervalo-mapa", "n_intervals"),
+    State("slider-anio-mapa", "value"),
+    State("filtros-globales", "data"),
+    prevent_initial_call=True
 )
+def avanzar_mapa(n, anio, filtros):
+    matrix = get_year_country_matrix(normalize_filters(filtros))
+    if not len(matrix.years):
+        raise PreventUpdate
+    return int(matrix.years[(matrix.year_index(anio) + 1) % len(matrix.years)])
 
-def toggle_collapse_4(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
+# Callback que construye un gráfico diferido cuando custom.js marca su sección como (casi) visible
 @callback(
-    Output("collapse-explica-5", "is_open"),
-    Output("btn-explica-5", "children"),
-    Input("btn-explica-5", "n_clicks"),
-    State("collapse-explica-5", "is_open"),
+    Output({"type": "grafico-diferido", "index": MATCH}, "figure"),
+    Input({"type": "grafico-visible", "index": MATCH}, "data"),
+    State({"type": "grafico-visible", "index": MATCH}, "id"),
+    State("filtros-globales", "data"),
+    State("rango-subida", "data"),
+    prevent_initial_call=True
 )
-
-def toggle_collapse_5(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
+def cargar_grafico(visible, id_visible, filtros, rango):
+    if not visible:
+        raise PreventUpdate
+    builder = GRAPHICS_FIGURES[id_visible["index"]]
+    if builder in TIME_FIGURES:
+        return builder(filtros=normalize_filters(filtros), rango=tuple(rango) if rango else None)
+    return builder(filtros=normalize_filters(filtros))
+
+# Callback del deslizador de fecha de subida: vuelve a construir las figuras del gráfico 4 (los tres
+# periodos) y el gráfico 5 sólo con los títulos añadidos en el rango (recuentos del índice temporal)
 @callback(
-    Output("collapse-explica-6", "is_open"),
-    Output("btn-explica-6", "children"),
-    Input("btn-explica-6", "n_clicks"),
-    State("collapse-explica-6", "is_open"),
+    Output("figuras-periodo", "data"),
+    Output({"type": "grafico-diferido", "index": GRAPHICS_FIGURES.index(get_line_chart_date_added)}, "figure", allow_duplicate=True),
+    Output("rango-subida", "data"),
+    Output("resumen-rango-subida", "children"),
+    Input("slider-rango-subida", "value"),
+    State("filtros-globales", "data"),
+    prevent_initial_call=True
 )
-
-def toggle_collapse_6(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-7", "is_open"),
-    Output("btn-explica-7", "children"),
-    Input("btn-explica-7", "n_clicks"),
-    State("collapse-explica-7", "is_open"),
+def actualizar_rango_subida(valor, filtros):
+    filtros = normalize_filters(filtros)
+    rango = rango_subida(valor)
+    calls = [(get_bar_plot_by_period, (periodo,), {"filtros": filtros, "rango": rango}) for periodo in PERIODOS]
+    calls += [(builder, (), {"filtros": filtros, "rango": rango}) for builder in TIME_FIGURES]
+    built = build_figures(calls)
+    return dict(zip(PERIODOS, built)), built[len(PERIODOS)], rango, resumen_subida(rango, filtros)
+
+# Cambio de periodo del gráfico 4 en el navegador: elige la figura ya calculada del periodo seleccionado
+# (también al montar la pestaña, para mostrar la del periodo por defecto, y al cambiar el rango de fechas)
+clientside_callback(
+    ClientsideFunction(namespace="graficos", function_name="grafico_periodo"),
+    Output("grafico-periodo", "figure"),
+    Input("radioItems-periodo", "value"),
+    Input("figuras-periodo", "data")
 )
 
-def toggle_collapse_7(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-8", "is_open"),
-    Output("btn-explica-8", "children"),
-    Input("btn-explica-8", "n_clicks"),
-    State("collapse-explica-8", "is_open"),
+# Un único callback en el navegador para los 14 botones "Ver interpretación": abre o cierra el panel
+# del mismo índice que el botón pulsado y cambia el texto del botón
+clientside_callback(
+    ClientsideFunction(namespace="graficos", function_name="alternar_interpretacion"),
+    Output({"type": "collapse-explica", "index": MATCH}, "is_open"),
+    Output({"type": "btn-explica", "index": MATCH}, "children"),
+    Input({"type": "btn-explica", "index": MATCH}, "n_clicks"),
+    State({"type": "collapse-explica", "index": MATCH}, "is_open"),
+    prevent_initial_call=True
 )
-
-def toggle_collapse_8(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-9", "is_open"),
-    Output("btn-explica-9", "children"),
-    Input("btn-explica-9", "n_clicks"),
-    State("collapse-explica-9", "is_open"),
-)
-
-def toggle_collapse_9(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-10", "is_open"),
-    Output("btn-explica-10", "children"),
-    Input("btn-explica-10", "n_clicks"),
-    State("collapse-explica-10", "is_open"),
-)
-
-def toggle_collapse_10(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-11", "is_open"),
-    Output("btn-explica-11", "children"),
-    Input("btn-explica-11", "n_clicks"),
-    State("collapse-explica-11", "is_open"),
-)
-
-def toggle_collapse_11(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-12", "is_open"),
-    Output("btn-explica-12", "children"),
-    Input("btn-explica-12", "n_clicks"),
-    State("collapse-explica-12", "is_open"),
-)
-
-def toggle_collapse_12(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-13", "is_open"),
-    Output("btn-explica-13", "children"),
-    Input("btn-explica-13", "n_clicks"),
-    State("collapse-explica-13", "is_open"),
-)
-
-def toggle_collapse_13(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
-@callback(
-    Output("collapse-explica-14", "is_open"),
-    Output("btn-explica-14", "children"),
-    Input("btn-explica-14", "n_clicks"),
-    State("collapse-explica-14", "is_open"),
-)
-
-def toggle_collapse_14(n, is_open):
-    if n:
-        nuevo_estado = not is_open
-        texto = "Ocultar interpretación" if nuevo_estado else "Ver interpretación"
-        return nuevo_estado, texto
-    return is_open, "Ver interpretación"
-
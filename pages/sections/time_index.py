@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from pages.sections.data_loader import (
+    INCREMENTAL_UPDATES, MONTH_NAMES, WEEKDAY_NAMES, DateDimension, get_dataset, get_date_dimension,
+)
+from pages.sections.bridges import BridgeTable, get_bridge, merge_sorted
+
+# Dimensiones del índice temporal: columnas con un valor por título y columnas multivaluadas
+# (un título cuenta una vez por cada entidad de su lista)
+TIME_DIMENSIONS = ["type", "rating", "release_year"]
+TIME_MULTI_VALUED_DIMENSIONS = ["listed_in"]
+
+# Recuentos por periodo de subida que se calculan a partir de los días del índice
+PERIODS = ["year_added", "month_added", "weekday_added"]
+
+
+def _day(date):
+    # Ordinal del día (días desde 1970-01-01) de una fecha ISO ("2019-12-31")
+    return int(np.datetime64(str(date)[:10], "D").astype(np.int64))
+
+
+def _cumulative(day_codes, value_codes, n_days, n_values):
+    """
+    Sumas acumuladas por día de los recuentos de cada valor: matriz (n_days + 1) × n_values cuya fila i
+    es el número de apariciones de cada valor en los días anteriores al i-ésimo (la fila 0 es cero).
+    """
+    counts = np.bincount(day_codes * n_values + value_codes, minlength=n_days * n_values).reshape(n_days, n_values)
+    return np.vstack([np.zeros((1, n_values), dtype=np.int64), counts.cumsum(axis=0)])
+
+
+def _labeled_counts(counts, labels, name):
+    # Recuentos no nulos como Series con las etiquetas ordenadas como índice (como groupby(...).size())
+    present = np.flatnonzero(counts)
+    present = present[np.argsort(labels[present], kind="stable")]
+    return pd.Series(counts[present].astype(np.int64), index=pd.Index(labels[present], name=name), name="count")
+
+
+def _expanded_rows(days, new_days):
+    # Fila de las sumas acumuladas sobre 'days' que corresponde a cada fila sobre 'new_days' (que los incluye)
+    return np.append(np.searchsorted(days, new_days, side="left"), len(days))
+
+
+def _expand(cumulative, days, columns, new_days, n_values):
+    # Sumas acumuladas sobre 'days' llevadas a 'new_days' (que los incluye), con la columna de cada
+    # valor en la posición indicada en 'columns' de un total de n_values valores
+    result = np.zeros((len(new_days) + 1, n_values), dtype=np.int64)
+    result[:, columns] = cumulative[_expanded_rows(days, new_days)]
+    return result
+
+
+class TimeIndex:
+    """
+    Índice temporal de la fecha de subida con sumas acumuladas (prefix sums) por dimensión, para
+    responder sin recorrer las filas cuántos títulos de cada tipo, clasificación, año de estreno o
+    género se añadieron entre dos fechas y cómo era el catálogo en una fecha dada.
+
+    - days: días distintos (ordinales desde 1970-01-01) con algún título añadido, ordenados.
+    - values[dim]: valores de cada dimensión, ordenados.
+    - cumulative[dim]: matriz (len(days) + 1) × len(values[dim]); su fila i cuenta los títulos (o pares
+      título-género) de cada valor añadidos antes de days[i].
+    - total: sumas acumuladas del número de títulos (len(days) + 1).
+
+    Un rango [desde, hasta] se traduce con dos búsquedas binarias en 'days' a un par de filas, y sus
+    recuentos son la diferencia de esas filas: O(log días + valores) sea cual sea el tamaño del catálogo.
+    Los títulos sin fecha de subida no entran en el índice.
+    """
+
+    def __init__(self, days, values, cumulative, total):
+        self.days = days
+        self.values = values
+        self.cumulative = cumulative
+        self.total = total
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        bridges = {dim: get_bridge(dim, dataset) for dim in TIME_MULTI_VALUED_DIMENSIONS}
+        return cls.from_frame(dataset.frame, bridges, get_date_dimension(dataset))
+
+    @classmethod
+    def from_frame(cls, frame, bridges, dates):
+        # Índice de un DataFrame limpio con sus tablas puente de TIME_MULTI_VALUED_DIMENSIONS y su DateDimension
+        dated = dates.dated
+        days, day_codes = np.unique(dates.day[dated], return_inverse=True)
+        n_days = len(days)
+        values, cumulative = {}, {}
+
+        for dim in TIME_DIMENSIONS:
+            serie = frame[dim][dated]
+            serie = serie.astype(object) if isinstance(serie.dtype, pd.CategoricalDtype) else serie
+            codes, uniques = pd.factorize(serie, sort=True)
+            valid = codes >= 0
+            values[dim] = np.asarray(uniques)
+            cumulative[dim] = _cumulative(day_codes[valid], codes[valid].astype(np.int64), n_days, len(uniques))
+
+        # Columnas multivaluadas: un par por título y entidad, con el día del título
+        title_days = np.full(len(frame), -1, dtype=np.int64)
+        title_days[dated] = day_codes
+        for dim in TIME_MULTI_VALUED_DIMENSIONS:
+            bridge = bridges[dim]
+            pair_days = title_days[bridge.title_ids]
+            valid = pair_days >= 0
+            values[dim] = bridge.entities
+            cumulative[dim] = _cumulative(
+                pair_days[valid], bridge.entity_ids[valid].astype(np.int64), n_days, len(bridge.entities)
+            )
+
+        total = np.concatenate([[0], np.bincount(day_codes, minlength=n_days).cumsum()]).astype(np.int64)
+        return cls(days, values, cumulative, total)
+
+    def merge(self, other):
+        """
+        Índice con los títulos de los dos índices (p. ej. el catálogo y unas filas añadidas). Las sumas
+        acumuladas de cada uno se llevan a la unión de días y valores (la fila de un día nuevo es la del
+        siguiente día que ya tenía) y se suman, sin recorrer los títulos.
+        """
+        days = np.union1d(self.days, other.days)
+        values, cumulative = {}, {}
+        for dim in self.values:
+            values[dim], shifted, other_positions = merge_sorted(self.values[dim], other.values[dim])
+            cumulative[dim] = (
+                _expand(self.cumulative[dim], self.days, shifted, days, len(values[dim]))
+                + _expand(other.cumulative[dim], other.days, other_positions, days, len(values[dim]))
+            )
+        total = self.total[_expanded_rows(self.days, days)] + other.total[_expanded_rows(other.days, days)]
+        return TimeIndex(days, values, cumulative, total)
+
+    def _bounds(self, start=None, end=None):
+        # Filas de las sumas acumuladas que delimitan los días de [start, end] (fechas ISO; None = sin límite)
+        lo = 0 if start is None else int(np.searchsorted(self.days, _day(start), side="left"))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _day(end), side="right"))
+        return lo, max(lo, hi)
+
+    def count(self, start=None, end=None):
+        # Número de títulos añadidos entre start y end (ambos incluidos)
+        lo, hi = self._bounds(start, end)
+        return int(self.total[hi] - self.total[lo])
+
+    def counts(self, dim, start=None, end=None):
+        # Títulos de cada valor de 'dim' añadidos entre start y end (ambos incluidos), sin los valores a cero
+        lo, hi = self._bounds(start, end)
+        return _labeled_counts(self.cumulative[dim][hi] - self.cumulative[dim][lo], self.values[dim], dim)
+
+    def as_of(self, dim, date):
+        # Catálogo en una fecha: títulos de cada valor de 'dim' añadidos hasta ese día (incluido)
+        return self.counts(dim, None, date)
+
+    def period_counts(self, period, start=None, end=None):
+        """
+        Títulos añadidos entre start y end por año, mes o día de la semana de subida (uno de PERIODS),
+        con las mismas claves que los agregados del mismo nombre. Sólo se recorren los días del rango:
+        el recuento de cada día es la diferencia de dos sumas acumuladas consecutivas.
+        """
+        lo, hi = self._bounds(start, end)
+        dates = DateDimension.from_days(self.days[lo:hi])
+        per_day = np.diff(self.total[lo:hi + 1])
+        if period == "year_added":
+            years = dates.year.astype(np.int64)
+            first, last = (int(years.min()), int(years.max())) if len(years) else (0, -1)
+            labels, codes = np.arange(first, last + 1, dtype=np.int32), years - first
+        elif period == "month_added":
+            labels, codes = MONTH_NAMES, dates.month.astype(np.int64) - 1
+        else:
+            labels, codes = WEEKDAY_NAMES, dates.weekday.astype(np.int64)
+        return _labeled_counts(np.bincount(codes, weights=per_day, minlength=len(labels)), labels, period)
+
+
+def get_time_index(dataset=None):
+    # Índice temporal del dataset indicado (por defecto, el compartido), uno por versión del dataset
+    dataset = dataset or get_dataset()
+    return dataset.cached("time_index", lambda: TimeIndex.from_dataset(dataset))
+
+
+# Al añadir filas a un dataset su índice temporal se combina con el de las filas nuevas
+INCREMENTAL_UPDATES["time_index"] = lambda index, delta: index.merge(TimeIndex.from_frame(
+    delta, {dim: BridgeTable.from_series(delta[dim]) for dim in TIME_MULTI_VALUED_DIMENSIONS},
+    DateDimension.from_series(delta["date_added"]),
+))